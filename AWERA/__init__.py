@@ -1,5 +1,6 @@
 from .config import Config
-config = Config()
+# No files written on import, locations are written on the next update
+config = Config(write_locations=False)
 if not config.Plotting.plots_interactive:
     import matplotlib as mpl
     mpl.use('Pdf')
@@ -31,24 +31,17 @@ class ChainAWERA(Clustering, PowerProduction):
                                        locs_slice=None):
         # Returning masked array of power for
         # masking v outside of wind speed bounds of power curve
+        # Labels of the location only, if i_loc is given
         labels, backscaling, n_samples_per_loc, _ = self.read_labels(
-            locs_slice=locs_slice)
+            locs_slice=locs_slice, i_loc=i_loc)
 
-        if single_sample_id is None and i_loc is None:
-            matching_cluster = labels
-            profile_ids = np.array(matching_cluster) + 1
+        if single_sample_id is None:
+            matching_cluster = np.array(labels)
             backscaling = np.array(backscaling)
-        elif single_sample_id is None:
-            matching_cluster = np.array(labels[i_loc*n_samples_per_loc:
-                                               (i_loc+1)*n_samples_per_loc])
-            backscaling = np.array(backscaling[i_loc*n_samples_per_loc:
-                                               (i_loc+1)*n_samples_per_loc])
-            profile_ids = np.array(matching_cluster) + 1
+            profile_ids = matching_cluster + 1
         else:
-            matching_cluster = np.array([labels[
-                single_sample_id + i_loc*n_samples_per_loc]])
-            backscaling = np.array([backscaling[
-                single_sample_id + i_loc*n_samples_per_loc]])
+            matching_cluster = np.array([labels[single_sample_id]])
+            backscaling = np.array([backscaling[single_sample_id]])
             profile_ids = np.array([matching_cluster[0]+1])
 
         used_profiles = list(np.unique(profile_ids))
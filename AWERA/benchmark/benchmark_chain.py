@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Offline benchmark of the AWERA chain stages on synthetic ERA5 data.
+
+Synthetic ERA5-like files are written to the benchmark directory once and
+the chain stages - read, preprocess, cluster training, label prediction,
+power curves, frequency distribution and AEP - are run and timed one
+after the other. Timings are written to `benchmark_timings.csv` and can
+be compared to the timings of a previous run to spot regressions.
+
+"""
+import os
+import time
+from copy import copy
+import pandas as pd
+
+from ..config import Config
+from ..awera import ChainAWERA
+from ..wind_profile_clustering.read_requested_data import get_wind_data
+from ..wind_profile_clustering.preprocess_data import preprocess_data
+from ..utils.convenience_utils import write_timing_info
+from .synthetic_era5 import write_synthetic_era5
+
+all_stages = ['read', 'preprocess', 'cluster_train', 'predict',
+              'power_curve', 'frequency', 'aep']
+
+
+def get_benchmark_settings(data_settings, result_dir,
+                           n_clusters=3, n_pcs=3, n_cores=1):
+    """Config update for running the chain on the synthetic data."""
+    training = {key: data_settings[key]
+                for key in ['start_year', 'final_year']}
+    training.update({'n_locs': -1,
+                     'location_type': 'benchmark',
+                     'init_locs': None,
+                     'sample_ids': None,
+                     'sample_type': None})
+    data = copy(data_settings)
+    data.update({'use_data': 'ERA5',
+                 'n_locs': -1,
+                 'location_type': 'benchmark',
+                 'sample_ids': None,
+                 'sample_type': None})
+    return {
+        'General': {'write_output': True,
+                    'use_memmap': False},
+        'Processing': {'parallel': n_cores > 1,
+                       'n_cores': n_cores},
+        'Plotting': {'plots_interactive': False},
+        'Data': data,
+        'Clustering': {'n_clusters': n_clusters,
+                       'n_pcs': n_pcs,
+                       'training': training},
+        'IO': {'result_dir': os.path.join(result_dir, '')},
+        }
+
+
+def compare_timings(timings, reference_file, tolerance=.2):
+    """Print the timings relative to a reference benchmark run.
+
+    Returns:
+        list: Stages slower than the reference by more than tolerance.
+
+    """
+    reference = pd.read_csv(reference_file, index_col='stage')
+    regressions = []
+    print('Stage timings relative to {}:'.format(reference_file))
+    for stage, t in timings.items():
+        if stage not in reference.index:
+            continue
+        ratio = t/max(reference.loc[stage, 'time [s]'], 1e-9)
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(stage)
+            flag = '  <-- slower'
+        print('    {:<14} {:8.2f}s  x{:.2f}{}'.format(stage, t, ratio, flag))
+    return regressions
+
+
+def run_benchmark(benchmark_dir='benchmark/',
+                  stages=all_stages,
+                  n_clusters=3,
+                  n_pcs=3,
+                  n_cores=1,
+                  data_kwargs={},
+                  reference_file=None):
+    """Time the chain stages on synthetic ERA5 data.
+
+    Args:
+        benchmark_dir (str): Directory for synthetic data and results.
+        stages (list): Stages to time, subset of all_stages. Stages
+            depending on skipped stages read their input from the results
+            of a previous run.
+        n_clusters, n_pcs (int): Clustering settings.
+        n_cores (int): Number of processes, serial processing if 1.
+        data_kwargs (dict): Grid and period of the synthetic data,
+            passed to write_synthetic_era5.
+        reference_file (str, optional): Timings csv of a previous run
+            to compare to.
+
+    Returns:
+        dict: Time in seconds per stage.
+
+    """
+    data_dir = os.path.join(benchmark_dir, 'era5_synthetic')
+    result_dir = os.path.join(benchmark_dir, 'results')
+    for d in [data_dir, result_dir]:
+        if not os.path.isdir(d):
+            os.makedirs(d, exist_ok=True)
+
+    since = time.time()
+    data_settings = write_synthetic_era5(data_dir, **data_kwargs)
+    write_timing_info('Synthetic ERA5 data written.', time.time() - since)
+
+    # Default result directory is not used, write locations on update only
+    config = Config(write_locations=False)
+    config.update(get_benchmark_settings(data_settings, result_dir,
+                                         n_clusters=n_clusters,
+                                         n_pcs=n_pcs,
+                                         n_cores=n_cores))
+    chain = ChainAWERA(config)
+
+    timings = {}
+
+    def timed(stage, funct, *args, **kwargs):
+        since = time.time()
+        res = funct(*args, **kwargs)
+        timings[stage] = time.time() - since
+        write_timing_info('Benchmark stage {}.'.format(stage),
+                          timings[stage])
+        return res
+
+    data = None
+    if any(stage in stages for stage in ['read', 'preprocess',
+                                         'cluster_train', 'predict']):
+        data = timed('read', get_wind_data, config)
+    if 'preprocess' in stages:
+        timed('preprocess', preprocess_data, config, copy(data),
+              remove_low_wind_samples=True)
+    pipeline, cluster_mapping = None, None
+    if 'cluster_train' in stages:
+        _, pipeline, cluster_mapping = timed(
+            'cluster_train', chain.train_profiles,
+            data=copy(data), return_pipeline=True)
+    if 'predict' in stages:
+        timed('predict', chain.predict_labels,
+              data=copy(data), pipeline=pipeline,
+              cluster_mapping=cluster_mapping)
+    if 'power_curve' in stages:
+        timed('power_curve', chain.run_curves)
+    if 'frequency' in stages:
+        timed('frequency', chain.get_frequency)
+    if 'aep' in stages:
+        timed('aep', chain.aep)
+    if 'read' not in stages:
+        timings.pop('read', None)
+
+    n_locs = len(config.Data.locations)
+    n_samples = data['n_samples'] if data is not None else None
+    df = pd.DataFrame({'stage': list(timings),
+                       'time [s]': list(timings.values())})
+    df['n_locs'] = n_locs
+    df['n_samples'] = n_samples
+    if reference_file is not None:
+        compare_timings(timings, reference_file)
+    timings_file = os.path.join(benchmark_dir, 'benchmark_timings.csv')
+    df.to_csv(timings_file, index=False)
+    print('Benchmark timings ({} locations, {} samples) written to {}'
+          .format(n_locs, n_samples, timings_file))
+    return timings
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Synthetic ERA5-like model level and surface data.
+
+Writes small netCDF files in the layout read by `read_raw_data` and
+`read_ds_single_loc_files`: monthly surface files holding the surface
+pressure of the full grid and either location wise ('single_loc') or
+monthly ('monthly') model level files holding wind, temperature and
+humidity. The wind profiles follow a logarithmic profile with a random
+reference wind speed, a slowly varying direction and height dependent
+veering, evaluated at the model level heights.
+
+"""
+import os
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from ..wind_profile_clustering.era5_ml_height_calc import \
+    compute_level_heights
+
+
+def get_grid(lat_range, lon_range, grid_size):
+    """Grid coordinates, same as the all_lats/all_lons of the config."""
+    coords = []
+    for coord_range in [lat_range, lon_range]:
+        if coord_range[0] > coord_range[1]:
+            coords.append(list(np.arange(coord_range[0],
+                                         coord_range[1]-grid_size,
+                                         -grid_size)))
+        else:
+            coords.append(list(np.arange(coord_range[0],
+                                         coord_range[1]+grid_size,
+                                         grid_size)))
+    return coords
+
+
+def random_walk(n, scale, rng, n_smooth=24):
+    """Smoothed random walk, mimicking slowly varying synoptic conditions."""
+    walk = np.cumsum(rng.normal(0, scale, n + n_smooth))
+    kernel = np.ones(n_smooth)/n_smooth
+    return np.convolve(walk, kernel, mode='valid')[:n]
+
+
+def synthetic_location_data(hours, levels, rng):
+    """Model level data of a single location.
+
+    Returns:
+        dict: Model level wind (u, v), temperature (t) and humidity (q)
+            of shape (n_hours, n_levels) and surface pressure (sp).
+
+    """
+    n_hours = len(hours)
+    t_hours = np.arange(n_hours)
+    surface_pressure = 101325. + 800.*np.tanh(random_walk(n_hours, .05, rng))
+    t_surface = (283. + 4.*np.sin(2*np.pi*(t_hours/24. - .3))
+                 + 2.*np.tanh(random_walk(n_hours, .05, rng)))
+    # Temperature and specific humidity decrease with model level number
+    # towards higher levels, the lowest model level is 137
+    dlevel = (137 - np.asarray(levels))[np.newaxis, :]
+    t_levels = t_surface[:, np.newaxis] - .45*dlevel
+    q_levels = 6e-3*np.exp(-dlevel/40.)*np.ones((n_hours, 1))
+    level_heights, _ = compute_level_heights(levels, surface_pressure,
+                                             t_levels, q_levels)
+
+    # Logarithmic wind profiles, Weibull like reference wind speeds
+    v_ref = 1. + 15.*(.5 + .5*np.tanh(random_walk(n_hours, .05, rng)))**1.5 \
+        + rng.normal(0, .3, n_hours)
+    v_ref = np.clip(v_ref, .5, None)
+    roughness = .03 + .02*rng.random(n_hours)
+    v_levels = v_ref[:, np.newaxis] \
+        * np.log(level_heights/roughness[:, np.newaxis]) \
+        / np.log(100./roughness[:, np.newaxis])
+    v_levels *= 1 + rng.normal(0, .02, v_levels.shape)
+    veering = np.pi/8*(1 + np.tanh(random_walk(n_hours, .05, rng)))
+    direction = random_walk(n_hours, .05, rng)[:, np.newaxis] \
+        + veering[:, np.newaxis]*np.clip(level_heights/1000., 0, 1)
+    return {
+        'u': v_levels*np.cos(direction),
+        'v': v_levels*np.sin(direction),
+        't': t_levels,
+        'q': q_levels,
+        'sp': surface_pressure,
+        }
+
+
+def write_synthetic_era5(data_dir,
+                         lat_range=(52., 51.5),
+                         lon_range=(3., 3.5),
+                         grid_size=.25,
+                         start_year=2010,
+                         final_year=2010,
+                         year_final_month=1,
+                         n_levels=30,
+                         era5_data_input_format='single_loc',
+                         surface_file_name_format='{:d}_europe_{:d}_152.nc',
+                         model_level_file_name_format=(
+                             '{:d}_europe_{:d}_130_131_132_133_135.nc'),
+                         latitude_ds_file_name=(
+                             'loc-wise/europe_130_131_132_133_135'
+                             '_lat_{lat:.2f}_lon_{lon:.2f}.nc'),
+                         seed=0):
+    """Write synthetic ERA5-like netCDF files.
+
+    Args:
+        data_dir (str): Directory the files are written to, to be used as
+            Data: era5_data_dir.
+        lat_range, lon_range (tuple): Grid range as in the Data config.
+        grid_size (float): Grid spacing in degrees.
+        start_year, final_year, year_final_month (int): Hourly data is
+            written for months 1 to year_final_month of each year.
+        n_levels (int): Number of model levels, up to the lowest level 137.
+        era5_data_input_format (str): 'single_loc' or 'monthly' model
+            level files.
+        surface_file_name_format, model_level_file_name_format,
+        latitude_ds_file_name (str): File names relative to data_dir,
+            as in the Data: format config.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Data config settings matching the written files.
+
+    """
+    rng = np.random.default_rng(seed)
+    lats, lons = get_grid(lat_range, lon_range, grid_size)
+    levels = np.arange(138 - n_levels, 138)
+    months = [(y, m) for y in range(start_year, final_year + 1)
+              for m in range(1, year_final_month + 1)]
+    hours = np.concatenate([
+        pd.date_range('{}-{:02d}-01'.format(y, m), periods=24*pd.Period(
+            '{}-{:02d}'.format(y, m)).days_in_month, freq='h').values
+        for y, m in months])
+    month_of_hour = hours.astype('datetime64[M]')
+
+    shape_ml = (len(hours), len(levels), len(lats), len(lons))
+    ml_data = {key: np.empty(shape_ml, dtype=np.float32)
+               for key in ['u', 'v', 't', 'q']}
+    sp = np.empty((len(hours), len(lats), len(lons)), dtype=np.float32)
+    for i_lat in range(len(lats)):
+        for i_lon in range(len(lons)):
+            loc_data = synthetic_location_data(hours, levels, rng)
+            for key in ml_data:
+                ml_data[key][:, :, i_lat, i_lon] = loc_data[key]
+            sp[:, i_lat, i_lon] = loc_data['sp']
+
+    def dataset(hour_mask, lat_sel=slice(None), lon_sel=slice(None),
+                variables=('u', 'v', 't', 'q')):
+        coords = {'time': hours[hour_mask],
+                  'level': levels.astype(np.int32),
+                  'latitude': np.asarray(lats)[lat_sel],
+                  'longitude': np.asarray(lons)[lon_sel]}
+        data_vars = {}
+        for key in variables:
+            if key == 'sp':
+                data_vars[key] = (('time', 'latitude', 'longitude'),
+                                  sp[hour_mask][:, lat_sel, lon_sel])
+            else:
+                data_vars[key] = (('time', 'level', 'latitude', 'longitude'),
+                                  ml_data[key][hour_mask][:, :, lat_sel,
+                                                          lon_sel])
+        if variables == ('sp', ):
+            del coords['level']
+        return xr.Dataset(data_vars, coords=coords)
+
+    def write(ds, file_name):
+        file_name = os.path.join(data_dir, file_name)
+        if not os.path.isdir(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        ds.to_netcdf(file_name)
+
+    for y, m in months:
+        hour_mask = month_of_hour == np.datetime64('{}-{:02d}'.format(y, m))
+        write(dataset(hour_mask, variables=('sp', )),
+              surface_file_name_format.format(y, m))
+        if era5_data_input_format == 'monthly':
+            write(dataset(hour_mask), model_level_file_name_format.format(y, m))
+    if era5_data_input_format == 'single_loc':
+        all_hours = np.ones(len(hours), dtype=bool)
+        for i_lat, lat in enumerate(lats):
+            for i_lon, lon in enumerate(lons):
+                write(dataset(all_hours, lat_sel=slice(i_lat, i_lat + 1),
+                              lon_sel=slice(i_lon, i_lon + 1)),
+                      latitude_ds_file_name.format(lat=lat, lon=lon))
+
+    return {
+        'era5_data_dir': os.path.join(data_dir, ''),
+        'era5_data_input_format': era5_data_input_format,
+        'lat_range': list(lat_range),
+        'lon_range': list(lon_range),
+        'grid_size': grid_size,
+        'start_year': start_year,
+        'final_year': final_year,
+        'year_final_month': year_final_month,
+        'read_model_level_up_to': int(levels[0]),
+        'format': {
+            'surface_file_name_format': surface_file_name_format,
+            'model_level_file_name_format': model_level_file_name_format,
+            'latitude_ds_file_name': latitude_ds_file_name,
+            },
+        }
@@ -32,14 +32,16 @@ import importlib
 class Config:
     # TODO include production config (?)
 
-    def __init__(self, init_dict=None, interpret=True):
+    def __init__(self, init_dict=None, interpret=True, write_locations=True):
         # Handle config initialization from yaml file and runtime updating
+        # write_locations: write newly selected locations to file
         if init_dict is None:
-            self.update_from_file()
+            self.update_from_file(write_locations=write_locations)
         else:
-            self.update(init_dict, interpret=interpret)
+            self.update(init_dict, interpret=interpret,
+                        write_locations=write_locations)
 
-    def update(self, update_dict, interpret=True):
+    def update(self, update_dict, interpret=True, write_locations=True):
         for key, val in update_dict.items():
             if isinstance(val, dict):
                 try:
@@ -54,10 +56,11 @@ class Config:
                 setattr(self, key, val)
 
         if interpret:
-            self.interpret()
+            self.interpret(write_locations=write_locations)
 
     def update_from_file(self, path_config_yaml=None,
-                         config_file='config.yaml'):
+                         config_file='config.yaml',
+                         write_locations=True):
         # Read configuration from config.yaml file
         if path_config_yaml is None:
             # Read default configuration from package
@@ -66,9 +69,9 @@ class Config:
                 path_program_directory, '', config_file)
         with open(path_config_yaml, 'r') as f:
             initial_config = yaml.safe_load(f)
-        self.update(initial_config)
+        self.update(initial_config, write_locations=write_locations)
 
-    def interpret(self):
+    def interpret(self, write_locations=True):
         # Handle file naming, location selection, .. depending on config
         # All locations and seletect number of locations
         # Range of all locations
@@ -100,7 +103,8 @@ class Config:
             self.Data.all_lats,
             self.Data.all_lons,
             self.Data.grid_size,
-            init_locs=getattr(self, 'init_locs', None)
+            init_locs=getattr(self, 'init_locs', None),
+            write_output=write_locations
             ))
         # Get loction indices w.r.t. to full dataset
         try:
@@ -140,7 +144,8 @@ class Config:
                                   self.Data.all_lats,
                                   self.Data.all_lons,
                                   self.Data.grid_size,
-                                  init_locs=self.Clustering.training.init_locs
+                                  init_locs=self.Clustering.training.init_locs,
+                                  write_output=write_locations
                                   ))
         # Set correct n_locs
         setattr(self.Data, 'n_locs', len(self.Data.locations))
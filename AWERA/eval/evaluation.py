@@ -1,3 +1,4 @@
+import os
 import pickle
 import pandas as pd
 import copy
@@ -10,6 +11,7 @@ from ..utils.plotting_utils import plot_map, \
     plot_optimal_height_and_wind_speed_timeline, plot_timeline
 
 from ..utils.wind_resource_utils import calc_power
+from ..utils.cut_wind_speeds import get_cut_wind_speeds
 
 from ..wind_profile_clustering.read_requested_data import get_wind_data
 
@@ -22,6 +24,44 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 
+
+def combine_location_slices(file_name, n_slices, n_per_slice, n_locs, key):
+    """Combine location wise results of location slices.
+
+    Every slice is checked to be present and to hold the results of
+    exactly its locations before the results are copied into place.
+
+    Raises:
+        FileNotFoundError: If any slice is missing.
+        ValueError: If slices do not cover the n_locs locations or the size
+            of a slice result does not match.
+
+    """
+    if not (n_slices - 1)*n_per_slice < n_locs <= n_slices*n_per_slice:
+        raise ValueError('{} slices of {} locations do not cover {} '
+                         'locations.'.format(n_slices, n_per_slice, n_locs))
+    loc_file_name = file_name.replace(
+        '.pickle',
+        '{{}}_n_{}.pickle'.format(n_per_slice))
+    missing = [i for i in range(n_slices)
+               if not os.path.isfile(loc_file_name.format(i))]
+    if len(missing) > 0:
+        raise FileNotFoundError('Results of location slices {} (of {}) '
+                                'not found.'.format(missing, n_slices))
+    res = {key: np.ma.empty([n_locs])}
+    for i in range(n_slices):
+        print('{}/{}'.format(i+1, n_slices))
+        with open(loc_file_name.format(i), 'rb') as f:
+            res_i = pickle.load(f)
+        start = i*n_per_slice
+        end = min((i+1)*n_per_slice, n_locs)
+        if len(res_i[key]) != end - start:
+            raise ValueError('Slice {} holds {} locations, expected {}.'
+                             .format(i, len(res_i[key]), end - start))
+        res[key][start:end] = res_i[key]
+    return res
+
+
 class evalAWERA(ChainAWERA):
     def __init__(self, config):
         """Initialise Clustering and Production classes."""
@@ -60,29 +100,12 @@ class evalAWERA(ChainAWERA):
                                          'and a single loc slice at the same'
                                          ' time')
 
-                    def combine_labels(n_i=read_from_slices[0],
-                                       n_max=read_from_slices[1]):
-                        loc_file_name = file_name.replace(
-                            '.pickle',
-                            '{{}}_n_{}.pickle'.format(n_max))
-                        for i in range(n_i):
-                            print('{}/{}'.format(i+1, n_i))
-                            with open(loc_file_name.format(i), 'rb') as f:
-                                res_i = pickle.load(f)
-                            # First label is start for res
-                            if i == 0:
-                                res = {}
-                                res[read_only] = np.ma.empty(
-                                    [self.config.Data.n_locs])
-
-                            # Append labels to results, append locations
-                            end = (i+1)*read_from_slices[1]
-                            if end > self.config.Data.n_locs:
-                                end = self.config.Data.n_locs
-                            res[read_only][i*read_from_slices[1]:end] = \
-                                res_i[read_only]
-                        return res
-                    res = combine_labels()
+                    res = combine_location_slices(
+                        file_name,
+                        read_from_slices[0],
+                        read_from_slices[1],
+                        self.config.Data.n_locs,
+                        read_only)
                 else:
                     with open(file_name, 'rb') as f:
                         res = pickle.load(f)
@@ -222,29 +245,12 @@ class evalAWERA(ChainAWERA):
                                          'and a single loc slice at the same'
                                          ' time')
 
-                    def combine_labels(n_i=read_from_slices[0],
-                                       n_max=read_from_slices[1]):
-                        loc_file_name = file_name.replace(
-                            '.pickle',
-                            '{{}}_n_{}.pickle'.format(n_max))
-                        for i in range(n_i):
-                            print('{}/{}'.format(i+1, n_i))
-                            with open(loc_file_name.format(i), 'rb') as f:
-                                res_i = pickle.load(f)
-                            # First label is start for res
-                            if i == 0:
-                                res = {}
-                                res[read_only] = np.ma.empty(
-                                    [self.config.Data.n_locs])
-
-                            # Append labels to results, append locations
-                            end = (i+1)*read_from_slices[1]
-                            if end > self.config.Data.n_locs:
-                                end = self.config.Data.n_locs
-                            res[read_only][i*read_from_slices[1]:end] = \
-                                res_i[read_only]
-                        return res
-                    res = combine_labels()
+                    res = combine_location_slices(
+                        file_name,
+                        read_from_slices[0],
+                        read_from_slices[1],
+                        self.config.Data.n_locs,
+                        read_only)
                 else:
                     with open(file_name, 'rb') as f:
                         res = pickle.load(f)
@@ -867,7 +873,7 @@ class evalAWERA(ChainAWERA):
         loc_harv_height = harv_height[i_loc, :]
         loc_harv_height_range = {'min': harv_height_range['min'][i_loc, :],
                                  'max': harv_height_range['max'][i_loc, :]}
-        limit_estimates = pd.read_csv(self.config.IO.refined_cut_wind_speeds)
+        limit_estimates = get_cut_wind_speeds(self.config)
         cut_in, cut_out = [], []
         for i_cluster in range(self.config.Clustering.n_clusters):
             cut_in.append(limit_estimates.iloc[i_cluster]['vw_100m_cut_in'])
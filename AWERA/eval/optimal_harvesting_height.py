@@ -5,6 +5,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 
 from ..utils.plotting_utils import plot_percentile_ratios, plot_percentiles
+from ..wind_profile_clustering.labels_store import read_labels_file
+from ..utils.cut_wind_speeds import get_cut_wind_speeds
 
 def get_cluster_avg_power_cycle_height_vs_wind_speed(config):
     harvesting_height = []
@@ -49,8 +51,7 @@ def get_data_avg_power_cycle_height_from_cluster(config):
         get_cluster_avg_power_cycle_height_vs_wind_speed(config)
 
     # Read labels and backscaling factors
-    with open(config.IO.labels, 'rb') as f:
-        clustering_output = pickle.load(f)
+    clustering_output = read_labels_file(config.IO.labels)
     data_matching_cluster = clustering_output['labels [-]']
     data_backscaling_from_cluster = clustering_output['backscaling [m/s]']
     n_samples_per_loc = clustering_output['n_samples_per_loc']
@@ -61,7 +62,7 @@ def get_data_avg_power_cycle_height_from_cluster(config):
     mask_cut_wind_speeds = np.empty((data_matching_cluster.shape),
                                     dtype='bool')
     print('mask sum before:', np.sum(mask_cut_wind_speeds))
-    limit_estimates = pd.read_csv(config.IO.refined_cut_wind_speeds)
+    limit_estimates = get_cut_wind_speeds(config)
     # TODO parallelize! if config allows it
     for i_cluster in range(config.Clustering.n_clusters):
 
@@ -151,13 +152,13 @@ def get_data_power_from_cluster(config):
     # Get clustering power production simulation results
 
     # Read labels and backscaling factors
-    with open(config.IO.labels, 'rb') as f:
-        clustering_output = pickle.load(f)
+    clustering_output = read_labels_file(config.IO.labels)
     data_matching_cluster = clustering_output['labels [-]']
     backscaling = clustering_output['backscaling [m/s]']
     n_samples_per_loc = clustering_output['n_samples_per_loc']
     # -> cluster id and matching v_100m
     data_power = np.zeros(data_matching_cluster.shape)
+    limit_estimates = get_cut_wind_speeds(config)
     for i_cluster in range(config.Clustering.n_clusters):
         df = pd.read_csv(config.IO.power_curve.format(
             suffix='csv', i_profile=i_cluster+1), sep=";")
@@ -169,8 +170,7 @@ def get_data_power_from_cluster(config):
         data_power[matched_cluster_id] = np.interp(data_v,
                                                    v,
                                                    p_of_v)
-        # Read cut-in / out
-        limit_estimates = pd.read_csv(config.IO.refined_cut_wind_speeds)
+        # Cut-in / out
         cut_in = limit_estimates.iloc[i_cluster]['vw_100m_cut_in']
         cut_out = limit_estimates.iloc[i_cluster]['vw_100m_cut_out']
         sel_down_times = np.logical_and(
@@ -518,7 +518,7 @@ def eval_wind_speed_at_harvesting_height(config):
         loc_harv_height = harv_height[i_loc, :]
         loc_harv_height_range = {'min': harv_height_range['min'][i_loc, :],
                                  'max': harv_height_range['max'][i_loc, :]}
-        limit_estimates = pd.read_csv(config.IO.refined_cut_wind_speeds)
+        limit_estimates = get_cut_wind_speeds(config)
         cut_in, cut_out = [], []
         for i_cluster in range(config.Clustering.n_clusters):
             cut_in.append(limit_estimates.iloc[i_cluster]['vw_100m_cut_in'])
@@ -96,7 +96,7 @@ def random_locations(n=10,
 
 def get_locations(file_name, location_type, n_locs, lat_range, lon_range,
                   all_lats, all_lons,
-                  grid_size, init_locs=None):
+                  grid_size, init_locs=None, write_output=True):
     # TODO fix BAF error random generation xmax < xmin?
     n_max_locs = len(all_lats)*len(all_lons)
     if n_locs == -1 or n_locs == n_max_locs:
@@ -118,8 +118,9 @@ def get_locations(file_name, location_type, n_locs, lat_range, lon_range,
                'locations': locations,
                }
         # Pickle results
-        with open(locations_file, 'wb') as f:
-            pickle.dump(res, f)
+        if write_output:
+            with open(locations_file, 'wb') as f:
+                pickle.dump(res, f)
     elif os.path.isfile(locations_file):
         # Locations already generated
         with open(locations_file, 'rb') as f:
@@ -143,6 +144,7 @@ def get_locations(file_name, location_type, n_locs, lat_range, lon_range,
                'locations': locations,
                }
         # Pickle results
-        with open(locations_file, 'wb') as f:
-            pickle.dump(res, f)
+        if write_output:
+            with open(locations_file, 'wb') as f:
+                pickle.dump(res, f)
     return locations
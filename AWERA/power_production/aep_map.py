@@ -66,49 +66,49 @@ def evaluate_aep(config):
     freq_full = freq_distr['frequency']
     wind_speed_bin_limits = freq_distr['wind_speed_bin_limits']
 
+    # Power at the wind speed bin centers, the same for all locations:
+    # power curves are read once, not per location
+    p_bins = np.zeros(freq_full.shape[1:])
+    p_n = []
+    for i in range(n_clusters):
+        i_profile = i + 1
+        # Read power curve file
+        # TODO make optional trianing / normal
+        df = pd.read_csv(config.IO.power_curve
+                         .format(suffix='csv',
+                                 i_profile=i_profile),
+                         sep=";")
+        # TODO drop? mask_faulty_point = get_mask_discontinuities(df)
+        v = df['v_100m [m/s]'].values  # .values[~mask_faulty_point]
+        p = df['P [W]'].values  # .values[~mask_faulty_point]
+        # Once extract nominal (maximal) power of cluster
+        p_n.append(np.max(p))
+
+        # assert v[0] == wind_speed_bin_limits[i, 0]
+        # TODO differences at 10th decimal threw assertion error
+        err_str = "Wind speed range of power curve {} is different"\
+            " than that of probability distribution: " \
+            "{:.2f} and {:.2f} m/s, respectively."
+        if np.abs(v[0] - wind_speed_bin_limits[i, 0]) > 1e-6:
+            print(err_str.format(i_profile,
+                                 wind_speed_bin_limits[i, 0], v[0]))
+        if np.abs(v[-1] - wind_speed_bin_limits[i, -1]) > 1e-6:
+            print(err_str.format(i_profile,
+                                 wind_speed_bin_limits[i, -1], v[-1]))
+        # assert np.abs(v[-1] -
+        #      wind_speed_bin_limits[i, -1]) < 1e-6, err_str
+
+        # Determine wind speeds at bin centers and respective power output.
+        v_bins = (wind_speed_bin_limits[i, :-1]
+                  + wind_speed_bin_limits[i, 1:])/2.
+        p_bins[i, :] = np.interp(v_bins, v, p, left=0., right=0.)
+
     loc_aep = []
     loc_aep_sq = []
-    p_n = []
     for i_loc, loc in enumerate(config.Data.locations):
         # Select location data
         freq = freq_full[i_loc, :, :]
 
-        p_bins = np.zeros(freq.shape)
-
-        for i in range(n_clusters):
-            i_profile = i + 1
-            # Read power curve file
-            # TODO make optional trianing / normal
-            df = pd.read_csv(config.IO.power_curve
-                             .format(suffix='csv',
-                                     i_profile=i_profile),
-                             sep=";")
-            # TODO drop? mask_faulty_point = get_mask_discontinuities(df)
-            v = df['v_100m [m/s]'].values  # .values[~mask_faulty_point]
-            p = df['P [W]'].values  # .values[~mask_faulty_point]
-            if i_loc == 0:
-                # Once extract nominal (maximal) power of cluster
-                p_n.append(np.max(p))
-
-                # assert v[0] == wind_speed_bin_limits[i, 0]
-                # TODO differences at 10th decimal threw assertion error
-                err_str = "Wind speed range of power curve {} is different"\
-                    " than that of probability distribution: " \
-                    "{:.2f} and {:.2f} m/s, respectively."
-                if np.abs(v[0] - wind_speed_bin_limits[i, 0]) > 1e-6:
-                    print(err_str.format(i_profile,
-                                         wind_speed_bin_limits[i, 0], v[0]))
-                if np.abs(v[-1] - wind_speed_bin_limits[i, -1]) > 1e-6:
-                    print(err_str.format(i_profile,
-                                         wind_speed_bin_limits[i, -1], v[-1]))
-                # assert np.abs(v[-1] -
-                #      wind_speed_bin_limits[i, -1]) < 1e-6, err_str
-
-            # Determine wind speeds at bin centers and respective power output.
-            v_bins = (wind_speed_bin_limits[i, :-1]
-                      + wind_speed_bin_limits[i, 1:])/2.
-            p_bins[i, :] = np.interp(v_bins, v, p, left=0., right=0.)
-
         # Weight profile energy production with the frequency of the cluster
         # sum(freq) < 100: non-operation times included
         aep_bins = p_bins * freq/100. * 24*365
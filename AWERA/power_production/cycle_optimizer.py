@@ -574,7 +574,8 @@ class OptimizerCycle(Optimizer):
                  environment_state, reduce_x=None,
                  reduce_ineq_cons=None,
                  bounds=[None],
-                 print_details=False):
+                 print_details=False,
+                 steady_state_cache=None):
         # Initiate attributes of parent class.
         if bounds is None:
             bounds = self.BOUNDS_REAL_SCALE_DEFAULT.copy()
@@ -619,6 +620,8 @@ class OptimizerCycle(Optimizer):
                                     'optimizer_error_starting_vals': [],
                                     'optimizer_error_wind_speed': []}
         self.print_details = print_details
+        # Steady states solved in earlier evaluations, see SteadyStateCache in qsm.py.
+        self.steady_state_cache = steady_state_cache
 
     def eval_fun(self, x, scale_x=True, **kwargs):
         """Method calculating the objective and constraint functions from the eval_performance_indicators method output.
@@ -767,6 +770,7 @@ class OptimizerCycle(Optimizer):
         cycle = Cycle(self.cycle_settings)
         iterative_procedure_config = {
             'enable_steady_state_errors': not relax_errors,
+            'cache': self.steady_state_cache,
         }
         self.system_properties.kite_powering_traction = powering_traction
 
@@ -779,12 +783,9 @@ class OptimizerCycle(Optimizer):
             cycle.time_plot(['straight_tether_length', 'reeling_speed', 'tether_force_ground', 'power_ground'],
                             plot_markers=phase_switch_points)
 
-        env_state = self.environment_state
-        power_wind_trac = []
-        for kin in cycle.traction_phase.kinematics:
-            env_state.calculate(kin.z)
-            power_wind_trac.append(
-                .5 * env_state.air_density * env_state.wind_speed ** 3)
+        wind_speed_trac, air_density_trac = self.environment_state.calculate_many(
+            cycle.traction_phase.series['z'])
+        power_wind_trac = list(.5 * air_density_trac * wind_speed_trac ** 3)
 
         res = {
             'average_power': {
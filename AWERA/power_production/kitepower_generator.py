@@ -1,5 +1,5 @@
 import numpy as np
-from scipy import interpolate
+from scipy.interpolate import RegularGridInterpolator
 # Generator 100kW GS (?)
 
 # hourly estimation does not allow for overloading the generator
@@ -19,6 +19,20 @@ efficiency_by_frequency_load = [
     ]
 
 
+def get_eff_lookup(load_steps=load_steps, freq_steps=freq_steps,
+                   efficiency_by_frequency_load=efficiency_by_frequency_load):
+    """Bilinear lookup of the efficiency table, zero outside the table."""
+    return RegularGridInterpolator((freq_steps, load_steps),
+                                   efficiency_by_frequency_load,
+                                   method='linear',
+                                   bounds_error=False,
+                                   fill_value=0.)
+
+
+# Built once: lookup of the default efficiency table
+eff_lookup = get_eff_lookup()
+
+
 def get_frequency_from_reeling_speed(vr,
                                      gear_ratio=10,
                                      r_drum=0.45):
@@ -53,46 +67,53 @@ def get_frequency_from_reeling_speed(vr,
 
 def get_gen_eff(power, vr,
                 rated_power=160000,  # 500kW: 800kW, 100kW: 160kW, factor 1.6
-                load_steps=load_steps, freq_steps=freq_steps,
-                efficiency_by_frequency_load=efficiency_by_frequency_load):
+                load_steps=None, freq_steps=None,
+                efficiency_by_frequency_load=None):
     """
     Interpolate the efficiency from the efficiency table by load and frequency.
 
     Parameters
     ----------
-    power : Float
+    power : Float or array
         Power at generator.
         Impacts efficiency relative to generator rated power.
-    vr : Float
-        Tether reeling speed in m/s.
+    vr : Float or array
+        Tether reeling speed in m/s, same shape as power.
     rated_power: Float, optional
         Generator rated power in Watt. The default is 160kW.
     load_steps : list(Float), optional
         Load values described in the efficiency table.
-        The default is load_steps in %.
+        The default is None, using load_steps in %.
     freq_steps : list(Float), optional
         Frequency values described in the efficiency table.
-        The default is freq_steps.
+        The default is None, using freq_steps.
     efficiency_by_frequency_load : list, optional
         List of efficiencies by generator load for varying
-        generator frequencies. The default is efficiency_by_frequency_load.
+        generator frequencies. The default is None, using
+        efficiency_by_frequency_load.
 
     Returns
     -------
-    eff : Float
-        Interpolated efficiency for power and reeling speed setting.
+    eff : array
+        Interpolated efficiency for power and reeling speed setting,
+        of shape (1, ) for scalar input.
 
     """
     if power is None or vr is None:
         return [0], 0, 0
-    eff_table = interpolate.interp2d(load_steps, freq_steps,
-                                     efficiency_by_frequency_load,
-                                     bounds_error=False,
-                                     fill_value=0.)
+    table = {'load_steps': load_steps,
+             'freq_steps': freq_steps,
+             'efficiency_by_frequency_load': efficiency_by_frequency_load}
+    table = {key: val for key, val in table.items() if val is not None}
+    if len(table) == 0:
+        # Default efficiency table, interpolator built on import
+        lookup = eff_lookup
+    else:
+        lookup = get_eff_lookup(**table)
     load = np.abs(power)/rated_power*100
     freq = get_frequency_from_reeling_speed(vr)
     # print('load and freq:', load, freq)
-    eff = eff_table(load, freq)/100.
+    eff = np.atleast_1d(lookup((freq, load)))/100.
 
     return eff, load, freq
 
@@ -11,11 +11,12 @@ import getopt
 from .qsm import LogProfile, NormalisedWindTable1D, KiteKinematics,\
     SteadyState, TractionPhaseHybrid, TractionConstantElevation, \
     SteadyStateError, OperationalLimitViolation, TractionPhase, \
-    SystemProperties
+    SystemProperties, SteadyStateCache, GriddedWindTable1D
 from .kitepower_kites import sys_props_v3
 from .cycle_optimizer import OptimizerCycle
 from .power_curve_constructor import PowerCurveConstructor
 from ..utils.convenience_utils import write_timing_info
+from ..utils.cut_wind_speeds import get_cut_wind_speeds
 
 import matplotlib.pyplot as plt
 
@@ -273,10 +274,14 @@ def export_to_csv(config, v, v_cut_out, p, p_mech, eff,
               index=False, sep=";")
 
 
-def create_environment(df, i_profile):
+def create_environment(df, i_profile, grid_spacing=None):
     """Flatten wind profile shapes resulting from the clustering and use
-        to create the environment object."""
-    env = NormalisedWindTable1D()
+        to create the environment object - looked up in a height grid
+        with the given spacing, if given."""
+    if grid_spacing is None:
+        env = NormalisedWindTable1D()
+    else:
+        env = GriddedWindTable1D(grid_spacing=grid_spacing)
     # velocities w.r.t. env.h_ref = 100.
     env.heights = list(df['height [m]'])
     env.normalised_wind_speeds = list((df['u{} [-]'.format(i_profile)]**2
@@ -285,6 +290,18 @@ def create_environment(df, i_profile):
     return env
 
 
+def create_steady_state_cache(config):
+    """Cache of steady states shared by the optimizations of a power curve,
+        None if not enabled in config."""
+    if not getattr(config.Power, 'steady_state_cache', False):
+        return None
+    return SteadyStateCache(
+        max_size=getattr(config.Power, 'steady_state_cache_size', 100000),
+        digits=getattr(config.Power, 'steady_state_cache_digits', 12),
+        warm_start_digits=getattr(config.Power,
+                                  'steady_state_warm_start_digits', None))
+
+
 def estimate_wind_speed_operational_limits(config,
                                            export_operational_limits=True,
                                            input_profiles=None):
@@ -312,7 +329,10 @@ def estimate_wind_speed_operational_limits(config,
         print('Estimating wind speed for profile {}/{}'
               .format(i_profile, n_profiles))
         # TODO logging? / timing info print('Profile {}'.format(i_profile))
-        env = create_environment(input_profiles, i_profile)
+        env = create_environment(
+            input_profiles, i_profile,
+            grid_spacing=getattr(config.Power, 'environment_grid_spacing',
+                                 None))
         print(env.heights, env.normalised_wind_speeds)
         # heights = [10.,  20.,  40.,  60.,  80., 100., 120., 140., 150., 160.,
         #                     180., 200., 220., 250., 300., 500., 600.]
@@ -377,7 +397,7 @@ def generate_power_curves(config,
     """Determine power curves - requires estimates of the cut-in
         and cut-out wind speed to be available."""
     if limit_estimates is None:
-        limit_estimates = pd.read_csv(config.IO.cut_wind_speeds)
+        limit_estimates = get_cut_wind_speeds(config, refined=False)
 
     # Cycle simulation settings for different phases of the power curves.
     cycle_sim_settings_pc_phase1 = {
@@ -428,7 +448,12 @@ def generate_power_curves(config,
         # .format(i_profile))
         # Pre-configure environment object for optimizations by setting
         # normalized wind profile.
-        env = create_environment(input_profiles, i_profile)
+        env = create_environment(
+            input_profiles, i_profile,
+            grid_spacing=getattr(config.Power, 'environment_grid_spacing',
+                                 None))
+        # Steady states reused between the optimizer evaluations
+        ss_cache = create_steady_state_cache(config)
 
         # Optimizations are performed sequentially with increased wind speed.
         # The solution of the previous optimization
@@ -466,7 +491,8 @@ def generate_power_curves(config,
             sys_props, env,
             reduce_x=np.array([0, 1, 2, 3]),
             bounds=copy.deepcopy(
-                config.Power.bounds))
+                config.Power.bounds),
+            steady_state_cache=ss_cache)
         op_cycle_pc_phase1.bounds_real_scale[2][1] = 30*np.pi/180.
 
         op_cycle_pc_phase2 = OptimizerCycle(
@@ -474,7 +500,8 @@ def generate_power_curves(config,
             sys_props, env,
             reduce_x=np.array([0, 1, 2, 3]),
             bounds=copy.deepcopy(
-                config.Power.bounds))
+                config.Power.bounds),
+            steady_state_cache=ss_cache)
 
         # Configuration of the sequential optimizations for which is
         # differentiated between the wind speed ranges
@@ -505,7 +532,8 @@ def generate_power_curves(config,
             sys_props, env,
             reduce_x=np.array([0, 1, 3, 5]),
             bounds=copy.deepcopy(
-                config.Power.bounds))
+                config.Power.bounds),
+            steady_state_cache=ss_cache)
         op_cycle_pc_phase1_powering.bounds_real_scale[2][1] = 30*np.pi/180.
 
         op_cycle_pc_phase2_powering = OptimizerCycle(
@@ -513,7 +541,8 @@ def generate_power_curves(config,
             sys_props, env,
             reduce_x=np.array([0, 1, 3, 5]),
             bounds=copy.deepcopy(
-                config.Power.bounds))
+                config.Power.bounds),
+            steady_state_cache=ss_cache)
 
         op_seq_powering = {
             7.: {'power_optimizer': op_cycle_pc_phase1_powering,
@@ -545,6 +574,8 @@ def generate_power_curves(config,
         setattr(pc, 'plots_interactive', config.Plotting.plots_interactive)
         setattr(pc, 'plot_output_file', config.IO.training_plot_output)
         pc.run_predefined_sequence(op_seq, x0, depowering_seq=op_seq_powering)
+        if ss_cache is not None:
+            print('Steady state cache: ', ss_cache.stats())
 
         # export all results, including failed simulations, tagged in
         # kip and other performance flags
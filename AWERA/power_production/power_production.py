@@ -19,6 +19,7 @@ from .power_curve_constructor import PowerCurveConstructor
 
 
 from ..utils.wind_profile_shapes import export_wind_profile_shapes
+from ..utils.cut_wind_speeds import read_limits_table
 
 # TODO include option for brute forcing: run_single, run_curve -> own class,
 # power production inherits
@@ -732,5 +733,5 @@ class PowerProduction(SingleProduction):
                 file_name = self.config.IO.refined_cut_wind_speeds
             else:
                 file_name = self.config.IO.cut_wind_speeds
-        limits = pd.read_csv(file_name, sep=sep)
+        limits = read_limits_table(file_name, sep=sep)
         return limits
\ No newline at end of file
@@ -11,6 +11,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from copy import copy
 import pandas as pd
+from collections import OrderedDict
 from .utils import zip_el, plot_traces
 
 np.seterr(all='raise')
@@ -101,6 +102,40 @@ class Environment:
         """
         pass
 
+    def calculate_many(self, heights, altitude_ground=0.):
+        """Calculate the wind speed and air density for multiple heights, without changing the attributes.
+
+        Args:
+            heights (array_like): Heights above ground [m].
+            altitude_ground (float, optional): Altitude of ground level [m].
+
+        Returns:
+            tuple of ndarray: Wind speeds [m/s] and air densities [kg/m^3] at the heights.
+
+        """
+        env = copy(self)
+        wind_speeds, air_densities = [], []
+        for height in heights:
+            env.calculate(height, altitude_ground)
+            wind_speeds.append(env.wind_speed)
+            air_densities.append(env.air_density)
+        return np.array(wind_speeds), np.array(air_densities)
+
+    def calculate_states(self, heights, altitude_ground=0.):
+        """Environment states of multiple heights, e.g. for solving steady states with `SteadyStateBatch`.
+
+        Args:
+            heights (array_like): Heights above ground [m].
+            altitude_ground (float, optional): Altitude of ground level [m].
+
+        Returns:
+            `Environment` or child: Copy of the environment state with the wind speed and air density as arrays.
+
+        """
+        env = copy(self)
+        env.wind_speed, env.air_density = self.calculate_many(np.atleast_1d(heights), altitude_ground)
+        return env
+
 
 class EnvAtmosphericPressure(Environment):
     """Environment state class introducing height dependent air density. Inherits from `Environment`.
@@ -233,6 +268,164 @@ class NormalisedWindTable1D(EnvAtmosphericPressure):
         plt.grid(True)
 
 
+def grid_attribute(name):
+    """Property resetting the height grid of a `GriddedWindTable1D` when a new value is assigned."""
+    private_name = '_' + name
+
+    def get_value(self):
+        return getattr(self, private_name)
+
+    def set_value(self, value):
+        setattr(self, private_name, value)
+        self._grid = None
+    return property(get_value, set_value)
+
+
+class GriddedWindTable1D(NormalisedWindTable1D):
+    """Environment state class looking up the wind speed and air density in a uniform height grid, built once per
+    wind profile. Inherits from `NormalisedWindTable1D`.
+
+    Each grid cell refers to the segment of the wind speed table at its lower bound, such that the wind speeds equal
+    the interpolated values of `NormalisedWindTable1D` while the lookup cost is independent of the table size. Within
+    the grid, the air density is interpolated linearly between the grid points, with a relative error of about
+    spacing**2/(8*h_p**2): ~2e-9 for a 1m and ~4e-8 for a 5m spacing. The grid is rebuilt when new tables or density
+    parameters are assigned, the tables should not be modified in place.
+
+    Attributes:
+        grid_spacing (float): Height difference [m] between the grid points.
+
+    """
+    heights = grid_attribute('heights')
+    normalised_wind_speeds = grid_attribute('normalised_wind_speeds')
+    rho_0 = grid_attribute('rho_0')
+    h_p = grid_attribute('h_p')
+    grid_spacing = grid_attribute('grid_spacing')
+
+    def __init__(self, grid_spacing=1.):
+        """
+        Args:
+            grid_spacing (float, optional): Value for `grid_spacing` attribute.
+
+        """
+        super().__init__()
+        self.grid_spacing = grid_spacing
+
+    def build_grid(self):
+        """Build the height grid with the wind speed table segment and air density of each grid cell."""
+        heights = np.asarray(self.heights, dtype=float)
+        normalised_wind_speeds = np.asarray(self.normalised_wind_speeds, dtype=float)
+        n_cells = max(int(np.ceil((heights[-1] - heights[0]) / self.grid_spacing)), 1)
+        grid_heights = heights[0] + self.grid_spacing*np.arange(n_cells + 1)
+
+        # Table segments at the lower and upper bound of each cell.
+        segment = np.clip(np.searchsorted(heights, grid_heights[:-1], side='right') - 1, 0, len(heights) - 2)
+        segment_upper = np.clip(np.searchsorted(heights, grid_heights[1:], side='right') - 1, 0, len(heights) - 2)
+
+        segment_slopes = np.diff(normalised_wind_speeds) / np.diff(heights)
+
+        density = self.rho_0*np.exp(-grid_heights/self.h_p)
+        self._grid = {
+            'height_min': float(heights[0]),
+            'height_max': float(heights[-1]),
+            'n_cells': n_cells,
+            'inverse_spacing': 1./self.grid_spacing,
+            'heights': grid_heights,
+            'segment': segment,
+            'n_segment_steps': int(np.max(segment_upper - segment)),
+            'segment_heights': heights[:-1],
+            'segment_upper_heights': np.append(heights[1:-1], np.inf),
+            'segment_wind_speeds': normalised_wind_speeds[:-1],
+            'segment_slopes': segment_slopes,
+            'segment_valid': ~np.isnan(segment_slopes),
+            'density': density[:-1],
+            'density_slopes': np.diff(density) / self.grid_spacing,
+        }
+        # Indexing lists is considerably faster than indexing arrays for the lookup of a single height.
+        self._grid_lists = {key: val.tolist() for key, val in self._grid.items() if isinstance(val, np.ndarray)}
+        return self._grid
+
+    def get_grid(self):
+        if self._grid is None:
+            return self.build_grid()
+        return self._grid
+
+    def grid_cell(self, height):
+        """Index of the grid cell containing the height, None if outside of the grid."""
+        grid = self.get_grid()
+        if not grid['height_min'] <= height <= grid['height_max']:
+            return None
+        return min(int((height - grid['height_min']) * grid['inverse_spacing']), grid['n_cells'] - 1)
+
+    def calculate(self, height, altitude_ground=0.):
+        i_cell = self.grid_cell(height)
+        self.calculate_wind(height, i_cell)
+        if altitude_ground == 0.:
+            self.calculate_density(height, i_cell)
+        else:
+            self.calculate_density(height + altitude_ground)
+
+    def calculate_wind(self, height, i_cell=None):
+        if i_cell is None:
+            i_cell = self.grid_cell(height)
+        if height <= 0. or i_cell is None:
+            raise OperationalLimitViolation("Invalid height is given: {:.1f}.".format(height))
+        lists = self._grid_lists
+        i_segment = lists['segment'][i_cell]
+        while height >= lists['segment_upper_heights'][i_segment]:
+            i_segment += 1
+        if not lists['segment_valid'][i_segment]:
+            raise OperationalLimitViolation("Invalid height is given: {:.1f}.".format(height))
+
+        v = (lists['segment_slopes'][i_segment]*(height - lists['segment_heights'][i_segment])
+             + lists['segment_wind_speeds'][i_segment]) * self.wind_speed_ref
+        self.wind_speed = v
+        return v
+
+    def calculate_density(self, altitude, i_cell=None):
+        if i_cell is None:
+            i_cell = self.grid_cell(altitude)
+        if i_cell is None:
+            super().calculate_density(altitude)
+        else:
+            lists = self._grid_lists
+            self.air_density = lists['density'][i_cell] \
+                + lists['density_slopes'][i_cell]*(altitude - lists['heights'][i_cell])
+
+    def calculate_many(self, heights, altitude_ground=0.):
+        """Vectorized lookup of the wind speed and air density for multiple heights, without changing the
+        attributes.
+
+        Args:
+            heights (array_like): Heights above ground [m].
+            altitude_ground (float, optional): Altitude of ground level [m].
+
+        Returns:
+            tuple of ndarray: Wind speeds [m/s] and air densities [kg/m^3] at the heights.
+
+        """
+        grid = self.get_grid()
+        heights = np.asarray(heights, dtype=float)
+        invalid = (heights <= 0.) | (heights < grid['height_min']) | (heights > grid['height_max'])
+        if np.any(invalid):
+            raise OperationalLimitViolation("Invalid height is given: {:.1f}.".format(heights[invalid].flat[0]))
+
+        i_cell = np.minimum(((heights - grid['height_min']) * grid['inverse_spacing']).astype(int), grid['n_cells'] - 1)
+        i_segment = grid['segment'][i_cell]
+        for _ in range(grid['n_segment_steps']):
+            i_segment = i_segment + (heights >= grid['segment_upper_heights'][i_segment])
+        invalid = ~grid['segment_valid'][i_segment]
+        if np.any(invalid):
+            raise OperationalLimitViolation("Invalid height is given: {:.1f}.".format(heights[invalid].flat[0]))
+        wind_speeds = (grid['segment_slopes'][i_segment]*(heights - grid['segment_heights'][i_segment])
+                       + grid['segment_wind_speeds'][i_segment]) * self.wind_speed_ref
+
+        if altitude_ground == 0.:
+            air_densities = grid['density'][i_cell] + grid['density_slopes'][i_cell]*(heights - grid['heights'][i_cell])
+        else:
+            air_densities = self.rho_0*np.exp(-(heights + altitude_ground)/self.h_p)
+        return wind_speeds, air_densities
+
+
 class WindTable2D(EnvAtmosphericPressure):
     """Environment state class introducing a 2 component wind profile specified by 2 wind speed look-up tables. Inherits
     from `EnvAtmosphericPressure`.
@@ -268,6 +461,16 @@ class WindTable2D(EnvAtmosphericPressure):
         self.downwind_direction = np.arctan2(v_y, v_x)
         return self.wind_speed
 
+    def calculate_states(self, heights, altitude_ground=0.):
+        # Wind direction varies with height
+        env = copy(self)
+        states = []
+        for height in np.atleast_1d(heights):
+            env.calculate(height, altitude_ground)
+            states.append((env.wind_speed, env.air_density, env.downwind_direction))
+        env.wind_speed, env.air_density, env.downwind_direction = [np.array(val) for val in zip(*states)]
+        return env
+
     def plot_wind_profile(self):
         """Plot the wind speed versus the height above ground."""
         plt.plot(self.wind_speed_x_table, self.height_table, label="x-component")
@@ -651,6 +854,7 @@ class SteadyState:
         max_iterations (int): Maximum number of iterations before stopping the iterative procedure.
         enable_steady_state_errors (bool): Raising the exception if True.
         convergence_tolerance (float): Metric declaring convergence: normalized lift-to-drag error [-].
+        cache (`SteadyStateCache`): Cache of solved steady states, not used if None.
         tether_force_max_limit_violated (bool): Flag indicating if the maximum tether force limit is violated at
             the kite.
         tether_force_min_limit_violated (bool): Flag indicating if the minimum tether force limit is violated at
@@ -706,6 +910,7 @@ class SteadyState:
         self.max_iterations = iterative_procedure_config.get('max_iterations', 250)
         self.enable_steady_state_errors = iterative_procedure_config.get('enable_steady_state_errors', True)
         self.convergence_tolerance = iterative_procedure_config.get('convergence_tolerance', 1e-6)
+        self.cache = iterative_procedure_config.get('cache', None)
 
         # Monitoring parameters for tether force limit violation.
         self.tether_force_max_limit_violated = False
@@ -745,6 +950,23 @@ class SteadyState:
         self.lift_to_drag_error, self.n_iterations, self.converged = np.inf, None, False
         self.error_message, self.error_code = None, None
 
+        # Reuse the solution of the same state if cached, otherwise optionally start from that of a similar state.
+        cache = None if print_details else self.cache
+        kinematic_ratio_start, warm_start_key = None, None
+        if cache is not None:
+            key = cache.key(self, system_properties, environment_state, basic_kinematics)
+            solution = cache.get(key)
+            if solution is not None:
+                self.__dict__.update(solution)
+                self.update_limit_violations(system_properties)
+                if self.error_message is not None and self.enable_steady_state_errors:
+                    raise SteadyStateError(self.error_message, self.error_code)
+                return
+            if cache.warm_start_digits is not None and self.force_n_iterations is None:
+                warm_start_key = cache.key(self, system_properties, environment_state, basic_kinematics,
+                                           digits=cache.warm_start_digits)
+                kinematic_ratio_start = cache.get_kinematic_ratio(warm_start_key)
+
         # System description.
         s = system_properties.kite_projected_area
         m = system_properties.kite_mass
@@ -833,7 +1055,10 @@ class SteadyState:
             lift_to_drag = system_properties.lift_to_drag
 
             # Parameters used for loop condition.
-            kappa = lift_to_drag  # Initial assumption for kinematic ratio (massless solution).
+            if kinematic_ratio_start is None:
+                kappa = lift_to_drag  # Initial assumption for kinematic ratio (massless solution).
+            else:
+                kappa = kinematic_ratio_start
             self.n_iterations = 0  # Counter for number of iterations.
 
             # Iterative procedure to determine true kinematic ratio.
@@ -979,7 +1204,15 @@ class SteadyState:
         except (ZeroDivisionError, FloatingPointError):
             self.azimuth_rate = 0.
 
-        # Update monitoring parameters for tether force violations.
+        if cache is not None:
+            cache.put(key, self)
+            if warm_start_key is not None and self.converged:
+                cache.put_kinematic_ratio(warm_start_key, kappa)
+
+        self.update_limit_violations(system_properties)
+
+    def update_limit_violations(self, system_properties):
+        """Update monitoring parameters for tether force violations."""
         if 'tether_force' not in self.control_settings[0]:
             min_force = getattr(system_properties, 'tether_force_min_limit', None)
             max_force = getattr(system_properties, 'tether_force_max_limit', None)
@@ -993,14 +1226,730 @@ class SteadyState:
                 # self.tether_force_limit_violation = min_force - self.tether_force_ground
 
 
+class SteadyStateBatch(SteadyState):
+    """Steady states of many kite states, solved at once with vectorized iterations. Inherits from `SteadyState`.
+
+    The kinematics, the environment state, the tether mass and aerodynamic coefficients of the system properties and
+    the control setpoint may be arrays, which are broadcast against each other, e.g. positions along a pattern, wind
+    speeds of a power curve sweep or reeling factors. Each state is iterated until it converged or an error occurred,
+    following the procedure of `SteadyState.find_state` with fixed aerodynamic coefficients.
+
+    Attributes:
+        Same as `SteadyState`, arrays of the broadcast shape of the input, except:
+        error_code (ndarray): Error code of each state, 0 if no error occurred.
+        error_messages (ndarray): Error message of each state, None if no error occurred.
+        error_message (str): Message of the first error that occurred, None if no error occurred.
+        first_error_code (int): Error code of the first error that occurred.
+        setpoints (ndarray): Control setpoint of each state.
+
+    """
+    def process_errors(self, mask, error_message, error_code, print_message=False, **fields):
+        """Set the error code of the states in mask, if no error occurred earlier for the state.
+
+        Args:
+            mask (ndarray): Flags of the failed states.
+            error_message (str): Description of error, formatted per state with the fields.
+            error_code (int): Identifier for error.
+            print_message (bool, optional): Prints error message of the first failed state to screen if True.
+            **fields (ndarray): Values of all states to format the error message with, e.g. the number of iterations.
+
+        """
+        new_errors = mask & (self.error_code == 0)
+        if np.any(new_errors):
+            ids = np.flatnonzero(new_errors)
+            messages = [error_message.format(**{key: val[i] for key, val in fields.items()}) for i in ids]
+            self.error_code[ids] = error_code
+            self.error_messages[ids] = messages
+            if print_message:
+                print("{} ({} states)".format(messages[0], len(ids)))
+            if self.error_message is None:
+                self.error_message = messages[0]
+                self.first_error_code = error_code
+
+    def find_state(self, system_properties, environment_state, basic_kinematics, print_details=False, ids=None):
+        """Vectorized iterative procedure for finding the kinematic ratios yielding the steady states of the kite.
+
+        Args:
+            system_properties (`SysPropsFixedAeroCoeffs` or child): Collection of system properties, updated for the
+                (array of) tether length(s).
+            environment_state (`Environment` or child): Specification of environment.
+            basic_kinematics (`KiteKinematics`): Basic kinematic properties required for finding the steady states.
+            print_details (bool, optional): Prints procedure details to screen if True.
+            ids (ndarray, optional): Only solve the states with these indices of the flattened broadcast input, the
+                results are flat arrays of these states.
+
+        Raises:
+            SteadyStateError: If steady state errors are enabled and the procedure failed for any state.
+
+        """
+        control_parameter, setpoint = self.control_settings[:2]
+        if control_parameter not in ['tether_force_kite', 'tether_force_ground', 'reeling_factor',
+                                     'reeling_speed']:
+            raise ValueError("Invalid control setting.")
+        tether_force_controlled = 'tether_force' in control_parameter
+
+        # System description.
+        s = system_properties.kite_projected_area
+        m = system_properties.kite_mass
+        g = environment_state.GRAVITATIONAL_ACCELERATION
+
+        # Broadcast all varying input to flat arrays of the states.
+        inputs = np.broadcast_arrays(
+            basic_kinematics.azimuth_angle - environment_state.downwind_direction,
+            np.pi / 2 - basic_kinematics.elevation_angle,
+            basic_kinematics.course_angle,
+            basic_kinematics.straight_tether_length,
+            environment_state.wind_speed,
+            environment_state.air_density,
+            system_properties.tether_mass,
+            system_properties.aerodynamic_force_coefficient,
+            system_properties.lift_to_drag,
+            setpoint)
+        shape = inputs[0].shape
+        phi, theta, chi, r, v_wind, rho, m_tether, c_r, lift_to_drag, setpoint = \
+            [np.array(val, dtype=float).ravel() for val in inputs]
+        if ids is not None:
+            phi, theta, chi, r, v_wind, rho, m_tether, c_r, lift_to_drag, setpoint = \
+                [val[ids] for val in (phi, theta, chi, r, v_wind, rho, m_tether, c_r, lift_to_drag, setpoint)]
+            shape = phi.shape
+        n_states = phi.size
+        self.setpoints = setpoint
+
+        self.error_code = np.zeros(n_states, dtype=int)
+        self.error_messages = np.full(n_states, None, dtype=object)
+        self.error_message = None
+        self.converged = np.zeros(n_states, dtype=bool)
+        self.n_iterations = np.zeros(n_states, dtype=int)
+        self.n_iterations_aoa = np.ones(n_states, dtype=int)
+        self.lift_to_drag_error = np.full(n_states, np.inf)
+
+        with np.errstate(all='ignore'):
+            sin_theta, cos_theta = np.sin(theta), np.cos(theta)
+            sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+            sin_chi, cos_chi = np.sin(chi), np.cos(chi)
+
+            q = .5*rho*v_wind**2
+            g_r, g_theta = -cos_theta*g, sin_theta*g
+
+            a = cos_theta * cos_phi * cos_chi - sin_phi * sin_chi
+            b = sin_theta * cos_phi
+
+            # Pre-iteration calculations: implications of operational setpoints on invariant forces.
+            rf = np.zeros(n_states)
+            f_aero = np.zeros(n_states)
+            f_aero_r = np.zeros(n_states)
+            if control_parameter == 'tether_force_kite':
+                f_tether_theta = .5 * sin_theta * m_tether * g
+                f_tether_r = -np.sqrt(setpoint**2 - f_tether_theta**2)
+                too_small = np.isnan(f_tether_r)
+                self.process_errors(too_small, "Tether force setpoint is too small.", 1, print_details)
+                f_tether_r[too_small] = 0.
+            elif control_parameter == 'tether_force_ground':
+                f_tether_theta = .5 * sin_theta * m_tether * g
+                f_tether_r_ground = np.sqrt(setpoint**2 - f_tether_theta**2)
+                f_tether_r_ground[np.isnan(f_tether_r_ground)] = 0.
+                f_tether_r = -(f_tether_r_ground + cos_theta * m_tether * g)
+            else:
+                if control_parameter == 'reeling_factor':
+                    rf = setpoint.copy()
+                else:
+                    rf = setpoint/v_wind
+                infeasible = b < rf
+                self.process_errors(infeasible & (sin_theta < 0.),
+                                    "Reeling factor of {rf} is not feasible. Elevation angle is larger than 90 "
+                                    "degrees.", 7, print_details, rf=rf)
+                self.process_errors(infeasible, "Reeling factor of {rf} is not feasible.", 2, print_details, rf=rf)
+
+                f_aero_theta = -(.5*m_tether + m)*g*sin_theta  # tangential aerodynamic force
+            if tether_force_controlled:
+                f_aero_r = -f_tether_r - m * g_r
+                f_aero_theta = -f_tether_theta - m * g_theta
+                f_aero = np.sqrt(f_aero_r**2 + f_aero_theta**2)
+
+            # Iterative procedure to determine the true kinematic ratios, states are removed from the iteration once
+            # converged or failed.
+            kappa = lift_to_drag.copy()  # Initial assumption for kinematic ratio (massless solution).
+            lift_to_drag_calc = np.full(n_states, np.nan)
+            lambda_ = np.zeros(n_states)
+            v_app = np.zeros(n_states)
+            v_app_vector = np.zeros((3, n_states))
+            active = np.ones(n_states, dtype=bool)
+            while np.any(active):
+                i = np.flatnonzero(active)
+                kappa_sq = kappa[i]**2
+                if tether_force_controlled:  # Updating reeling factor.
+                    rf[i] = b[i] - np.sqrt(f_aero[i] / (q[i]*s*c_r[i]*(1+kappa_sq)))
+                else:  # Updating aerodynamic force.
+                    f_aero[i] = c_r[i]*(1+kappa_sq)*(b[i]-rf[i])**2*q[i]*s
+                    f_aero_r_i = np.sqrt(f_aero[i]**2 - f_aero_theta[i]**2)  # Radial aerodynamic force.
+                    failed = np.isnan(f_aero_r_i)
+                    self.process_errors(self.mask(i[failed], n_states),
+                                        "No feasible solution found for radial aerodynamic force after "
+                                        "{n_iterations} iterations - aerodynamic force is too small to keep the "
+                                        "kite in the air.", 3, print_details, n_iterations=self.n_iterations)
+                    f_aero_r_i[failed] = 0.
+                    f_aero_r[i] = f_aero_r_i
+
+                # Updating tangential velocity factor.
+                lambda_i = a[i] + np.sqrt(a[i]**2+b[i]**2-1+kappa_sq*(b[i]-rf[i])**2)
+                failed = np.isnan(lambda_i)
+                self.process_errors(self.mask(i[failed], n_states),
+                                    "No feasible solution found for tangential velocity factor after "
+                                    "{n_iterations} iterations.", 4, print_details, n_iterations=self.n_iterations)
+                lambda_i[failed] = a[i][failed]
+                lambda_[i] = lambda_i
+
+                # Updating the apparent wind speed.
+                v_app[i] = (b[i] - rf[i]) * np.sqrt(1 + kappa_sq) * v_wind[i]
+                v_app_vector[0, i] = (b[i] - rf[i]) * v_wind[i]
+                v_app_vector[1, i] = (cos_theta[i] * cos_phi[i] - lambda_i * cos_chi[i]) * v_wind[i]
+                v_app_vector[2, i] = (-sin_phi[i] - lambda_i * sin_chi[i]) * v_wind[i]
+
+                unrealistic = v_app[i] < 1e-6
+                self.process_errors(self.mask(i[unrealistic], n_states), "Unrealistic apparent wind speed.", 7,
+                                    print_details)
+
+                # Evaluate the convergence of the calculated to the actual lift-to-drag ratio.
+                drag = (f_aero_r[i]*v_app_vector[0, i] + f_aero_theta[i]*v_app_vector[1, i])/v_app[i]
+                lift_to_drag_calc_i = np.sqrt((f_aero[i]/drag)**2-1)
+                kappa_i = kappa[i] * np.sqrt(lift_to_drag[i]/lift_to_drag_calc_i)
+                failed = ~unrealistic & ~np.isfinite(kappa_i)
+                self.process_errors(self.mask(i[failed], n_states),
+                                    "No feasible solution for found for calculated lift-to-drag after "
+                                    "{n_iterations} iterations.", 5, print_details, n_iterations=self.n_iterations)
+                updated = ~unrealistic & ~failed
+                lift_to_drag_calc[i[updated]] = lift_to_drag_calc_i[updated]
+                kappa[i[updated]] = kappa_i[updated]
+
+                self.process_errors(self.mask(i[kappa[i] < 1e-6], n_states), "Unrealistic kappa.", 6, print_details)
+
+                failed = self.error_code[i] != 0
+                kappa[i[failed]] = np.nan
+                active[i[failed]] = False
+                i = i[~failed]
+
+                self.lift_to_drag_error[i] = lift_to_drag[i]-lift_to_drag_calc[i]
+                eps = np.abs(self.lift_to_drag_error[i])/lift_to_drag[i]
+
+                # Check loop conditions.
+                self.n_iterations[i] += 1
+                if self.force_n_iterations is not None:
+                    stop = self.n_iterations[i] == self.force_n_iterations
+                else:
+                    stop = np.zeros(len(i), dtype=bool)
+                converged = ~stop & (eps < self.convergence_tolerance)
+                self.converged[i[converged]] = True
+                stop |= converged
+                if self.max_iterations is not None:
+                    exceeded = ~stop & (self.n_iterations[i] == self.max_iterations)
+                    self.process_errors(self.mask(i[exceeded], n_states),
+                                        "Maximum of {} iterations reached before convergence."
+                                        .format(self.max_iterations), 6, print_details)
+                    stop |= exceeded
+                active[i[stop]] = False
+
+            # Determine inflow angle with respect to tangential plane.
+            inflow_angle = np.arcsin(v_app_vector[0]/v_app)  # Assuming wing is parallel to the unit sphere.
+            inflow_angle[~np.isfinite(inflow_angle)] = 0.
+
+            self.process_errors(lambda_ < 0., "Solution converged to an unrealistic lambda.", 8, print_details)
+
+            if print_details:
+                print("Calculated lift-to-drag matches its expected value for {} of {} states".format(
+                    np.sum(self.converged), n_states))
+
+            # Forces from the free body diagram of tether, note that the tether forces as experienced by the kite
+            # switch sign.
+            f_tether_r = f_aero_r + m*g_r
+            f_tether_theta = f_aero_theta + m*g_theta
+            f_tether = np.sqrt(f_tether_r**2 + f_tether_theta**2)
+
+            f_tether_r_ground = -(f_tether_r - cos_theta*m_tether*g)
+            f_tether_ground = np.sqrt(f_tether_r_ground**2 + f_tether_theta**2)
+
+            # Calculating mechanical power of system.
+            reeling_speed = v_wind*rf
+            p = f_tether_ground*reeling_speed
+
+            # Kite velocity in spherical coordinates, see eq. 2.58-2.60 AWE book.
+            elevation_rate = - v_wind * lambda_ / r * cos_chi
+            elevation_rate[~np.isfinite(elevation_rate)] = 0.
+            azimuth_rate = v_wind * lambda_ / r * sin_chi / sin_theta
+            azimuth_rate[~np.isfinite(azimuth_rate)] = 0.
+
+            results = {
+                'reeling_factor': rf,
+                'kinematic_ratio': kappa,
+                'tangential_speed_factor': lambda_,
+                'kite_tangential_speed': lambda_ * v_wind,
+                'wind_speed': v_wind,
+                'apparent_wind_speed': v_app,
+                'heading': np.arctan2(v_app_vector[2], v_app_vector[1]),
+                'inflow_angle': inflow_angle,
+                'aerodynamic_force': f_aero,
+                'tether_force_kite': f_tether,
+                'tether_force_ground': f_tether_ground,
+                'power_ground': p,
+                'kite_speed': np.sqrt(reeling_speed**2 + (lambda_*v_wind)**2),
+                'reeling_speed': reeling_speed,
+                'elevation_rate': elevation_rate,
+                'azimuth_rate': azimuth_rate,
+                'lift_to_drag_error': self.lift_to_drag_error,
+                'n_iterations': self.n_iterations,
+                'n_iterations_aoa': self.n_iterations_aoa,
+                'converged': self.converged,
+                'error_code': self.error_code,
+                'error_messages': self.error_messages,
+                'setpoints': setpoint,
+            }
+        for key, val in results.items():
+            setattr(self, key, val.reshape(shape))
+
+        # Update monitoring parameters for tether force violations.
+        if not tether_force_controlled:
+            min_force = getattr(system_properties, 'tether_force_min_limit', None)
+            max_force = getattr(system_properties, 'tether_force_max_limit', None)
+            self.tether_force_max_limit_violated = np.zeros(shape, dtype=bool)
+            self.tether_force_min_limit_violated = np.zeros(shape, dtype=bool)
+            if max_force is not None:
+                self.tether_force_max_limit_violated = self.tether_force_ground > max_force
+            if min_force is not None:
+                self.tether_force_min_limit_violated = ~self.tether_force_max_limit_violated \
+                    & (self.tether_force_ground < min_force)
+
+        if self.enable_steady_state_errors and self.error_message is not None:
+            raise SteadyStateError(self.error_message, self.first_error_code)
+
+    def find_steady_states(self, system_properties, environment_state, basic_kinematics, ids=None):
+        """Solve the steady states with `find_state`, reusing the cached solutions if a `SteadyStateCache` is
+        configured. Only the states missing in the cache are solved, and stored in the cache afterwards. No warm starts
+        are used on the batched path.
+
+        Args:
+            system_properties (`SysPropsFixedAeroCoeffs` or child): Collection of system properties, updated for the
+                (array of) tether length(s).
+            environment_state (`Environment` or child): Specification of environment.
+            basic_kinematics (`KiteKinematics`): Basic kinematic properties required for finding the steady states.
+            ids (ndarray, optional): Only solve the states with these indices of the flattened broadcast input.
+
+        Returns:
+            list: `SteadyState` of each state, in flattened order.
+
+        Raises:
+            SteadyStateError: If steady state errors are enabled and the procedure failed for any state.
+
+        """
+        cache = self.cache
+        if cache is None:
+            self.find_state(system_properties, environment_state, basic_kinematics, ids=ids)
+            return self.steady_states()
+
+        keys, setpoints = cache.batch_keys(self, system_properties, environment_state, basic_kinematics, ids)
+        state_ids = np.arange(len(keys)) if ids is None else np.asarray(ids)
+        solutions = [cache.get(key) for key in keys]
+        steady_states = [None]*len(keys)
+
+        missing = [j for j, solution in enumerate(solutions) if solution is None]
+        if missing:
+            self.find_state(system_properties, environment_state, basic_kinematics, ids=state_ids[missing])
+            for j, ss in zip(missing, self.steady_states()):
+                cache.put(keys[j], ss)
+                steady_states[j] = ss
+
+        control_parameter = self.control_settings[0]
+        settings = {key: getattr(self, key) for key in TimeSeriesArrays.STEADY_STATE_SETTINGS}
+        for j, (solution, setpoint) in enumerate(zip(solutions, setpoints.tolist())):
+            if solution is None:
+                continue
+            ss = SteadyState.__new__(SteadyState)
+            ss.__dict__.update(settings, cache=None, angle_of_attack=None, lift_to_drag=None)
+            ss.__dict__.update(solution)
+            ss.control_settings = (control_parameter, setpoint)
+            ss.tether_force_max_limit_violated = False
+            ss.tether_force_min_limit_violated = False
+            ss.update_limit_violations(system_properties)
+            if ss.error_message is not None and self.enable_steady_state_errors:
+                raise SteadyStateError(ss.error_message, ss.error_code)
+            steady_states[j] = ss
+        return steady_states
+
+    @staticmethod
+    def mask(ids, n_states):
+        """Flags of the states with the given ids."""
+        mask = np.zeros(n_states, dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def steady_states(self):
+        """List of `SteadyState` objects of the individual states, in flattened order."""
+        control_parameter = self.control_settings[0]
+        keys = TimeSeriesArrays.STEADY_STATE_FIELDS + ('converged', 'n_iterations', 'n_iterations_aoa')
+        values = [np.ravel(getattr(self, key)).tolist() for key in keys]
+        n_states = len(values[0])
+        flags = [np.broadcast_to(getattr(self, key), (n_states, )).tolist()
+                 for key in ('tether_force_max_limit_violated', 'tether_force_min_limit_violated')]
+        settings = {key: getattr(self, key) for key in TimeSeriesArrays.STEADY_STATE_SETTINGS}
+        steady_states = []
+        for i, (point, setpoint, kappa, error_code, error_message) in enumerate(zip(
+                zip(*values), np.ravel(self.setpoints).tolist(), np.ravel(self.kinematic_ratio).tolist(),
+                np.ravel(self.error_code).tolist(), np.ravel(self.error_messages).tolist())):
+            ss = SteadyState.__new__(SteadyState)
+            ss.__dict__.update(settings, cache=None, angle_of_attack=None, lift_to_drag=None)
+            ss.__dict__.update(zip(keys, point))
+            # Same conventions as `SteadyState.find_state`: no kinematic ratio and error code if not applicable.
+            ss.control_settings = (control_parameter, setpoint)
+            ss.kinematic_ratio = None if np.isnan(kappa) else kappa
+            ss.error_code = error_code if error_code != 0 else None
+            ss.error_message = error_message
+            ss.tether_force_max_limit_violated = flags[0][i]
+            ss.tether_force_min_limit_violated = flags[1][i]
+            steady_states.append(ss)
+        return steady_states
+
+
+class SteadyStateCache:
+    """Bounded cache of steady state solutions shared by many simulations, e.g. the cycle simulations of an
+    optimization. Solutions are keyed on the quantized kinematics, wind state, control setpoint and system properties.
+    Optionally, the kinematic ratio of a solution in the neighbourhood of a new state is used as starting value of its
+    iterative procedure.
+
+    With the default 12 significant digits the cache is exact-match only: it reuses the states of phases whose inputs
+    did not change, e.g. the retraction states when finite differencing a traction variable. This hit about 21% of the
+    steady states of the finite difference evaluations of a hybrid pumping cycle, including the states of the pattern
+    solved with `SteadyStateBatch`, with unchanged results. Coarser keys
+    hit more often (29% at 8, 39% at 6 digits), but return the solution of a neighbouring state and distort the
+    finite difference gradients of the optimizer (relative error of 1e-3 at 8, 0.5 at 6 digits).
+
+    Attributes:
+        max_size (int): Maximum number of stored solutions, the least recently used solution is dropped first.
+        digits (int): Significant digits of the key values, exact-match only if not coarser than the finite difference
+            step of the optimizer.
+        warm_start_digits (int): Significant digits of the key values for looking up the starting kinematic ratio of
+            a new state, no warm starts if None.
+        solutions (OrderedDict): Steady state results per key.
+        kinematic_ratios (OrderedDict): Converged kinematic ratios per warm start key.
+        hits (int): Number of steady states taken from the cache.
+        misses (int): Number of steady states solved.
+        warm_starts (int): Number of steady states solved starting from a cached kinematic ratio.
+
+    """
+    RESULTS = ('reeling_factor', 'kinematic_ratio', 'tangential_speed_factor', 'kite_tangential_speed', 'wind_speed',
+               'apparent_wind_speed', 'heading', 'inflow_angle', 'angle_of_attack', 'lift_to_drag',
+               'aerodynamic_force', 'tether_force_kite', 'tether_force_ground', 'power_ground', 'kite_speed',
+               'reeling_speed', 'elevation_rate', 'azimuth_rate', 'lift_to_drag_error', 'n_iterations',
+               'n_iterations_aoa', 'converged', 'error_message', 'error_code')
+
+    def __init__(self, max_size=100000, digits=12, warm_start_digits=None):
+        """
+        Args:
+            max_size (int, optional): Maximum number of stored solutions.
+            digits (int, optional): Significant digits of the key values.
+            warm_start_digits (int, optional): Significant digits of the warm start key values, no warm starts if
+                None.
+
+        """
+        self.max_size = max_size
+        self.digits = digits
+        self.warm_start_digits = warm_start_digits
+        self.solutions = OrderedDict()
+        self.kinematic_ratios = OrderedDict()
+        self.hits, self.misses, self.warm_starts = 0, 0, 0
+
+    def __len__(self):
+        return len(self.solutions)
+
+    @staticmethod
+    def quantize(values, digits):
+        return tuple(None if v is None else float('{:.{}g}'.format(v, digits)) for v in values)
+
+    def key(self, steady_state, system_properties, environment_state, kinematics, digits=None):
+        """Key of the steady state with the given control and iterative procedure settings.
+
+        Args:
+            steady_state (`SteadyState`): Steady state to be solved.
+            system_properties (`SysPropsFixedAeroCoeffs` or child): Collection of system properties.
+            environment_state (`Environment` or child): Specification of environment.
+            kinematics (`KiteKinematics`): Basic kinematic properties of the steady state.
+            digits (int, optional): Significant digits of the key values, defaults to `digits` attribute.
+
+        Returns:
+            tuple: Key of the steady state.
+
+        """
+        if digits is None:
+            digits = self.digits
+        control, setpoint = steady_state.control_settings
+        values = (
+            setpoint, steady_state.convergence_tolerance,
+            kinematics.straight_tether_length, kinematics.azimuth_angle, kinematics.elevation_angle,
+            kinematics.course_angle,
+            environment_state.wind_speed, environment_state.air_density, environment_state.downwind_direction,
+            system_properties.kite_projected_area, system_properties.kite_mass, system_properties.tether_mass,
+            system_properties.aerodynamic_force_coefficient, system_properties.lift_to_drag,
+        )
+        return (control, steady_state.force_n_iterations, steady_state.max_iterations) + self.quantize(values, digits)
+
+    def batch_keys(self, batch, system_properties, environment_state, kinematics, ids=None):
+        """Keys of the states of a `SteadyStateBatch`, in flattened order of the broadcast input. The keys are
+        distinct from those of `key`, as the solutions of the batched solver may differ in the last digits from those
+        of `SteadyState.find_state`.
+
+        Args:
+            batch (`SteadyStateBatch`): Steady states to be solved.
+            system_properties (`SysPropsFixedAeroCoeffs` or child): Collection of system properties.
+            environment_state (`Environment` or child): Specification of environment.
+            kinematics (`KiteKinematics`): Basic kinematic properties of the steady states.
+            ids (ndarray, optional): Only the keys of the states with these indices.
+
+        Returns:
+            tuple: List of the key and array of the control setpoint of each state.
+
+        """
+        control, setpoint = batch.control_settings[:2]
+        values = np.broadcast_arrays(
+            setpoint, batch.convergence_tolerance,
+            kinematics.straight_tether_length, kinematics.azimuth_angle, kinematics.elevation_angle,
+            kinematics.course_angle,
+            environment_state.wind_speed, environment_state.air_density, environment_state.downwind_direction,
+            system_properties.kite_projected_area, system_properties.kite_mass, system_properties.tether_mass,
+            system_properties.aerodynamic_force_coefficient, system_properties.lift_to_drag,
+        )
+        values = [np.array(val, dtype=float).ravel() for val in values]
+        if ids is not None:
+            values = [val[ids] for val in values]
+        settings = ('batch', control, batch.force_n_iterations, batch.max_iterations)
+        keys = [settings + self.quantize(point, self.digits) for point in zip(*[val.tolist() for val in values])]
+        return keys, values[0]
+
+    def get(self, key):
+        """Cached results of the steady state, None if not cached."""
+        solution = self.solutions.get(key)
+        if solution is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.solutions.move_to_end(key)
+        return solution
+
+    def put(self, key, steady_state):
+        """Store the results of a solved steady state."""
+        self.solutions[key] = {attr: getattr(steady_state, attr) for attr in self.RESULTS}
+        self.solutions.move_to_end(key)
+        if len(self.solutions) > self.max_size:
+            self.solutions.popitem(last=False)
+
+    def get_kinematic_ratio(self, key):
+        """Kinematic ratio of a converged steady state in the neighbourhood, None if not cached."""
+        kappa = self.kinematic_ratios.get(key)
+        if kappa is not None:
+            self.warm_starts += 1
+            self.kinematic_ratios.move_to_end(key)
+        return kappa
+
+    def put_kinematic_ratio(self, key, kappa):
+        self.kinematic_ratios[key] = kappa
+        self.kinematic_ratios.move_to_end(key)
+        if len(self.kinematic_ratios) > self.max_size:
+            self.kinematic_ratios.popitem(last=False)
+
+    def stats(self):
+        """Hit and miss statistics of the cache."""
+        n_requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'warm_starts': self.warm_starts,
+            'hit_rate': self.hits/n_requests if n_requests > 0 else 0.,
+            'size': len(self.solutions),
+        }
+
+    def clear(self):
+        self.solutions.clear()
+        self.kinematic_ratios.clear()
+        self.hits, self.misses, self.warm_starts = 0, 0, 0
+
+
+class TimeSeriesArrays:
+    """Array-backed storage of the time points of a `TimeSeries`. The time and each attribute of the kinematics and
+    steady states are stored in a preallocated array, which grows geometrically when full. `KiteKinematics` and
+    `SteadyState` objects are only created from the arrays on request.
+
+    Attributes:
+        n (int): Number of stored time points.
+        capacity (int): Number of allocated time points.
+        arrays (dict): Arrays of the time and kinematic and steady state attributes, filled up to `n`.
+        steady_state_settings (dict): Iterative procedure settings of the first stored steady state.
+
+    """
+    KINEMATICS_FIELDS = ('straight_tether_length', 'azimuth_angle', 'elevation_angle', 'course_angle', 'x', 'y', 'z')
+    STEADY_STATE_FIELDS = ('reeling_factor', 'tangential_speed_factor', 'kite_tangential_speed', 'wind_speed',
+                           'apparent_wind_speed', 'heading', 'inflow_angle', 'aerodynamic_force', 'tether_force_kite',
+                           'tether_force_ground', 'power_ground', 'kite_speed', 'reeling_speed', 'elevation_rate',
+                           'azimuth_rate', 'lift_to_drag_error')
+    STEADY_STATE_FLAGS = ('converged', 'tether_force_max_limit_violated', 'tether_force_min_limit_violated')
+    # Attributes which may be None or are not numeric.
+    STEADY_STATE_OBJECTS = ('control_settings', 'kinematic_ratio', 'angle_of_attack', 'lift_to_drag', 'n_iterations',
+                            'n_iterations_aoa', 'error_message', 'error_code')
+    STEADY_STATE_SETTINGS = ('force_n_iterations', 'max_iterations', 'enable_steady_state_errors',
+                             'convergence_tolerance')
+
+    def __init__(self, capacity=64):
+        """
+        Args:
+            capacity (int, optional): Initially allocated number of time points.
+
+        """
+        self.n = 0
+        self.capacity = capacity
+        self.arrays = {'time': np.empty(capacity)}
+        for key in self.KINEMATICS_FIELDS + self.STEADY_STATE_FIELDS:
+            self.arrays[key] = np.empty(capacity)
+        for key in self.STEADY_STATE_FLAGS:
+            self.arrays[key] = np.empty(capacity, dtype=bool)
+        for key in self.STEADY_STATE_OBJECTS:
+            self.arrays[key] = np.empty(capacity, dtype=object)
+        self.steady_state_settings = {}
+
+        # Objects created from the arrays, reused until new time points are added.
+        self._kinematics = None
+        self._steady_states = None
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        """Array of the time or a kinematic or steady state attribute of the stored time points."""
+        return self.arrays[key][:self.n]
+
+    def __getstate__(self):
+        # Only pickle the filled part of the arrays.
+        state = self.__dict__.copy()
+        state['arrays'] = {key: val[:self.n].copy() for key, val in self.arrays.items()}
+        state['capacity'] = self.n
+        state['_kinematics'], state['_steady_states'] = None, None
+        return state
+
+    def reserve(self, capacity):
+        """Grow the arrays to hold at least `capacity` time points."""
+        if capacity <= self.capacity:
+            return
+        for key, val in self.arrays.items():
+            grown = np.empty(capacity, dtype=val.dtype)
+            grown[:self.n] = val[:self.n]
+            self.arrays[key] = grown
+        self.capacity = capacity
+
+    def append(self, time, kinematics, steady_state):
+        """Add a time point with its kinematics and steady state.
+
+        Args:
+            time (float): Point in time [s].
+            kinematics (`KiteKinematics`): Kinematics of the time point.
+            steady_state (`SteadyState`): Steady state of the time point.
+
+        """
+        if self.n == self.capacity:
+            self.reserve(max(2*self.capacity, 1))
+        i = self.n
+        arrays = self.arrays
+        arrays['time'][i] = time
+        for key in self.KINEMATICS_FIELDS:
+            arrays[key][i] = getattr(kinematics, key)
+        for key in self.STEADY_STATE_FIELDS:
+            val = getattr(steady_state, key)
+            arrays[key][i] = np.nan if val is None else val
+        for key in self.STEADY_STATE_FLAGS + self.STEADY_STATE_OBJECTS:
+            arrays[key][i] = getattr(steady_state, key)
+        if i == 0:
+            self.steady_state_settings = {key: getattr(steady_state, key) for key in self.STEADY_STATE_SETTINGS}
+        self.n += 1
+
+    def extend(self, times, kinematics, steady_states):
+        """Add multiple time points at once.
+
+        Args:
+            times (array_like): Points in time [s].
+            kinematics (`KiteKinematics`): Kinematics of the time points, array attributes.
+            steady_states (list): `SteadyState` of each time point.
+
+        """
+        n_new = len(steady_states)
+        if self.n + n_new > self.capacity:
+            self.reserve(max(2*self.capacity, self.n + n_new))
+        i = slice(self.n, self.n + n_new)
+        arrays = self.arrays
+        arrays['time'][i] = times
+        for key in self.KINEMATICS_FIELDS:
+            arrays[key][i] = getattr(kinematics, key)
+        for key in self.STEADY_STATE_FIELDS:
+            arrays[key][i] = [np.nan if val is None else val
+                              for val in (getattr(ss, key) for ss in steady_states)]
+        for key in self.STEADY_STATE_FLAGS + self.STEADY_STATE_OBJECTS:
+            for j, ss in enumerate(steady_states, self.n):
+                arrays[key][j] = getattr(ss, key)
+        if self.n == 0 and n_new > 0:
+            self.steady_state_settings = {key: getattr(steady_states[0], key)
+                                          for key in self.STEADY_STATE_SETTINGS}
+        self.n += n_new
+
+    def kinematics(self):
+        """List of `KiteKinematics` objects of the stored time points."""
+        if self._kinematics is None or len(self._kinematics) != self.n:
+            values = [self[key].tolist() for key in self.KINEMATICS_FIELDS]
+            self._kinematics = []
+            for point in zip(*values):
+                kin = KiteKinematics.__new__(KiteKinematics)
+                kin.__dict__.update(zip(self.KINEMATICS_FIELDS, point))
+                self._kinematics.append(kin)
+        return self._kinematics
+
+    def steady_states(self):
+        """List of `SteadyState` objects of the stored time points."""
+        if self._steady_states is None or len(self._steady_states) != self.n:
+            keys = self.STEADY_STATE_FIELDS + self.STEADY_STATE_FLAGS + self.STEADY_STATE_OBJECTS
+            values = [self[key].tolist() for key in keys]
+            self._steady_states = []
+            for point in zip(*values):
+                ss = SteadyState.__new__(SteadyState)
+                ss.__dict__.update(self.steady_state_settings, cache=None)
+                ss.__dict__.update(zip(keys, point))
+                self._steady_states.append(ss)
+        return self._steady_states
+
+    @classmethod
+    def concatenate(cls, series, time_offsets=None):
+        """Concatenate the time points of multiple time series.
+
+        Args:
+            series (list): `TimeSeriesArrays` objects.
+            time_offsets (list, optional): Offset added to the time of each of the time series.
+
+        Returns:
+            `TimeSeriesArrays`: Combined time points.
+
+        """
+        if time_offsets is None:
+            time_offsets = [0.]*len(series)
+        combined = cls(capacity=sum(len(s) for s in series))
+        for s, offset in zip(series, time_offsets):
+            for key, val in combined.arrays.items():
+                val[combined.n:combined.n+s.n] = s[key]
+            combined.arrays['time'][combined.n:combined.n+s.n] += offset
+            if combined.n == 0:
+                combined.steady_state_settings = s.steady_state_settings
+            combined.n += s.n
+        return combined
+
+
 class TimeSeries:
     """A solution to the quasi-steady motion simulation of the kite. The distance covered by the point particle is
     solved as a transition through steady states using the finite difference method.
 
     Attributes:
-        time (list): Points in time for which the states are solved.
-        kinematics (list): Time series of `KiteKinematics` objects.
-        steady_states (list): Time series of `SteadyState` objects.
+        series (`TimeSeriesArrays`): Time points with the kinematics and steady states.
+        time (ndarray): Points in time for which the states are solved.
+        kinematics (list): Time series of `KiteKinematics` objects, created from `series`.
+        steady_states (list): Time series of `SteadyState` objects, created from `series`.
         system_properties (`SystemProperties`): Collection of system properties.
         environment_state (`Environment` or child): Specification of environment.
         steady_state_config (dict): Iterative procedure settings for finding the steady state.
@@ -1010,10 +1959,8 @@ class TimeSeries:
 
     """
     def __init__(self):
-        # Result lists with time and states.
-        self.time = []
-        self.kinematics = []
-        self.steady_states = []
+        # Result arrays with time and states.
+        self.series = TimeSeriesArrays()
         self.n_time_points = None
 
         # Side conditions.
@@ -1026,6 +1973,18 @@ class TimeSeries:
         self.average_power = None
         self.duration = None
 
+    @property
+    def time(self):
+        return self.series['time']
+
+    @property
+    def kinematics(self):
+        return self.series.kinematics()
+
+    @property
+    def steady_states(self):
+        return self.series.steady_states()
+
     def time_plot(self, plot_parameters, y_labels=None, y_scaling=None, plot_markers=None, fig_num=None):
         """Generic plotting method for making a time plot of `KiteKinematics` and `SteadyState` attributes.
 
@@ -1276,8 +2235,8 @@ class Phase(TimeSeries):
             timer_start (float, optional): Start point for time trace [s].
 
         """
-        # Empty the result lists.
-        self.time, self.kinematics, self.steady_states, self.n_time_points = [], [], [], 0
+        # Empty the result arrays.
+        self.series, self.n_time_points = TimeSeriesArrays(), 0
         self.min_reeling_speed, self.max_reeling_speed = np.inf, -np.inf
 
         self.system_properties = system_properties
@@ -1291,13 +2250,12 @@ class Phase(TimeSeries):
             self.kinematics_start.azimuth_angle += environment_state.downwind_direction
             self.kinematics_start.update()
         steady_state_start = self.determine_new_steady_state(self.kinematics_start)
-        self.time.append(self.timer)
-        self.kinematics.append(self.kinematics_start)
-        self.steady_states.append(steady_state_start)
+        self.series.append(self.timer, self.kinematics_start, steady_state_start)
+        last_kinematics, last_steady_state = self.kinematics_start, steady_state_start
         # Monitor stopping criteria in case of infinite loop.
         end_phase = False
         while not end_phase:
-            end_phase, new_kinematics = self.determine_new_kinematics(self.kinematics[-1], self.steady_states[-1])
+            end_phase, new_kinematics = self.determine_new_kinematics(last_kinematics, last_steady_state)
             environment_state.calculate(new_kinematics.z)
             if self.follow_wind:
                 new_kinematics.azimuth_angle += environment_state.downwind_direction
@@ -1305,9 +2263,8 @@ class Phase(TimeSeries):
 
             # Add new time, kinematics, and steady state to corresponding result lists.
             new_steady_state = self.determine_new_steady_state(new_kinematics)
-            self.time.append(self.timer)
-            self.kinematics.append(new_kinematics)
-            self.steady_states.append(new_steady_state)
+            self.series.append(self.timer, new_kinematics, new_steady_state)
+            last_kinematics, last_steady_state = new_kinematics, new_steady_state
 
             self.n_time_points += 1
 
@@ -1318,7 +2275,7 @@ class Phase(TimeSeries):
                 raise PhaseError(error_message, 1)
 
         # Processing resulting steady states to determine the phase performance.
-        self.energy = np.trapz([ss.power_ground for ss in self.steady_states], self.time)
+        self.energy = np.trapz(self.series['power_ground'], self.series['time'])
         self.duration = self.timer - timer_start
         if self.duration > 0:
             self.average_power = self.energy / self.duration
@@ -1332,21 +2289,18 @@ class Phase(TimeSeries):
     def calc_operational_properties(self):
         """Calculate the operational properties of the phase."""
         # Calculate time averages.
-        self.average_reeling_factor = np.trapz([ss.reeling_factor for ss in self.steady_states],
-                                               self.time) / self.duration
-        self.average_reeling_speed = np.trapz([ss.reeling_speed for ss in self.steady_states],
-                                              self.time) / self.duration
-        self.average_tether_force_ground = np.trapz([ss.tether_force_ground for ss in self.steady_states],
-                                                    self.time) / self.duration
+        time = self.series['time']
+        self.average_reeling_factor = np.trapz(self.series['reeling_factor'], time) / self.duration
+        self.average_reeling_speed = np.trapz(self.series['reeling_speed'], time) / self.duration
+        self.average_tether_force_ground = np.trapz(self.series['tether_force_ground'], time) / self.duration
 
         # Calculate the length properties of the path covered by the kite.
-        self.path_length = 0
-        for kp0, kp1 in zip(self.kinematics[:-1], self.kinematics[1:]):
-            self.path_length += np.sqrt((kp1.x - kp0.x)**2 + (kp1.y - kp0.y)**2 + (kp1.z - kp0.z)**2)
+        x, y, z = self.series['x'], self.series['y'], self.series['z']
+        self.path_length = np.sum(np.sqrt(np.diff(x)**2 + np.diff(y)**2 + np.diff(z)**2))
 
-        kp0, kp1 = self.kinematics[0], self.kinematics[-1]
-        self.path_length_effective = np.sqrt((kp1.x - kp0.x)**2 + (kp1.y - kp0.y)**2 + (kp1.z - kp0.z)**2)
-        self.reeling_tether_length = kp1.straight_tether_length - kp0.straight_tether_length
+        self.path_length_effective = np.sqrt((x[-1] - x[0])**2 + (y[-1] - y[0])**2 + (z[-1] - z[0])**2)
+        tether_length = self.series['straight_tether_length']
+        self.reeling_tether_length = tether_length[-1] - tether_length[0]
 
     def determine_new_kinematics(self, last_kinematics, last_steady_state):
         """Determine new kinematics based on kinematics and steady state of previous time point. Moreover, evaluate if
@@ -1393,26 +2347,7 @@ class Phase(TimeSeries):
             new_state.enable_steady_state_errors = True
 
         # Operational limits.
-        if 'tether_force' not in self.control_settings[0] and len(self.control_settings) == 4:
-            min_force = self.control_settings[2]
-            max_force = self.control_settings[3]
-        else:
-            min_force = sys_props.tether_force_min_limit
-            max_force = sys_props.tether_force_max_limit
-
-        min_speed = sys_props.reeling_speed_min_limit
-        if "RetractionPhase" in self.__class__.__name__ \
-                and sys_props.reeling_speed_max_limit_retr is not None:
-            max_speed = sys_props.reeling_speed_max_limit_retr
-            min_speed = 7.5
-        elif "TractionPhase" in self.__class__.__name__ \
-                and sys_props.reeling_speed_max_limit_trac is not None:
-            max_speed = sys_props.reeling_speed_max_limit_trac
-        else:
-            max_speed = sys_props.reeling_speed_max_limit
-
-
-        assert max_speed > 0 and min_speed >= 0, "Reeling speed limits should be positive."
+        min_force, max_force, min_speed, max_speed = self.operational_limits(sys_props)
 
         # When operational limits are imposed, evaluate if the primary control setting yield limit violations.
         if self.impose_operational_limits:
@@ -1454,6 +2389,53 @@ class Phase(TimeSeries):
                 elif new_state.error_message is not None and temporary_suppress_steady_state_errors:
                     raise SteadyStateError(new_state.error_message, new_state.error_code)
 
+        self.monitor_steady_state(new_state, min_force, max_force, min_speed, max_speed)
+        return new_state
+
+    def operational_limits(self, sys_props):
+        """Tether force and reeling speed limits of the phase.
+
+        Args:
+            sys_props (`SystemProperties`): Collection of system properties.
+
+        Returns:
+            tuple: Minimum and maximum tether force [N] and minimum and maximum reeling speed [m/s], None if not
+                limited.
+
+        """
+        if 'tether_force' not in self.control_settings[0] and len(self.control_settings) == 4:
+            min_force = self.control_settings[2]
+            max_force = self.control_settings[3]
+        else:
+            min_force = sys_props.tether_force_min_limit
+            max_force = sys_props.tether_force_max_limit
+
+        min_speed = sys_props.reeling_speed_min_limit
+        if "RetractionPhase" in self.__class__.__name__ \
+                and sys_props.reeling_speed_max_limit_retr is not None:
+            max_speed = sys_props.reeling_speed_max_limit_retr
+            min_speed = 7.5
+        elif "TractionPhase" in self.__class__.__name__ \
+                and sys_props.reeling_speed_max_limit_trac is not None:
+            max_speed = sys_props.reeling_speed_max_limit_trac
+        else:
+            max_speed = sys_props.reeling_speed_max_limit
+
+
+        assert max_speed > 0 and min_speed >= 0, "Reeling speed limits should be positive."
+        return min_force, max_force, min_speed, max_speed
+
+    def monitor_steady_state(self, new_state, min_force, max_force, min_speed, max_speed):
+        """Update the monitoring parameters with a new steady state and check for limit violations.
+
+        Args:
+            new_state (`SteadyState`): Steady state of current time point.
+            min_force, max_force, min_speed, max_speed: Operational limits, see `operational_limits`.
+
+        Raises:
+            OperationalLimitViolation: If limit violation errors are enabled and a limit is violated.
+
+        """
         # Update the monitoring parameters.
         if new_state.converged:
             if new_state.reeling_speed > self.max_reeling_speed:
@@ -1487,7 +2469,81 @@ class Phase(TimeSeries):
             if error_message:
                 raise OperationalLimitViolation(error_message, error_code)
 
-        return new_state
+    def determine_new_steady_states(self, kinematics):
+        """Determine the steady states of independent kinematics at once, with the batched solver. Same procedure as
+        `determine_new_steady_state` for each state: states violating the operational limits are solved again using
+        the limit as setpoint, errors are raised and the monitoring parameters updated in the order of the states.
+
+        Args:
+            kinematics (`KiteKinematics`): Kinematics with an array attribute, or element, per state.
+
+        Returns:
+            list: `SteadyState` of each state.
+
+        """
+        sys_props = self.system_properties
+        sys_props.update(kinematics.straight_tether_length, self.kite_powered)
+        env_states = self.environment_state.calculate_states(kinematics.z)
+
+        # Errors are raised per state after solving, in the order of the states.
+        enable_steady_state_errors = self.steady_state_config.get('enable_steady_state_errors', True)
+        batch_config = dict(self.steady_state_config, enable_steady_state_errors=False)
+
+        def solve(control_settings, ids=None):
+            batch = SteadyStateBatch(batch_config)
+            batch.control_settings = control_settings
+            return batch.find_steady_states(sys_props, env_states, kinematics, ids=ids)
+
+        new_states = solve(self.control_settings[:2])
+        n_states = len(new_states)
+        min_force, max_force, min_speed, max_speed = self.operational_limits(sys_props)
+
+        raise_errors = enable_steady_state_errors
+        speed_viol_diff = None
+        if self.impose_operational_limits:
+            if 'tether_force' not in self.control_settings[0]:  # If speed controlled.
+                # Solve states violating the tether force limits using the force limit as controlled parameter.
+                force = np.array([ss.tether_force_ground for ss in new_states])
+                upper = np.zeros(n_states, dtype=bool)
+                lower = np.zeros(n_states, dtype=bool)
+                with np.errstate(invalid='ignore'):
+                    if max_force is not None:
+                        upper = force > max_force
+                    if min_force is not None:
+                        lower = ~upper & (force < min_force)
+                if self.__class__.__name__ == "RetractionPhase":
+                    lower |= ~upper & np.array([ss.error_code == 7 for ss in new_states])
+                for mask, setpoint in [(upper, max_force), (lower, min_force)]:
+                    ids = np.flatnonzero(mask)
+                    if len(ids) > 0:
+                        for i, ss in zip(ids, solve(('tether_force_ground', setpoint), ids)):
+                            new_states[i] = ss
+            elif self.__class__.__name__ != "TransitionPhase":  # If force controlled.
+                # Solve states violating the reeling speed limits using the speed limit as controlled parameter.
+                speed = np.abs([ss.reeling_speed for ss in new_states])
+                with np.errstate(invalid='ignore'):
+                    upper = speed > max_speed
+                    lower = ~upper & (speed < min_speed)
+                speed_viol_diff = np.where(upper, max_speed - speed, np.where(lower, speed - min_speed, 0.))
+                setpoint_speed = np.where(upper, max_speed, min_speed)
+                if self.__class__.__name__ == "RetractionPhase":
+                    setpoint_speed = -setpoint_speed
+                ids = np.flatnonzero(upper | lower)
+                if len(ids) > 0:
+                    for i, ss in zip(ids, solve(('reeling_speed', setpoint_speed), ids)):
+                        new_states[i] = ss
+            else:
+                # Errors of the primary control setting are suppressed.
+                raise_errors = False
+
+        for i, new_state in enumerate(new_states):
+            new_state.enable_steady_state_errors = enable_steady_state_errors
+            if speed_viol_diff is not None:
+                self.speed_viol_diff = speed_viol_diff[i]
+            if raise_errors and new_state.error_message is not None:
+                raise SteadyStateError(new_state.error_message, new_state.error_code)
+            self.monitor_steady_state(new_state, min_force, max_force, min_speed, max_speed)
+        return new_states
 
 
 class RetractionPhase(Phase):
@@ -1897,13 +2953,13 @@ class TractionPhaseHybrid(TractionPhase):
 
         tether_lengths = np.linspace(self.tether_length_start_aim, self.tether_length_end, n_patterns)
 
+        # Reeling speeds at the tether lengths, solved at once.
+        elevation_angles = np.array([self.elevation_angle.calculate(le) for le in tether_lengths])
+        kin = KiteKinematics(tether_lengths, self.azimuth_angle, elevation_angles, self.course_angle)
+        reeling_speeds = [ss.reeling_speed for ss in self.determine_new_steady_states(kin)]
+
         pattern_durations = []
-        reeling_speeds = []
-        for le in tether_lengths:
-            elev = self.elevation_angle.calculate(le)
-            kin = KiteKinematics(le, self.azimuth_angle, elev, self.course_angle)
-            environment_state.calculate(kin.z)
-            rs = self.determine_new_steady_state(kin).reeling_speed
+        for le, elev in zip(tether_lengths, elevation_angles):
             pattern_settings = {
                 'tether_length': le,
                 'elevation_angle_ref': elev,
@@ -1915,7 +2971,6 @@ class TractionPhaseHybrid(TractionPhase):
             pattern_duration = pattern.calc_performance_along_pattern(system_properties, environment_state,
                                                                               steady_state_config=steady_state_config)
             pattern_durations.append(pattern_duration)
-            reeling_speeds.append(rs)
 
         avg_pattern_duration = np.mean(pattern_durations)
         phase_duration_aim = (self.tether_length_end - self.tether_length_start_aim)/np.mean(reeling_speeds)
@@ -2079,10 +3134,8 @@ class EvaluatePattern(Phase):  # Determine performance along cross wind pattern
         self.tether_length = settings['tether_length']
         self.elevation_angle_ref = settings['elevation_angle_ref']
 
-        # Result lists with time and states.
-        self.kinematics = None
-        self.steady_states = None
-        self.time = None
+        # Result arrays with time and states.
+        self.series = TimeSeriesArrays()
         self.s = None
 
         # Side conditions.
@@ -2108,7 +3161,7 @@ class EvaluatePattern(Phase):  # Determine performance along cross wind pattern
         self.pattern = LissajousPattern()
 
     def calc_performance_along_pattern(self, system_properties, environment_state, n_points=100, steady_state_config={}, print_details=False):
-        self.time, self.kinematics, self.steady_states = [0.], [], []
+        self.series = TimeSeriesArrays(capacity=n_points)
         self.min_reeling_speed, self.max_reeling_speed = np.inf, -np.inf
         self.s = np.linspace(0, 1, n_points)
         ds = self.s[1]
@@ -2118,35 +3171,26 @@ class EvaluatePattern(Phase):  # Determine performance along cross wind pattern
         self.steady_state_config = steady_state_config
 
         pattern_length = self.pattern.curve_length_unit_sphere * self.tether_length
-        cos_phi, cos_beta, cos_chi = [], [], []
-        valid_pattern = True
-        for s in self.s:
-            beta, phi, chi = self.pattern.get_properties_along_curve(s)[:3]
-
-            kin = KiteKinematics(self.tether_length, phi, self.elevation_angle_ref + beta, chi)
-            self.kinematics.append(kin)
+        # The steady states along the pattern are independent of each other and solved at once.
+        beta, phi, chi = np.array([self.pattern.get_properties_along_curve(s)[:3] for s in self.s]).T
+        kin = KiteKinematics(self.tether_length, phi, self.elevation_angle_ref + beta, chi)
+        if self.follow_wind:
+            kin.azimuth_angle = kin.azimuth_angle + environment_state.calculate_states(kin.z).downwind_direction
+            kin.update()
+        steady_states = self.determine_new_steady_states(kin)
 
-            # Add first time point, kite kinematics, and steady state to corresponding result lists.
-            environment_state.calculate(kin.z)
-            if self.follow_wind:
-                kin.azimuth_angle += environment_state.downwind_direction
-                kin.update()
-            ss = self.determine_new_steady_state(kin)
-            self.steady_states.append(ss)
-
-            cos_phi.append(np.cos(kin.azimuth_angle))
-            cos_beta.append(np.cos(kin.elevation_angle))
-            cos_chi.append(np.cos(kin.course_angle))
-
-            if s != self.s[-1]:
-                if ss.kite_tangential_speed > 0:
-                    dt = ds * pattern_length / ss.kite_tangential_speed
-                else:
-                    dt = 1e1  # Some optimizations were not converging when setting this value to 1e2.
-                    valid_pattern = False
-                next_time = self.time[-1] + dt
+        kite_tangential_speed = np.array([ss.kite_tangential_speed for ss in steady_states[:-1]])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Some optimizations were not converging when setting the time step of invalid points to 1e2.
+            dt = np.where(kite_tangential_speed > 0, ds * pattern_length / kite_tangential_speed, 1e1)
+        valid_pattern = bool(np.all(kite_tangential_speed > 0))
+        times = np.concatenate([[0.], np.cumsum(dt)])
+        self.series.extend(times, kin, steady_states)
+        environment_state.calculate(kin.z[-1])
 
-                self.time.append(next_time)
+        cos_phi = np.cos(kin.azimuth_angle)
+        cos_beta = np.cos(kin.elevation_angle)
+        cos_chi = np.cos(kin.course_angle)
 
         # if valid_pattern:
         pattern_duration = self.time[-1]
@@ -2370,13 +3414,10 @@ class Cycle(TimeSeries):
 
         # Resulting time series
         if reorder:
-            self.time = trans.time + trac.time + [t + last_time for t in retr.time]
-            self.kinematics = trans.kinematics + trac.kinematics + retr.kinematics
-            self.steady_states = trans.steady_states + trac.steady_states + retr.steady_states
+            self.series = TimeSeriesArrays.concatenate([trans.series, trac.series, retr.series],
+                                                       time_offsets=[0., 0., last_time])
         else:
-            self.time = retr.time + trans.time + trac.time
-            self.kinematics = retr.kinematics + trans.kinematics + trac.kinematics
-            self.steady_states = retr.steady_states + trans.steady_states + trac.steady_states
+            self.series = TimeSeriesArrays.concatenate([retr.series, trans.series, trac.series])
         eff_trac_energy = trac.energy * self.phase_efficiencies['traction']
         eff_retr_energy = retr.energy * self.phase_efficiencies['retraction']
         # TODO efficiencies only in final result - and nothing for transition
@@ -21,7 +21,8 @@ import getopt
 import dask
 
 try:
-    from .utils import compute_level_heights, flatten_dict
+    from .utils import compute_level_heights, interpolate_to_heights, \
+        flatten_dict
     from ..utils.convenience_utils import hour_to_date_str
     from .config import start_year, final_year, era5_data_dir, model_level_file_name_format, surface_file_name_format,\
         output_file_name, output_file_name_subset, read_n_lats_per_subset
@@ -29,7 +30,8 @@ try:
     from ..utils.wind_resource_utils import calc_power
 except ImportError:
     # TODO hotfix to be able to run single location plotting...
-    from utils import compute_level_heights, flatten_dict
+    from utils import compute_level_heights, interpolate_to_heights, \
+        flatten_dict
     from convenience_utils import hour_to_date_str
     from config import start_year, final_year, era5_data_dir, model_level_file_name_format, surface_file_name_format,\
         output_file_name, output_file_name_subset, read_n_lats_per_subset
@@ -262,17 +264,9 @@ def process_grid_subsets(output_file, start_subset_id=0, end_subset_id=-1):
                                                                       t_levels[:, :, i_lat_in_subset, i_lon],
                                                                       q_levels[:, :, i_lat_in_subset, i_lon])
                 # Determine wind at altitudes of interest by means of interpolating the raw wind data.
-                v_req_alt = np.zeros((len(hours), len(heights_of_interest)))  # Interpolation results array.
-                rho_req_alt = np.zeros((len(hours), len(heights_of_interest)))
-
-                for i_hr in range(len(hours)):
-                    if not np.all(level_heights[i_hr, 0] > heights_of_interest):
-                        raise ValueError("Requested height ({:.2f} m) is higher than height of highest model level."
-                                         .format(level_heights[i_hr, 0]))
-                    v_req_alt[i_hr, :] = np.interp(heights_of_interest, level_heights[i_hr, ::-1],
-                                                   v_levels[i_hr, ::-1, i_lat_in_subset, i_lon])
-                    rho_req_alt[i_hr, :] = np.interp(heights_of_interest, level_heights[i_hr, ::-1],
-                                                     density_levels[i_hr, ::-1])
+                v_req_alt, rho_req_alt = interpolate_to_heights(heights_of_interest, level_heights,
+                                                                v_levels[:, :, i_lat_in_subset, i_lon],
+                                                                density_levels)
                 p_req_alt = calc_power(v_req_alt, rho_req_alt)
 
                 # Determine wind statistics at fixed heights of interest.
@@ -520,15 +514,8 @@ def eval_single_location(location_lat, location_lon, start_year, final_year):
     ds.close()  # Close the input NetCDF file.
 
     # determine wind at altitudes of interest by means of interpolating the raw wind data
-    v_req_alt = np.zeros((len(hours), len(heights_of_interest)))  # result array for writing interpolated data
-
     level_heights, density_levels = compute_level_heights(levels, surface_pressure, t_levels, q_levels)
-
-    for i_hr in range(len(hours)):
-        # np.interp requires x-coordinates of the data points to increase
-        if not np.all(level_heights[i_hr, 0] > heights_of_interest):
-            raise ValueError("Requested height is higher than height of highest model level.")
-        v_req_alt[i_hr, :] = np.interp(heights_of_interest, level_heights[i_hr, ::-1], v_levels[i_hr, ::-1])
+    v_req_alt = interpolate_to_heights(heights_of_interest, level_heights, v_levels)
 
     v_ceilings = np.zeros((len(hours), len(analyzed_heights_ids['ceilings'])))
     optimal_heights = np.zeros((len(hours), len(analyzed_heights_ids['ceilings'])))
@@ -0,0 +1,45 @@
+import os
+import pandas as pd
+
+# Cut-in/out wind speed tables read in this process, keyed by file name.
+# The file names include the training data and clustering settings of the
+# power curves. Entries are reread if the file was rewritten.
+limits_tables = {}
+
+
+def read_limits_table(file_name, sep=','):
+    """Read cut-in and cut-out wind speed csv file once per process.
+
+    Args:
+        file_name (str): Limits csv file, e.g. config.IO.cut_wind_speeds.
+        sep (str, optional): CSV separator.
+
+    Returns:
+        pandas DataFrame: Cut-in and cut-out wind speeds per profile,
+            shared between all callers - do not modify.
+
+    """
+    stat = os.stat(file_name)
+    file_id = (stat.st_mtime_ns, stat.st_size)
+    key = (os.path.abspath(file_name), sep)
+    if key not in limits_tables or limits_tables[key][0] != file_id:
+        limits_tables[key] = (file_id, pd.read_csv(file_name, sep=sep))
+    return limits_tables[key][1]
+
+
+def get_cut_wind_speeds(config, refined=True):
+    """Cut-in and cut-out wind speed table of the power curves in config.
+
+    Args:
+        refined (bool, optional): Limits refined in the power curve
+            generation, otherwise the estimated limits.
+
+    Returns:
+        pandas DataFrame: Cut-in and cut-out wind speeds per profile.
+
+    """
+    if refined:
+        file_name = config.IO.refined_cut_wind_speeds
+    else:
+        file_name = config.IO.cut_wind_speeds
+    return read_limits_table(file_name)
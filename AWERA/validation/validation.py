@@ -3,11 +3,17 @@ import copy
 import pickle
 import numpy as np
 import numpy.ma as ma
+import pandas as pd
 import matplotlib.pyplot as plt
 from multiprocessing import Pool
 from ..wind_profile_clustering.clustering import Clustering
 from ..wind_profile_clustering.read_requested_data import get_wind_data
-from ..wind_profile_clustering.preprocess_data import reduce_wind_data
+from ..wind_profile_clustering.preprocess_data import reduce_wind_data, \
+    mask_ge_mean_wind_speed_value
+from ..wind_profile_clustering.labels_store import labels_exist
+from ..wind_profile_clustering.principal_component_analysis import pca_sweep
+from ..wind_profile_clustering.wind_profile_clustering import \
+    cluster_count_sweep
 from .utils_validation import diffs_original_vs_reco, plot_height_vs_diffs, \
     diff_original_vs_reco
 from ..utils.plotting_utils import plot_diff_pdf, \
@@ -1018,8 +1024,11 @@ class ValidationProcessingClustering(Clustering):
                                       return_data=False,
                                       save_full_diffs=False,
                                       loc_only=False,
-                                      locs_slice=None):
+                                      locs_slice=None,
+                                      clustering_result=None):
         # Evaluate performance of one combination of n_pcs and n_clusters
+        # clustering_result: fitted clustering of the training data,
+        # e.g. from process_cluster_count_sweep, fitted here if None
         if self.config.Clustering.Validation_type.training == 'cut':
             training_remove_low_wind = True
         else:
@@ -1045,7 +1054,8 @@ class ValidationProcessingClustering(Clustering):
                         data=None,
                         training_remove_low_wind_samples=training_remove_low_wind,
                         return_pipeline=True,
-                        return_data=True)
+                        return_data=True,
+                        clustering_result=clustering_result)
 
                 read_training = True
             else:
@@ -1054,7 +1064,8 @@ class ValidationProcessingClustering(Clustering):
                     data=training_wind_data,
                     training_remove_low_wind_samples=training_remove_low_wind,
                     return_pipeline=True,
-                    return_data=False)
+                    return_data=False,
+                    clustering_result=clustering_result)
 
         # Read testing data
         if self.config.Clustering.Validation_type.testing == 'cut':
@@ -1086,7 +1097,9 @@ class ValidationProcessingClustering(Clustering):
                 # TODO dont return full wind data if test is not train
                 else:
                     print('Read testing data...')
-                    testing_wind_data = get_wind_data(self.config)
+                    # Preprocessed testing data, cached if enabled
+                    testing_wind_data = self.get_preprocessed_data(
+                        remove_low_wind_samples=testing_remove_low_wind)
 
         # Predict labels
         try:
@@ -1176,14 +1189,16 @@ class ValidationProcessingClustering(Clustering):
         else:
             return diff_res
 
-    def process_pca_validation(self, testing_wind_data, save_full_diffs=False):
+    def process_pca_validation(self, testing_wind_data, save_full_diffs=False,
+                               data_back_pc=None):
         # PCA only:
-        # Read pca
-        # TODO make pca if no readable
-        with open(self.config.IO.pca_pipeline, 'rb') as f:
-            pca = pickle.load(f)
-        data_pc = pca.transform(testing_wind_data['training_data'])
-        data_back_pc = pca.inverse_transform(data_pc)
+        if data_back_pc is None:
+            # Read pca
+            # TODO make pca if no readable
+            with open(self.config.IO.pca_pipeline, 'rb') as f:
+                pca = pickle.load(f)
+            data_pc = pca.transform(testing_wind_data['training_data'])
+            data_back_pc = pca.inverse_transform(data_pc)
         reco_data = data_back_pc\
             * testing_wind_data['normalisation_value'][:, np.newaxis]
         # Scale testing data back to real wind data
@@ -1210,6 +1225,74 @@ class ValidationProcessingClustering(Clustering):
 
         return diff_res
 
+    def process_pca_validation_sweep(self, training_wind_data,
+                                     testing_wind_data, all_n_pcs,
+                                     save_full_diffs=False):
+        # PCA only, for all n_pcs from a single PCA fit:
+        # PCA with fewer components by truncation of the components
+        pca_diffs = []
+        if training_wind_data is None:
+            # Training data not read, use the stored PCA pipelines
+            for n_pcs in all_n_pcs:
+                self.config.update({'Clustering': {'n_pcs': n_pcs}})
+                pca_diffs.append(self.process_pca_validation(
+                    testing_wind_data,
+                    save_full_diffs=save_full_diffs))
+            return pca_diffs
+        training_data = training_wind_data['training_data']
+        if self.config.Clustering.Validation_type.training == 'cut':
+            # Training data is returned including low wind samples,
+            # fit on the same samples as the PCA of the stored pipeline
+            training_data = training_data[
+                mask_ge_mean_wind_speed_value(training_wind_data)]
+        for n_pcs, data_back_pc, _ in pca_sweep(
+                training_data,
+                all_n_pcs,
+                data=testing_wind_data['training_data']):
+            print('N PCS: {}'.format(n_pcs))
+            self.config.update({'Clustering': {'n_pcs': n_pcs}})
+            pca_diffs.append(self.process_pca_validation(
+                testing_wind_data,
+                save_full_diffs=save_full_diffs,
+                data_back_pc=data_back_pc))
+        return pca_diffs
+
+    def process_cluster_count_sweep(self, all_n_clusters=None,
+                                    training_data=None,
+                                    warm_start=True,
+                                    return_data=False):
+        # Cluster the training data for all n_clusters: single PCA,
+        # each clustering started from the split previous clusters
+        if all_n_clusters is None:
+            all_n_clusters = self.config.Clustering.eval_n_clusters
+        if training_data is None:
+            if self.config.Clustering.Validation_type.training == 'cut':
+                training_remove_low_wind = True
+            else:
+                training_remove_low_wind = False
+            config = copy.deepcopy(self.config)
+            self.config.update(
+                {'Data': self.config.Clustering.training.__dict__})
+            training_data = self.get_preprocessed_data(
+                remove_low_wind_samples=training_remove_low_wind)
+            setattr(self, 'config', config)
+        sweep = cluster_count_sweep(training_data['training_data'],
+                                    all_n_clusters,
+                                    n_pcs=self.config.Clustering.n_pcs,
+                                    warm_start=warm_start)
+        # Write timings and inertia per number of clusters
+        sweep_info = pd.DataFrame({
+            key: sweep[key]
+            for key in ['n_clusters', 'fit_inertia', 'fit_time', 'n_iter']})
+        sweep_info['pca_time'] = sweep['pca_time']
+        sweep_info.to_csv(
+            self.config.IO.training_plot_output.format(
+                title='n_clusters_sweep').replace('.pdf', '.csv'),
+            index=False)
+        if return_data:
+            return sweep, training_data
+        return sweep
+
     def process_all(self, min_n_pcs=4, save_full_diffs=False,
                     loc_cluster_only=False,
                     locs_slice=None,
@@ -1220,9 +1303,22 @@ class ValidationProcessingClustering(Clustering):
         cluster_diffs = []
         pca_diffs = []
         all_n_pcs = []
+        use_sweep = getattr(self.config.Clustering,
+                            'eval_cluster_count_sweep', False)
+        sweep_training_data = None
         for n_pcs in range(min_n_pcs,
                            self.config.Clustering.eval_n_pc_up_to + 1):
             print('N PCS: {}'.format(n_pcs))
+            clustering_results = {}
+            if use_sweep:
+                # Fit the clusterings of all n_clusters at once
+                self.config.update({'Clustering': {'n_pcs': n_pcs}})
+                sweep, sweep_training_data = \
+                    self.process_cluster_count_sweep(
+                        training_data=sweep_training_data,
+                        return_data=True)
+                clustering_results = dict(zip(sweep['n_clusters'],
+                                              sweep['results']))
             for i, n_clusters in \
                     enumerate(self.config.Clustering.eval_n_clusters):
                 print('N CLUSTERS: {}'.format(n_clusters))
@@ -1238,24 +1334,28 @@ class ValidationProcessingClustering(Clustering):
                             return_data=True,
                             save_full_diffs=save_full_diffs,
                             loc_only=loc_cluster_only,
-                            locs_slice=locs_slice)
+                            locs_slice=locs_slice,
+                            clustering_result=clustering_results.get(
+                                n_clusters))
                 else:
                     diff_res = self.process_clustering_validation(
                         training_wind_data=training_wind_data,
                         testing_wind_data=testing_wind_data,
                         save_full_diffs=save_full_diffs,
                         loc_only=loc_cluster_only,
-                        locs_slice=locs_slice)
+                        locs_slice=locs_slice,
+                        clustering_result=clustering_results.get(
+                            n_clusters))
                 if return_diffs:
                     cluster_diffs.append(diff_res)
-            if not loc_cluster_only:
-                pca_diffs.append(
-                    self.process_pca_validation(
-                        testing_wind_data=testing_wind_data,
-                        save_full_diffs=save_full_diffs)
-                    )
             if return_diffs:
                 all_n_pcs.append(n_pcs)
+        if not loc_cluster_only:
+            pca_diffs = self.process_pca_validation_sweep(
+                training_wind_data,
+                testing_wind_data,
+                range(min_n_pcs, self.config.Clustering.eval_n_pc_up_to + 1),
+                save_full_diffs=save_full_diffs)
         res = {'cluster_diffs': cluster_diffs,
                'pca_diffs': pca_diffs,
                'all_n_pcs': all_n_pcs,
@@ -1926,7 +2026,7 @@ class ValidationChain(ChainAWERA):
                 self.config.update({'Clustering': settings})
                 labels_file = self.config.IO.labels
                 freq_file = self.config.IO.freq_distr
-                if not os.path.isfile(labels_file):
+                if not labels_exist(labels_file):
                     print('Predicting labels: ', settings)
                     self.predict_labels()
                 if not os.path.isfile(freq_file):
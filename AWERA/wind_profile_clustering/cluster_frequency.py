@@ -2,37 +2,121 @@ import pandas as pd
 import pickle
 import numpy as np
 
+from .labels_store import read_labels_file
+from ..utils.cut_wind_speeds import get_cut_wind_speeds
+
 # --------------------------- Cluster Frequency
 
 
+def get_wind_speed_bin_limits(config):
+    """Wind speed bin limits between cut-in and cut-out of each cluster.
+
+    Returns:
+        array: Bin limits of shape (n_clusters, n_wind_speed_bins + 1).
+
+    """
+    cut_wind_speeds = get_cut_wind_speeds(config)
+    v_bin_limits = np.zeros((config.Clustering.n_clusters,
+                             config.Clustering.n_wind_speed_bins+1))
+    for i_c in range(config.Clustering.n_clusters):
+        v_bin_limits[i_c, :] = np.linspace(
+            cut_wind_speeds['vw_100m_cut_in'][i_c],
+            cut_wind_speeds['vw_100m_cut_out'][i_c],
+            config.Clustering.n_wind_speed_bins+1)
+    return v_bin_limits
+
+
+def get_bin_ids(labels, backscaling, v_bin_limits):
+    """Flat (cluster, wind speed bin) index of each sample.
+
+    Samples are in bin j of cluster i if
+    v_bin_limits[i, j] <= backscaling < v_bin_limits[i, j+1].
+
+    Returns:
+        array: Index i*n_bins + j of each sample, -1 if outside the bins.
+
+    """
+    labels = np.asarray(labels).astype(int)
+    backscaling = np.asarray(backscaling)
+    n_bins = v_bin_limits.shape[1] - 1
+    # Bins are equidistant: direct bin index, corrected at the limits
+    v_lower = v_bin_limits[labels, 0]
+    dv = ((v_bin_limits[:, -1] - v_bin_limits[:, 0])/n_bins)[labels]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        j = np.floor((backscaling - v_lower)/dv)
+    j = np.clip(np.nan_to_num(j, nan=0), 0, n_bins-1).astype(int)
+    j -= (backscaling < v_bin_limits[labels, j]) & (j > 0)
+    j += (backscaling >= v_bin_limits[labels, j+1]) & (j < n_bins-1)
+    in_bin = (backscaling >= v_bin_limits[labels, j]) \
+        & (backscaling < v_bin_limits[labels, j+1])
+    return np.where(in_bin, labels*n_bins + j, -1)
+
+
+def frequency_distribution(labels, backscaling, v_bin_limits,
+                           n_samples=None):
+    """Frequency of the samples per cluster and wind speed bin.
+
+    Args:
+        labels (array): Cluster label of each sample.
+        backscaling (array): Wind speed at reference height of each sample.
+        v_bin_limits (array): Wind speed bin limits per cluster.
+        n_samples (int, optional): Number of samples the frequency refers
+            to, number of labels if not given.
+
+    Returns:
+        array: Frequency in percent of shape (n_clusters, n_bins).
+
+    """
+    n_clusters, n_bins = v_bin_limits.shape[0], v_bin_limits.shape[1] - 1
+    if n_samples is None:
+        n_samples = len(labels)
+    bin_ids = get_bin_ids(labels, backscaling, v_bin_limits)
+    counts = np.bincount(bin_ids[bin_ids >= 0],
+                         minlength=n_clusters*n_bins)
+    return counts.reshape((n_clusters, n_bins)) / n_samples * 100.
+
+
+def location_frequency_distribution(labels, backscaling, v_bin_limits,
+                                    n_samples_per_loc,
+                                    n_locs_per_block=1000):
+    """Frequency per location, cluster and wind speed bin.
+
+    The labels are evaluated in blocks of n_locs_per_block locations,
+    such that memory mapped labels are read block wise.
+
+    Returns:
+        array: Frequency in percent of the samples of each location of
+            shape (n_locs, n_clusters, n_bins).
+
+    """
+    n_clusters, n_bins = v_bin_limits.shape[0], v_bin_limits.shape[1] - 1
+    n_samples_per_loc = int(n_samples_per_loc)
+    n_locs = len(labels)//n_samples_per_loc
+    frequency = np.zeros((n_locs, n_clusters, n_bins))
+    for i_start in range(0, n_locs, n_locs_per_block):
+        i_end = min(i_start + n_locs_per_block, n_locs)
+        samples = slice(i_start*n_samples_per_loc, i_end*n_samples_per_loc)
+        bin_ids = get_bin_ids(labels[samples], backscaling[samples],
+                              v_bin_limits)
+        loc_bin_ids = bin_ids + n_clusters*n_bins*np.repeat(
+            np.arange(i_end - i_start), n_samples_per_loc)
+        counts = np.bincount(loc_bin_ids[bin_ids >= 0],
+                             minlength=(i_end - i_start)*n_clusters*n_bins)
+        frequency[i_start:i_end] = counts.reshape(
+            (i_end - i_start, n_clusters, n_bins)) / n_samples_per_loc * 100.
+    return frequency
+
+
 def export_single_loc_frequency_distribution(config,
                                              labels_full,
                                              backscaling,
                                              n_samples,
                                              write_output=True):
-    cut_wind_speeds = pd.read_csv(
-        config.IO.refined_cut_wind_speeds)
-    freq_2d = np.zeros((config.Clustering.n_clusters,
-                        config.Clustering.n_wind_speed_bins))
-    v_bin_limits = np.zeros((config.Clustering.n_clusters,
-                             config.Clustering.n_wind_speed_bins+1))
-    for i_c in range(config.Clustering.n_clusters):
-        v = np.linspace(cut_wind_speeds['vw_100m_cut_in'][i_c],
-                        cut_wind_speeds['vw_100m_cut_out'][i_c],
-                        config.Clustering.n_wind_speed_bins+1)
-        # v = np.linspace(0,
-        #                 30,
-        #                 config.Clustering.n_wind_speed_bins+1)
-        v_bin_limits[i_c, :] = v
-
-        # procedure consistent with the wind property used for characterizing
-        # the cut-in and cut-out wind speeds, i.e. wind speed at 100m height.
-        for j, (v0, v1) in enumerate(zip(v[:-1], v[1:])):
-            # Denormalised assigned cluster wind speed at 100m per sample
-            samples_in_bin = (labels_full == i_c) & \
-                (backscaling >= v0) & \
-                (backscaling < v1)
-            freq_2d[i_c, j] = np.sum(samples_in_bin) / n_samples * 100.
+    # procedure consistent with the wind property used for characterizing
+    # the cut-in and cut-out wind speeds, i.e. wind speed at 100m height.
+    v_bin_limits = get_wind_speed_bin_limits(config)
+    freq_2d = frequency_distribution(labels_full, backscaling, v_bin_limits,
+                                     n_samples=n_samples)
 
     distribution_data = {'frequency': freq_2d,
                          'wind_speed_bin_limits': v_bin_limits,
@@ -46,41 +130,70 @@ def export_single_loc_frequency_distribution(config,
     return freq_2d, v_bin_limits
 
 
+def extend_location_frequency_distribution(previous, locations, labels,
+                                           backscaling, v_bin_limits,
+                                           n_samples_per_loc):
+    """Frequency per location, reusing the frequency of known locations.
+
+    Args:
+        previous (dict): Frequency distribution of part of the locations,
+            with the same wind speed bin limits.
+        locations (list): Locations of labels and backscaling.
+
+    Returns:
+        array: Frequency in percent of the samples of each location of
+            shape (n_locs, n_clusters, n_bins).
+
+    """
+    n_samples_per_loc = int(n_samples_per_loc)
+    previous_index = {tuple(loc): i
+                      for i, loc in enumerate(previous['locations'])}
+    frequency = np.zeros((len(locations), ) + v_bin_limits.shape[:1]
+                         + (v_bin_limits.shape[1] - 1, ))
+    new_ids = []
+    for i, loc in enumerate(locations):
+        if tuple(loc) in previous_index:
+            frequency[i] = previous['frequency'][previous_index[tuple(loc)]]
+        else:
+            new_ids.append(i)
+    if len(new_ids) > 0:
+        new_ids = np.array(new_ids)
+        samples = (new_ids[:, np.newaxis]*n_samples_per_loc
+                   + np.arange(n_samples_per_loc)).ravel()
+        frequency[new_ids] = location_frequency_distribution(
+            labels[samples], backscaling[samples], v_bin_limits,
+            n_samples_per_loc)
+    return frequency
+
+
 def location_wise_frequency_distribution(config,
                                          locations,
                                          labels, n_samples, n_samples_per_loc,
-                                         backscaling):
-    #if len(locations) > 1:
-    n_samples_per_loc = int(n_samples_per_loc)
+                                         backscaling,
+                                         previous=None,
+                                         pipeline_hash=None):
+    # All locations at once, frequency relative to samples per location
+    wind_speed_bin_limits = get_wind_speed_bin_limits(config)
+    if previous is not None and np.array_equal(
+            previous['wind_speed_bin_limits'], wind_speed_bin_limits):
+        # Only evaluate locations not in the previous distribution
+        frequency = extend_location_frequency_distribution(
+            previous, locations, labels, backscaling, wind_speed_bin_limits,
+            n_samples_per_loc)
+    else:
+        frequency = location_frequency_distribution(
+            labels, backscaling, wind_speed_bin_limits, n_samples_per_loc)
     distribution_data = {
-        'frequency': np.zeros((len(locations),
-                               config.Clustering.n_clusters,
-                               config.Clustering.n_wind_speed_bins)),
-        'locations': locations
+        'frequency': frequency,
+        'locations': locations,
+        'wind_speed_bin_limits': wind_speed_bin_limits,
+        'n_samples_per_loc': int(n_samples_per_loc),
         }
-    for i, loc in enumerate(locations):
-        print(i, loc, n_samples_per_loc)
-        distribution_data['frequency'][i, :, :], \
-            wind_speed_bin_limits = \
-            export_single_loc_frequency_distribution(
-                config,
-                labels[n_samples_per_loc*i: n_samples_per_loc*(i+1)],
-                backscaling[n_samples_per_loc*i:
-                            n_samples_per_loc*(i+1)],
-                n_samples_per_loc,
-                write_output=False)
-    distribution_data['wind_speed_bin_limits'] = wind_speed_bin_limits
+    if pipeline_hash is not None:
+        distribution_data['pipeline_hash'] = pipeline_hash
 
     with open(config.IO.freq_distr, 'wb') as f:
         pickle.dump(distribution_data, f, protocol=2)
-    # TODO ??? different np.zeros for single location? inconsistent
-    # else:
-    #     freq_2d, v_bin_limits = \
-    #         export_single_loc_frequency_distribution(config,
-    #                                                  labels,
-    #                                                  backscaling,
-    #                                                  n_samples,
-    #                                                  backscaling)
     return distribution_data
 
 
@@ -93,8 +206,7 @@ def export_frequency_distr(config):
     for i in range(config.Clustering.n_clusters):
         scale_factors.append(profiles_file['scale factor{} [-]'
                                            .format(i+1)][0])
-    with open(config.IO.labels, 'rb') as f:
-        labels_file = pickle.load(f)
+    labels_file = read_labels_file(config.IO.labels)
     labels = labels_file['labels [-]']
     n_samples = len(labels)
     backscaling = labels_file['backscaling [m/s]']
@@ -1,16 +1,26 @@
 import pandas as pd
 import numpy as np
 import copy
+import os
 import pickle
 import sys
+import functools
 
 import matplotlib.pyplot as plt
 
-from .read_requested_data import get_wind_data
+from .read_requested_data import get_wind_data, get_wind_data_blocks, \
+    location_blocks, get_float_dtype
 from .preprocess_data import preprocess_data
+from .preprocessed_data_cache import PreprocessedDataCache
+from .labels_store import LabelsStore, read_labels_file, \
+    read_slice_meta, merge_labels_slices, extend_labels, labels_exist, \
+    write_labels_pickle
+from .shared_prediction import shared_memory_prediction, pipeline_hash
+from .prediction_kernel import get_predict_fun, labels_dtype
 from .wind_profile_clustering import cluster_normalized_wind_profiles_pca, \
+    cluster_normalized_wind_profiles_pca_incremental, \
     export_wind_profile_shapes, \
-    predict_cluster, single_location_prediction, \
+    predict_cluster, location_block_prediction, data_prediction, \
     plot_original_vs_cluster_wind_profile_shapes, \
     projection_plot_of_clusters, visualise_patterns
 from .cluster_frequency import \
@@ -43,6 +53,10 @@ class Clustering:
     def get_wind_data(self):
         return get_wind_data(self.config)
 
+    def get_wind_data_blocks(self, n_locs_per_block=None):
+        return get_wind_data_blocks(self.config,
+                                    n_locs_per_block=n_locs_per_block)
+
     def preprocess_data(self,
                         data,
                         config=None,
@@ -65,33 +79,114 @@ class Clustering:
             return_copy=return_copy,
             normalize=normalize)
 
+    def get_preprocessed_data(self,
+                              remove_low_wind_samples=True,
+                              normalize=None):
+        """Read and preprocess the wind data of the Data locations.
+
+        With General: cache_preprocessed_data the preprocessed data is
+        cached on disk, keyed by the Data and preprocessing settings, and
+        reused e.g. for different clustering settings.
+
+        Returns:
+            dict: Preprocessed data as returned by preprocess_data.
+
+        """
+        if normalize is None:
+            try:
+                normalize = self.config.Clustering.do_normalize_data
+            except AttributeError:
+                normalize = True
+        if getattr(self.config.General, 'cache_preprocessed_data', False):
+            cache = PreprocessedDataCache.from_config(
+                self.config,
+                remove_low_wind_samples=remove_low_wind_samples,
+                normalize=normalize)
+            if cache.exists():
+                return cache.read()
+        else:
+            cache = None
+        data = get_wind_data(self.config)
+        processed_data = self.preprocess_data(
+            data,
+            remove_low_wind_samples=remove_low_wind_samples,
+            normalize=normalize)
+        if cache is not None:
+            cache.write(processed_data)
+        return processed_data
+
+    def training_data_blocks(self, remove_low_wind_samples=True):
+        """Yield the preprocessed training data location block wise."""
+        for _, data in get_wind_data_blocks(self.config):
+            processed_data = self.preprocess_data(
+                data,
+                remove_low_wind_samples=remove_low_wind_samples,
+                return_copy=False)
+            yield processed_data['training_data']
+
     def train_profiles(self,
                        data=None,
                        training_remove_low_wind_samples=True,
                        return_pipeline=False,
-                       return_data=False):
+                       return_data=False,
+                       clustering_result=None):
         # Set Data to read to training data
         config = copy.deepcopy(self.config)
         self.config.update(
             {'Data': self.config.Clustering.training.__dict__})
-        if data is None:
-            data = get_wind_data(self.config)
-        print('Initial data shape: ', data['wind_speed_north'].shape)
-        processed_data = self.preprocess_data(
-            data,
-            remove_low_wind_samples=training_remove_low_wind_samples)
-        print('Training data shape: ', processed_data['training_data'].shape)
-        res = cluster_normalized_wind_profiles_pca(
-            processed_data['training_data'],
-            self.config.Clustering.n_clusters,
-            n_pcs=self.config.Clustering.n_pcs)
+        # Read preprocessed data from cache, if enabled
+        use_cache = data is None and getattr(
+            self.config.General, 'cache_preprocessed_data', False)
+        # Out-of-core training, stream training data if not given
+        incremental = getattr(self.config.Clustering,
+                              'incremental_training', False)
+        stream = incremental and data is None and not use_cache
+        if stream:
+            processed_data = None
+            training_data = functools.partial(
+                self.training_data_blocks,
+                remove_low_wind_samples=training_remove_low_wind_samples)
+            altitude = self.config.Data.height_range
+        else:
+            if use_cache:
+                processed_data = self.get_preprocessed_data(
+                    remove_low_wind_samples=training_remove_low_wind_samples)
+            else:
+                if data is None:
+                    data = get_wind_data(self.config)
+                print('Initial data shape: ',
+                      data['wind_speed_north'].shape)
+                processed_data = self.preprocess_data(
+                    data,
+                    remove_low_wind_samples=training_remove_low_wind_samples)
+            training_data = processed_data['training_data']
+            print('Training data shape: ', training_data.shape)
+            altitude = processed_data['altitude']
+        if clustering_result is not None:
+            # Clustering already fitted, e.g. by cluster_count_sweep
+            res = clustering_result
+        elif incremental:
+            res = cluster_normalized_wind_profiles_pca_incremental(
+                training_data,
+                self.config.Clustering.n_clusters,
+                n_pcs=self.config.Clustering.n_pcs,
+                block_size=getattr(self.config.Clustering,
+                                   'incremental_block_size', 50000),
+                compare_full_batch=getattr(
+                    self.config.Clustering,
+                    'incremental_compare_full_batch', False))
+        else:
+            res = cluster_normalized_wind_profiles_pca(
+                training_data,
+                self.config.Clustering.n_clusters,
+                n_pcs=self.config.Clustering.n_pcs)
         prl, prp = res['clusters_feature']['parallel'], \
             res['clusters_feature']['perpendicular']
 
         # Free up some memory
-        del processed_data
+        del processed_data, training_data
         profiles, scale_factors = export_wind_profile_shapes(
-            data['altitude'],
+            altitude,
             prl, prp,
             self.config.IO.profiles,
             ref_height=self.config.General.ref_height)
@@ -105,19 +200,30 @@ class Clustering:
             pickle.dump(pca_pipeline, open(self.config.IO.pca_pipeline, 'wb'))
         # setattr(self, 'pipeline', pipeline)
         # setattr(self, 'cluster_mapping', res['cluster_mapping'])
-        training_data_full = self.preprocess_data(
-            data,
-            remove_low_wind_samples=False,
-            return_copy=False)
-        print('Testing data shape: ',
-              training_data_full['training_data'].shape)
-        print('Data shape: ',
-              data['training_data'].shape)
-        # TODO make wirting output optional?
-        self.predict_labels(data=training_data_full,
-                            pipeline=pipeline,
-                            cluster_mapping=res['cluster_mapping'],
-                            scale_factors=scale_factors)
+        if stream:
+            # Predict labels of the training locations block wise
+            self.predict_labels(pipeline=pipeline,
+                                cluster_mapping=res['cluster_mapping'],
+                                scale_factors=scale_factors)
+        else:
+            if use_cache:
+                training_data_full = self.get_preprocessed_data(
+                    remove_low_wind_samples=False)
+                data = training_data_full
+            else:
+                training_data_full = self.preprocess_data(
+                    data,
+                    remove_low_wind_samples=False,
+                    return_copy=False)
+            print('Testing data shape: ',
+                  training_data_full['training_data'].shape)
+            print('Data shape: ',
+                  data['training_data'].shape)
+            # TODO make wirting output optional?
+            self.predict_labels(data=training_data_full,
+                                pipeline=pipeline,
+                                cluster_mapping=res['cluster_mapping'],
+                                scale_factors=scale_factors)
         setattr(self, 'config', config)
         if return_pipeline and return_data:
             return profiles, pipeline, res['cluster_mapping'], data
@@ -155,7 +261,9 @@ class Clustering:
             normalize = self.config.Clustering.do_normalize_data
         except AttributeError:
             normalize = True
+        p_hash = pipeline_hash(pipeline, cluster_mapping)
 
+        backscaling = None
         if data is not None:
             locations = data['locations']
             n_locs = len(locations)
@@ -174,7 +282,7 @@ class Clustering:
             res_labels, frequency_clusters = predict_cluster(
                 data['training_data'],
                 self.config.Clustering.n_clusters,
-                pipeline.predict,
+                get_predict_fun(self.config, pipeline),
                 cluster_mapping)
             res_scale = data['normalisation_value']
         else:
@@ -189,63 +297,49 @@ class Clustering:
                 self.config,
                 locs=[locations[0]])['n_samples_per_loc']
 
-            res_labels = np.zeros(len(locations)*n_samples_per_loc)
-            res_scale = np.zeros(len(locations)*n_samples_per_loc)
-
-            if self.config.Processing.parallel:
-                # Unset parallel processing: reading input in single process
-                # cannot start new processes for reading input in parallel
-                setattr(self.config.Processing, 'parallel', False)
-
-                # TODO no import here
-                # TODO check if parallel ->
-                from multiprocessing import get_context
-                from tqdm import tqdm
-                import functools
-                funct = functools.partial(
-                    single_location_prediction,
-                    self.config,
-                    pipeline,
-                    cluster_mapping,
-                    remove_low_wind_samples=remove_low_wind_samples,
-                    normalize=normalize)
-                if self.config.Processing.progress_out == 'stdout':
-                    file = sys.stdout
+            previous = None
+            if getattr(self.config.Clustering, 'incremental_prediction',
+                       False):
+                previous = self.read_previous_labels(p_hash,
+                                                     n_samples_per_loc)
+            if previous is not None:
+                # Only predict locations without labels
+                previous_locations = set(tuple(loc) for loc
+                                         in previous['locations'])
+                new_locations = [loc for loc in locations
+                                 if tuple(loc) not in previous_locations]
+                print('Incremental prediction: predict {} of {} locations'
+                      .format(len(new_locations), len(locations)))
+                if len(new_locations) > 0:
+                    res_labels, res_scale = self.predict_location_labels(
+                        new_locations,
+                        n_samples_per_loc,
+                        pipeline,
+                        cluster_mapping,
+                        remove_low_wind_samples=remove_low_wind_samples,
+                        normalize=normalize)
+                    new_backscaling = self.get_backscaling(
+                        res_labels, res_scale, scale_factors=scale_factors)
                 else:
-                    file = sys.stderr
-                # Start multiprocessing Pool
-                # use spawn instead of fork:
-                # pipeline can be used by child processes
-                # otherwise same key/lock on pipeline object
-                # - leading to infinite loop
-                with get_context("spawn").Pool(
-                        self.config.Processing.n_cores) as p:
-                    results = list(tqdm(p.imap(funct, locations),
-                                        total=len(locations), file=file))
-                    # TODO is this more RAM intensive?
-                    for i, val in enumerate(results):
-                        j = i*n_samples_per_loc
-                        res_labels[j:(j+n_samples_per_loc)] = val[0]
-                        res_scale[j:(j+n_samples_per_loc)] = val[1]
-                setattr(self.config.Processing, 'parallel', True)
+                    res_labels = np.zeros(0, dtype=labels_dtype)
+                    new_backscaling = np.zeros(0)
+                res_labels, backscaling = extend_labels(
+                    previous, locations, new_locations,
+                    res_labels, new_backscaling)
+                del previous
             else:
-                import functools
-                funct = functools.partial(
-                    single_location_prediction,
-                    self.config,
+                res_labels, res_scale = self.predict_location_labels(
+                    locations,
+                    n_samples_per_loc,
                     pipeline,
                     cluster_mapping,
                     remove_low_wind_samples=remove_low_wind_samples,
                     normalize=normalize)
-                # TODO add progress bar
-                for i, loc in enumerate(locations):
-                    j = i*n_samples_per_loc
-                    res_labels[j:(j+n_samples_per_loc)], \
-                        res_scale[j:(j+n_samples_per_loc)] = funct(loc)
 
-        backscaling = self.get_backscaling(res_labels,
-                                           res_scale,
-                                           scale_factors=scale_factors)
+        if backscaling is None:
+            backscaling = self.get_backscaling(res_labels,
+                                               res_scale,
+                                               scale_factors=scale_factors)
         # Write cluster labels to file
         cluster_info_dict = {
             'n clusters': self.config.Clustering.n_clusters,
@@ -257,6 +351,7 @@ class Clustering:
             'training_data_info': self.config.Clustering.training.data_info,
             'locations': locations,
             'n_samples_per_loc': n_samples_per_loc,
+            'pipeline_hash': p_hash,
             }
         # TODO include locs_slicing in config
         if locs_slice is None:
@@ -266,13 +361,116 @@ class Clustering:
                 '.pickle',
                 '{}_n_{}.pickle'.format(locs_slice[0], locs_slice[1]))
         if write_output:
-            pickle.dump(cluster_info_dict,
-                        open(file_name, 'wb'))
+            if getattr(self.config.General, 'write_labels_store', False):
+                LabelsStore.from_labels_file(file_name).write(
+                    cluster_info_dict)
+            else:
+                write_labels_pickle(cluster_info_dict, file_name)
 
         return (cluster_info_dict['labels [-]'],
                 cluster_info_dict['backscaling [m/s]'],
                 cluster_info_dict['n_samples_per_loc'])
 
+    def predict_location_labels(self,
+                                locations,
+                                n_samples_per_loc,
+                                pipeline,
+                                cluster_mapping,
+                                remove_low_wind_samples=False,
+                                normalize=True):
+        """Predict labels of the locations, reading the wind data in blocks
+        of locations (Processing: n_locs_per_block). In parallel, each
+        worker reads and predicts one block at a time, peak memory
+        therefore scales with the number of cores times the block size.
+
+        Returns:
+            tuple of ndarray: Labels and normalisation value of each
+                sample, ordered by location.
+
+        """
+        res_labels = np.zeros(len(locations)*n_samples_per_loc,
+                              dtype=labels_dtype)
+        res_scale = np.zeros(len(locations)*n_samples_per_loc,
+                             dtype=get_float_dtype(self.config))
+
+        if self.config.Processing.parallel and getattr(
+                self.config.Processing, 'shared_memory_prediction',
+                False):
+            # Pipeline parameters and results in shared memory,
+            # workers read and predict blocks of locations
+            setattr(self.config.Processing, 'parallel', False)
+            if self.config.Processing.progress_out == 'stdout':
+                file = sys.stdout
+            else:
+                file = sys.stderr
+            try:
+                res_labels, res_scale = shared_memory_prediction(
+                    self.config,
+                    pipeline,
+                    cluster_mapping,
+                    locations,
+                    n_samples_per_loc,
+                    dtype=get_float_dtype(self.config),
+                    remove_low_wind_samples=remove_low_wind_samples,
+                    normalize=normalize,
+                    file=file)
+            finally:
+                setattr(self.config.Processing, 'parallel', True)
+        elif self.config.Processing.parallel:
+            # Unset parallel processing: reading input in single process
+            # cannot start new processes for reading input in parallel
+            setattr(self.config.Processing, 'parallel', False)
+
+            # TODO no import here
+            # TODO check if parallel ->
+            from multiprocessing import get_context
+            from tqdm import tqdm
+            import functools
+            funct = functools.partial(
+                location_block_prediction,
+                self.config,
+                pipeline,
+                cluster_mapping,
+                remove_low_wind_samples=remove_low_wind_samples,
+                normalize=normalize)
+            if self.config.Processing.progress_out == 'stdout':
+                file = sys.stdout
+            else:
+                file = sys.stderr
+            # Start multiprocessing Pool
+            # use spawn instead of fork:
+            # pipeline can be used by child processes
+            # otherwise same key/lock on pipeline object
+            # - leading to infinite loop
+            blocks = list(location_blocks(self.config, locs=locations))
+            with get_context("spawn").Pool(
+                    self.config.Processing.n_cores) as p:
+                # Fill in the results of each block as they arrive
+                for i, labels, scale in tqdm(p.imap(funct, blocks),
+                                             total=len(blocks), file=file):
+                    j = i*n_samples_per_loc
+                    res_labels[j:(j+len(labels))] = labels
+                    res_scale[j:(j+len(labels))] = scale
+            setattr(self.config.Processing, 'parallel', True)
+        else:
+            # Read and predict blocks of locations,
+            # only one block of wind data is kept in memory
+            # TODO add progress bar
+            for i, data in get_wind_data_blocks(self.config,
+                                                locs=locations):
+                j = i*n_samples_per_loc
+                n_samples = len(data['locations'])*n_samples_per_loc
+                res_labels[j:(j+n_samples)], \
+                    res_scale[j:(j+n_samples)] = data_prediction(
+                        self.config,
+                        pipeline,
+                        cluster_mapping,
+                        data,
+                        remove_low_wind_samples=remove_low_wind_samples,
+                        normalize=normalize)
+                del data
+        return res_labels, res_scale
+
     def get_backscaling(self, labels, norm, scale_factors=[]):
         if scale_factors == []:
             profiles = self.read_profiles()
@@ -286,6 +484,95 @@ class Clustering:
             backscaling[labels == i] = norm[labels == i] / sf
         return backscaling
 
+    def check_float32_accuracy(self, data=None,
+                               remove_low_wind_samples=True):
+        """Compare single precision processing to the double precision path.
+
+        The same wind data is preprocessed, clustered and labelled once in
+        float64 and once in float32 (General: use_float32). Reported are the
+        maximal absolute deviation of the normalised training data, the
+        maximal relative deviation of the normalisation (backscaling) value,
+        the relative difference in the KMeans inertia, the maximal deviation
+        of the cluster profile shapes and the fraction of samples assigned
+        to the same cluster - once using the respective pipelines and once
+        predicting the float32 data with the float64 pipeline.
+
+        Args:
+            data (dict, optional): Wind data as returned by get_wind_data,
+                read for the Data locations if not given.
+            remove_low_wind_samples (bool, optional): Remove low wind speed
+                samples for the clustering training, as in train_profiles.
+
+        Returns:
+            dict: Deviations of the float32 w.r.t. the float64 results.
+
+        """
+        config = copy.deepcopy(self.config)
+        # Compare in-memory processing only, read the reference data in
+        # double precision - also if single precision is configured
+        config.update({'General': {'use_memmap': False,
+                                   'use_float32': False}}, interpret=False)
+        if data is None:
+            data = get_wind_data(config)
+
+        res = {}
+        for dtype in ['float64', 'float32']:
+            data_dtype = copy.copy(data)
+            for key in ['wind_speed_east', 'wind_speed_north']:
+                data_dtype[key] = np.asarray(data[key]).astype(dtype)
+            processed_data = preprocess_data(
+                config, copy.copy(data_dtype),
+                remove_low_wind_samples=remove_low_wind_samples)
+            clustering = cluster_normalized_wind_profiles_pca(
+                processed_data['training_data'],
+                config.Clustering.n_clusters,
+                n_pcs=config.Clustering.n_pcs)
+            processed_data_full = preprocess_data(
+                config, copy.copy(data_dtype),
+                remove_low_wind_samples=False)
+            labels, _ = predict_cluster(
+                processed_data_full['training_data'],
+                config.Clustering.n_clusters,
+                clustering['data_processing_pipeline'].predict,
+                clustering['cluster_mapping'])
+            res[dtype] = {
+                'training_data': processed_data_full['training_data'],
+                'normalisation_value':
+                    processed_data_full['normalisation_value'],
+                'clustering': clustering,
+                'labels': labels,
+                }
+        ref, test = res['float64'], res['float32']
+        labels_ref_pipeline, _ = predict_cluster(
+            test['training_data'],
+            config.Clustering.n_clusters,
+            ref['clustering']['data_processing_pipeline'].predict,
+            ref['clustering']['cluster_mapping'])
+        ref_features = np.concatenate(
+            (ref['clustering']['clusters_feature']['parallel'],
+             ref['clustering']['clusters_feature']['perpendicular']), 1)
+        test_features = np.concatenate(
+            (test['clustering']['clusters_feature']['parallel'],
+             test['clustering']['clusters_feature']['perpendicular']), 1)
+        accuracy = {
+            'max_abs_diff_training_data': np.max(np.abs(
+                test['training_data'] - ref['training_data'])),
+            'max_rel_diff_normalisation_value': np.max(np.abs(
+                test['normalisation_value'] - ref['normalisation_value'])
+                / ref['normalisation_value']),
+            'rel_diff_fit_inertia': (test['clustering']['fit_inertia']
+                                     / ref['clustering']['fit_inertia'] - 1),
+            'max_abs_diff_cluster_features': np.max(np.abs(
+                test_features - ref_features)),
+            'label_agreement': np.mean(test['labels'] == ref['labels']),
+            'label_agreement_float64_pipeline': np.mean(
+                labels_ref_pipeline == ref['labels']),
+            }
+        print('Single vs double precision processing:')
+        for key, val in accuracy.items():
+            print('    {}: {:.3e}'.format(key, val))
+        return accuracy
+
     def get_frequency(self,
                       labels=None,
                       backscaling=None,
@@ -296,6 +583,13 @@ class Clustering:
             labels, backscaling, n_samples_per_loc, _ = \
                 self.read_labels(data_type='data')
 
+        previous, p_hash = None, None
+        if getattr(self.config.Clustering, 'incremental_prediction', False):
+            p_hash = read_slice_meta(self.config.IO.labels).get(
+                'pipeline_hash')
+            previous = self.read_previous_frequency(p_hash,
+                                                    n_samples_per_loc)
+
         print('Get Frequency. Evaluate labels...')
         freq_distr = location_wise_frequency_distribution(
             self.config,
@@ -303,7 +597,9 @@ class Clustering:
             labels,
             len(labels),
             n_samples_per_loc,
-            backscaling)
+            backscaling,
+            previous=previous,
+            pipeline_hash=p_hash)
         # Frequency and corresponding wind speed bin limits
         return freq_distr['frequency'], freq_distr['wind_speed_bin_limits']
 
@@ -740,7 +1036,8 @@ class Clustering:
     def read_labels(self, data_type='Data',
                     file_name=None,
                     return_file=False,
-                    locs_slice=None):
+                    locs_slice=None,
+                    i_loc=None):
         if file_name is None:
             if data_type in ['Data', 'data']:
                 file_name = self.config.IO.labels
@@ -752,15 +1049,29 @@ class Clustering:
                 '{}_n_{}.pickle'.format(locs_slice[0], locs_slice[1]))
             print('Reading labels of slice of locations:'
                   ' {} in {} locs slices'.format(locs_slice[0], locs_slice[1]))
+        store = LabelsStore.from_labels_file(file_name)
+        if i_loc is not None and store.is_current(file_name):
+            # Only read the labels of the requested location
+            labels, backscaling = store.read_location(i_loc)
+            return (labels, backscaling, store.meta['n_samples_per_loc'],
+                    store.meta['cluster_mapping'])
         try:
-            with open(file_name, 'rb') as f:
-                labels_file = pickle.load(f)
+            labels_file = read_labels_file(file_name)
         except FileNotFoundError as e:
             print('Error: Trying to read labels but file not found'
                   ' - run predict_labels first.')
             raise e
         if return_file:
             return labels_file
+        elif i_loc is not None:
+            n_samples_per_loc = labels_file['n_samples_per_loc']
+            loc_samples = slice(i_loc*n_samples_per_loc,
+                                (i_loc+1)*n_samples_per_loc)
+            return (
+                labels_file['labels [-]'][loc_samples],
+                labels_file['backscaling [m/s]'][loc_samples],
+                n_samples_per_loc,
+                labels_file['cluster_mapping'])
         else:
             return (
                 labels_file['labels [-]'],
@@ -768,25 +1079,82 @@ class Clustering:
                 labels_file['n_samples_per_loc'],
                 labels_file['cluster_mapping'])
 
+    def read_previous_labels(self, p_hash, n_samples_per_loc):
+        """Labels output to extend in incremental prediction.
+
+        Args:
+            p_hash (str): Hash of the prediction pipeline.
+            n_samples_per_loc (int): Number of samples per location.
+
+        Returns:
+            dict or None: Labels output of
+                Clustering.incremental_labels_file (IO.labels if not set),
+                None if not found or not predicted with the same pipeline.
+
+        """
+        file_name = getattr(self.config.Clustering,
+                            'incremental_labels_file', None)
+        if file_name is None:
+            file_name = self.config.IO.labels
+        if not labels_exist(file_name):
+            print('Incremental prediction: no labels at {}, predicting all'
+                  ' locations.'.format(file_name))
+            return None
+        labels_file = read_labels_file(file_name)
+        if labels_file.get('pipeline_hash') != p_hash:
+            print('Incremental prediction: labels at {} were predicted with'
+                  ' a different pipeline, predicting all locations.'
+                  .format(file_name))
+            return None
+        if labels_file['n_samples_per_loc'] != n_samples_per_loc:
+            print('Incremental prediction: labels at {} have {} samples per'
+                  ' location, expected {}, predicting all locations.'
+                  .format(file_name, labels_file['n_samples_per_loc'],
+                          n_samples_per_loc))
+            return None
+        return labels_file
+
+    def read_previous_frequency(self, p_hash, n_samples_per_loc):
+        """Frequency distribution to extend in incremental prediction.
+
+        Args:
+            p_hash (str): Hash of the prediction pipeline.
+            n_samples_per_loc (int): Number of samples per location.
+
+        Returns:
+            dict or None: Frequency distribution of
+                Clustering.incremental_freq_distr_file (IO.freq_distr if not
+                set), None if not found, not of the same pipeline or not of
+                the same number of samples per location.
+
+        """
+        file_name = getattr(self.config.Clustering,
+                            'incremental_freq_distr_file', None)
+        if file_name is None:
+            file_name = self.config.IO.freq_distr
+        if p_hash is None or not os.path.isfile(file_name):
+            return None
+        with open(file_name, 'rb') as f:
+            freq_distr = pickle.load(f)
+        if freq_distr.get('pipeline_hash') != p_hash:
+            return None
+        if freq_distr.get('n_samples_per_loc') != n_samples_per_loc:
+            print('Incremental frequency: distribution at {} has {} samples'
+                  ' per location, expected {}, evaluating all locations.'
+                  .format(file_name, freq_distr.get('n_samples_per_loc'),
+                          n_samples_per_loc))
+            return None
+        return freq_distr
+
     def combine_labels(self, n_i=23, n_max=1000):
-        file_name = self.config.IO.labels.replace(
-            '.pickle',
-            '{{}}_n_{}.pickle'.format(n_max))
-        for i in range(n_i):
-            print('{}/{}'.format(i+1, n_i))
-            res_i = self.read_labels(file_name=file_name.format(i),
-                                     return_file=True)
-            # First label is start for res
-            if i == 0:
-                res = copy.deepcopy(res_i)
-            else:
-                # Append labels to results, append locations
-                for key in ['labels [-]', 'backscaling [m/s]']:
-                    res[key] = np.append(res[key], res_i[key])
-        file_name = self.config.IO.labels
-        pickle.dump(res,
-                    open(file_name, 'wb'), protocol=4)
-        return res
+        # Validate all location slices, then copy each slice into place once
+        return merge_labels_slices(
+            self.config.IO.labels,
+            n_i,
+            n_max,
+            locations=self.config.Data.locations,
+            write_store=getattr(self.config.General, 'write_labels_store',
+                                False))
 
     def read_frequency(self):
         with open(self.config.IO.freq_distr, 'rb') as f:
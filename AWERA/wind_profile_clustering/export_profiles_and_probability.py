@@ -7,11 +7,14 @@ import sys
 import getopt
 
 from .read_requested_data import get_wind_data
+from .labels_store import read_labels_file
 
 from .preprocess_data import preprocess_data
 from .wind_profile_clustering import \
     cluster_normalized_wind_profiles_pca, predict_cluster, \
     single_location_prediction
+from .cluster_frequency import get_wind_speed_bin_limits, \
+    frequency_distribution, location_frequency_distribution
 from ..utils.convenience_utils import write_timing_info
 
 import time
@@ -201,26 +204,11 @@ def export_single_loc_frequency_distribution(config,
                                              backscaling,
                                              n_samples,
                                              write_output=True):
-    cut_wind_speeds = pd.read_csv(
-        config.IO.refined_cut_wind_speeds)
-    freq_2d = np.zeros((config.Clustering.n_clusters,
-                        config.Clustering.n_wind_speed_bins))
-    v_bin_limits = np.zeros((config.Clustering.n_clusters,
-                             config.Clustering.n_wind_speed_bins+1))
-    for i_c in range(config.Clustering.n_clusters):
-        v = np.linspace(cut_wind_speeds['vw_100m_cut_in'][i_c],
-                        cut_wind_speeds['vw_100m_cut_out'][i_c],
-                        config.Clustering.n_wind_speed_bins+1)
-        v_bin_limits[i_c, :] = v
-
-        # procedure consistent with the wind property used for characterizing
-        # the cut-in and cut-out wind speeds, i.e. wind speed at 100m height.
-        for j, (v0, v1) in enumerate(zip(v[:-1], v[1:])):
-            # Denormalised assigned cluster wind speed at 100m per sample
-            samples_in_bin = (labels_full == i_c) & \
-                (backscaling >= v0) & \
-                (backscaling < v1)
-            freq_2d[i_c, j] = np.sum(samples_in_bin) / n_samples * 100.
+    # procedure consistent with the wind property used for characterizing
+    # the cut-in and cut-out wind speeds, i.e. wind speed at 100m height.
+    v_bin_limits = get_wind_speed_bin_limits(config)
+    freq_2d = frequency_distribution(labels_full, backscaling, v_bin_limits,
+                                     n_samples=n_samples)
 
     distribution_data = {'frequency': freq_2d,
                          'wind_speed_bin_limits': v_bin_limits,
@@ -237,35 +225,17 @@ def location_wise_frequency_distribution(config,
                                          locations,
                                          labels, n_samples, n_samples_per_loc,
                                          backscaling):
-    #if len(locations) > 1:
+    # All locations at once, frequency relative to samples per location
+    wind_speed_bin_limits = get_wind_speed_bin_limits(config)
     distribution_data = {
-        'frequency': np.zeros((len(locations),
-                               config.Clustering.n_clusters,
-                               config.Clustering.n_wind_speed_bins)),
-        'locations': locations
+        'frequency': location_frequency_distribution(
+            labels, backscaling, wind_speed_bin_limits, n_samples_per_loc),
+        'locations': locations,
+        'wind_speed_bin_limits': wind_speed_bin_limits,
         }
-    for i, loc in enumerate(locations):
-        distribution_data['frequency'][i, :, :], \
-            wind_speed_bin_limits = \
-            export_single_loc_frequency_distribution(
-                config,
-                labels[n_samples_per_loc*i: n_samples_per_loc*(i+1)],
-                backscaling[n_samples_per_loc*i:
-                            n_samples_per_loc*(i+1)],
-                n_samples_per_loc,
-                write_output=False)
-    distribution_data['wind_speed_bin_limits'] = wind_speed_bin_limits
 
     with open(config.IO.freq_distr, 'wb') as f:
         pickle.dump(distribution_data, f, protocol=2)
-    # TODO ??? different np.zeros for single location? inconsistent
-    # else:
-    #     freq_2d, v_bin_limits = \
-    #         export_single_loc_frequency_distribution(config,
-    #                                                  labels,
-    #                                                  backscaling,
-    #                                                  n_samples,
-    #                                                  backscaling)
 
 
 def export_frequency_distr(config):
@@ -277,8 +247,7 @@ def export_frequency_distr(config):
     for i in range(config.Clustering.n_clusters):
         scale_factors.append(profiles_file['scale factor{} [-]'
                                            .format(i+1)][0])
-    with open(config.IO.labels, 'rb') as f:
-        labels_file = pickle.load(f)
+    labels_file = read_labels_file(config.IO.labels)
     labels = labels_file['labels [-]']
     n_samples = len(labels)
     backscaling = labels_file['backscaling [m/s]']
@@ -0,0 +1,413 @@
+import os
+import pickle
+import numpy as np
+
+# Labels output entries stored as separate arrays
+array_keys = {'labels [-]': 'labels',
+              'backscaling [m/s]': 'backscaling'}
+
+
+def get_labels_store_dir(labels_file):
+    """Store directory of a labels pickle file name, same name w/o suffix."""
+    return os.path.join(os.path.splitext(labels_file)[0], '')
+
+
+class LabelsStore:
+    """Columnar on-disk store of the cluster labels output.
+
+    Labels and backscaling are stored as separate `.npy` files in
+    `<store_dir>/`, which are memory mapped on reading, such that single
+    locations or clusters are read without loading the full output. The
+    remaining entries of the labels output are stored in `meta.pickle`,
+    together with the per-location sample offsets and the per-cluster
+    offsets into `cluster_sample_ids.npy`, the sample ids sorted by
+    cluster. The store is complete once the metadata file is written.
+    A labels pickle written after the store supersedes it, see is_current.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self._meta = None
+
+    @classmethod
+    def from_labels_file(cls, labels_file):
+        return cls(get_labels_store_dir(labels_file))
+
+    @property
+    def meta_file(self):
+        return os.path.join(self.store_dir, 'meta.pickle')
+
+    def array_file(self, key):
+        return os.path.join(self.store_dir, '{}.npy'.format(key))
+
+    def exists(self):
+        return os.path.isfile(self.meta_file)
+
+    def is_current(self, labels_file):
+        """Store exists and is not older than the labels pickle."""
+        if not self.exists():
+            return False
+        if not os.path.isfile(labels_file):
+            return True
+        return (os.path.getmtime(self.meta_file)
+                >= os.path.getmtime(labels_file))
+
+    def remove(self):
+        """Remove the store, the metadata first - invalidating it."""
+        for file_name in [self.meta_file] + [
+                self.array_file(key) for key in
+                ['labels', 'backscaling', 'cluster_sample_ids']]:
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                pass
+        self._meta = None
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            with open(self.meta_file, 'rb') as f:
+                self._meta = pickle.load(f)
+        return self._meta
+
+    def _write_array(self, key, val):
+        array_file = self.array_file(key)
+        tmp_file = array_file.replace('.npy',
+                                      '_{}.tmp.npy'.format(os.getpid()))
+        np.save(tmp_file, val)
+        os.replace(tmp_file, array_file)
+
+    def write(self, labels_output):
+        """Write the labels output as returned by read_labels(return_file).
+
+        Args:
+            labels_output (dict): Labels output, as written to the
+                labels pickle by Clustering.predict_labels.
+
+        """
+        if not os.path.isdir(self.store_dir):
+            os.makedirs(self.store_dir, exist_ok=True)
+        labels = np.asarray(labels_output['labels [-]'])
+        self._write_array('labels', labels)
+        self._write_array('backscaling',
+                          np.asarray(labels_output['backscaling [m/s]']))
+        self.write_meta(labels,
+                        {key: val for key, val in labels_output.items()
+                         if key not in array_keys})
+
+    def write_meta(self, labels, meta):
+        """Write cluster index and metadata, completing the store.
+
+        Args:
+            labels (array_like): Stored labels.
+            meta (dict): Labels output entries except labels and
+                backscaling.
+
+        """
+        # Index of the samples of each cluster
+        n_clusters = meta['n clusters']
+        self._write_array('cluster_sample_ids',
+                          np.argsort(labels, kind='stable'))
+        cluster_offsets = np.zeros(n_clusters + 1, dtype=np.int64)
+        cluster_offsets[1:] = np.cumsum(np.bincount(labels,
+                                                    minlength=n_clusters))
+        meta = dict(meta)
+        meta['location_offsets'] = \
+            np.arange(len(meta['locations']) + 1, dtype=np.int64) \
+            * meta['n_samples_per_loc']
+        meta['cluster_offsets'] = cluster_offsets
+        # Metadata is written last - marks the store as complete
+        tmp_file = '{}.{}.tmp'.format(self.meta_file, os.getpid())
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(meta, f)
+        os.replace(tmp_file, self.meta_file)
+        self._meta = meta
+
+    def allocate_array(self, key, shape, dtype):
+        """Writable memory map of a new array, see finalize_array."""
+        if not os.path.isdir(self.store_dir):
+            os.makedirs(self.store_dir, exist_ok=True)
+        tmp_file = self.array_file(key).replace(
+            '.npy', '_{}.tmp.npy'.format(os.getpid()))
+        return np.lib.format.open_memmap(tmp_file, mode='w+',
+                                         dtype=dtype, shape=shape)
+
+    def finalize_array(self, key, array):
+        array.flush()
+        os.replace(array.filename, self.array_file(key))
+
+    def read_array(self, key, mmap=True):
+        return np.load(self.array_file(key),
+                       mmap_mode='r' if mmap else None)
+
+    def read(self, mmap=True):
+        """Read the full labels output, same layout as the labels pickle.
+
+        Args:
+            mmap (bool, optional): Memory map labels and backscaling
+                read-only instead of reading them to memory.
+
+        Returns:
+            dict: Labels output.
+
+        """
+        labels_output = {key: val for key, val in self.meta.items()
+                         if key not in ['location_offsets',
+                                        'cluster_offsets']}
+        for key, array_key in array_keys.items():
+            labels_output[key] = self.read_array(array_key, mmap=mmap)
+        return labels_output
+
+    def location_index(self, loc):
+        """Index of the location (lat, lon) in the stored locations."""
+        locations = [tuple(l) for l in self.meta['locations']]
+        return locations.index(tuple(loc))
+
+    def read_location(self, i_loc):
+        """Labels and backscaling of a single location.
+
+        Args:
+            i_loc (int): Index of the location in the stored locations.
+
+        Returns:
+            tuple of ndarray: Labels and backscaling of the location.
+
+        """
+        start, end = self.meta['location_offsets'][i_loc:i_loc+2]
+        return (np.array(self.read_array('labels')[start:end]),
+                np.array(self.read_array('backscaling')[start:end]))
+
+    def read_cluster(self, i_cluster):
+        """Sample ids and backscaling of all samples of a single cluster.
+
+        Args:
+            i_cluster (int): Cluster label, starting at 0.
+
+        Returns:
+            tuple of ndarray: Sample ids (sorted) and backscaling of the
+                samples assigned to the cluster.
+
+        """
+        start, end = self.meta['cluster_offsets'][i_cluster:i_cluster+2]
+        sample_ids = np.array(self.read_array('cluster_sample_ids')[start:end])
+        return sample_ids, np.array(self.read_array('backscaling')[sample_ids])
+
+
+def get_slice_file_name(labels_file, i_slice, n_per_slice):
+    """File name of the labels of a locs_slice (i_slice, n_per_slice)."""
+    return labels_file.replace(
+        '.pickle', '{}_n_{}.pickle'.format(i_slice, n_per_slice))
+
+
+def labels_exist(labels_file):
+    """Labels output was written, as labels store or pickle."""
+    return (os.path.isfile(labels_file)
+            or LabelsStore.from_labels_file(labels_file).exists())
+
+
+def write_labels_pickle(labels_output, labels_file):
+    """Write the labels output to the labels pickle.
+
+    A labels store of the same file name is removed, it would hold
+    outdated labels.
+    """
+    LabelsStore.from_labels_file(labels_file).remove()
+    with open(labels_file, 'wb') as f:
+        pickle.dump(labels_output, f, protocol=4)
+
+
+def read_slice_meta(file_name):
+    """Labels output entries except labels and backscaling of a slice."""
+    store = LabelsStore.from_labels_file(file_name)
+    if store.is_current(file_name):
+        return {key: val for key, val in store.meta.items()
+                if key not in ['location_offsets', 'cluster_offsets']}
+    with open(file_name, 'rb') as f:
+        labels_output = pickle.load(f)
+    return {key: val for key, val in labels_output.items()
+            if key not in array_keys}
+
+
+def merge_labels_slices(labels_file, n_slices, n_per_slice,
+                        locations=None, write_store=True):
+    """Merge the labels outputs of location slices into one output.
+
+    All slices are validated before merging: every slice has to be
+    present, the slices have to agree in the number of samples per
+    location and the cluster mapping, and no location may appear twice.
+    The merged arrays are preallocated and every slice is copied into
+    place once.
+
+    Args:
+        labels_file (str): Labels file name of the full output, the slice
+            file names are derived from it as in predict_labels.
+        n_slices (int): Number of location slices.
+        n_per_slice (int): Number of locations per slice.
+        locations (list, optional): Expected locations of the merged
+            output, e.g. config.Data.locations.
+        write_store (bool, optional): Write the merged output to a labels
+            store (memory mapped, not held in memory) instead of the
+            labels pickle.
+
+    Raises:
+        FileNotFoundError: If any slice is missing.
+        ValueError: If the slices are inconsistent or locations are
+            duplicated, missing or in a different order than locations.
+
+    Returns:
+        dict: Merged labels output.
+
+    """
+    file_names = [get_slice_file_name(labels_file, i, n_per_slice)
+                  for i in range(n_slices)]
+    missing = [i for i, file_name in enumerate(file_names)
+               if not labels_exist(file_name)]
+    if len(missing) > 0:
+        raise FileNotFoundError('Labels of location slices {} (of {}) not '
+                                'found.'.format(missing, n_slices))
+
+    # Validate slice metadata before merging
+    metas = [read_slice_meta(file_name) for file_name in file_names]
+    n_samples_per_loc = metas[0]['n_samples_per_loc']
+    for i, meta in enumerate(metas):
+        if meta['n_samples_per_loc'] != n_samples_per_loc:
+            raise ValueError('Slice {} has {} samples per location, '
+                             'expected {}.'.format(
+                                 i, meta['n_samples_per_loc'],
+                                 n_samples_per_loc))
+        if not np.array_equal(meta['cluster_mapping'],
+                              metas[0]['cluster_mapping']):
+            raise ValueError('Slice {} has a different cluster mapping.'
+                             .format(i))
+    merged_locations = [(float(lat), float(lon)) for meta in metas
+                        for lat, lon in meta['locations']]
+    if len(set(merged_locations)) != len(merged_locations):
+        seen = set()
+        duplicates = [loc for loc in merged_locations
+                      if loc in seen or seen.add(loc)]
+        raise ValueError('Locations in multiple slices: {}'.format(
+            sorted(set(duplicates))))
+    expected_locations = None if locations is None else \
+        [(float(lat), float(lon)) for lat, lon in locations]
+    if expected_locations is not None and \
+            merged_locations != expected_locations:
+        missing_locs = set(expected_locations) - set(merged_locations)
+        extra_locs = set(merged_locations) - set(expected_locations)
+        if len(missing_locs) == 0 and len(extra_locs) == 0:
+            i = next(i for i, (loc, expected_loc) in enumerate(
+                zip(merged_locations, expected_locations))
+                if loc != expected_loc)
+            raise ValueError('Merged slice locations are ordered differently'
+                             ' than the expected locations: location {} is'
+                             ' {}, expected {}.'.format(
+                                 i, merged_locations[i],
+                                 expected_locations[i]))
+        raise ValueError('Merged slice locations do not match the expected'
+                         ' locations, missing: {}, not expected: {}'.format(
+                             sorted(missing_locs), sorted(extra_locs)))
+
+    n_samples = len(merged_locations)*n_samples_per_loc
+    meta = dict(metas[0])
+    meta['locations'] = [loc for meta_i in metas
+                         for loc in meta_i['locations']]
+    meta['n samples'] = n_samples
+    if write_store:
+        store = LabelsStore.from_labels_file(labels_file)
+    labels, backscaling = None, None
+
+    j = 0
+    for i, file_name in enumerate(file_names):
+        print('{}/{}'.format(i+1, n_slices))
+        res_i = read_labels_file(file_name)
+        n_i = len(res_i['labels [-]'])
+        if n_i != len(metas[i]['locations'])*n_samples_per_loc:
+            raise ValueError('Slice {} holds {} samples, expected {}.'
+                             .format(i, n_i, len(metas[i]['locations'])
+                                     * n_samples_per_loc))
+        if labels is None:
+            # Keep the dtypes of the slices
+            dtypes = {key: np.asarray(res_i[key]).dtype
+                      for key in array_keys}
+            if write_store:
+                labels, backscaling = [
+                    store.allocate_array(array_keys[key], (n_samples, ),
+                                         dtypes[key])
+                    for key in ['labels [-]', 'backscaling [m/s]']]
+            else:
+                labels, backscaling = [
+                    np.empty(n_samples, dtype=dtypes[key])
+                    for key in ['labels [-]', 'backscaling [m/s]']]
+        labels[j:j+n_i] = res_i['labels [-]']
+        backscaling[j:j+n_i] = res_i['backscaling [m/s]']
+        j += n_i
+        del res_i
+
+    if write_store:
+        store.finalize_array('labels', labels)
+        store.finalize_array('backscaling', backscaling)
+        store.write_meta(store.read_array('labels'), meta)
+        return store.read()
+    meta['labels [-]'] = labels
+    meta['backscaling [m/s]'] = backscaling
+    write_labels_pickle(meta, labels_file)
+    return meta
+
+
+def read_labels_file(labels_file, mmap=True):
+    """Read labels output, from the labels store if current, else pickle.
+
+    Returns:
+        dict: Labels output.
+
+    """
+    store = LabelsStore.from_labels_file(labels_file)
+    if store.is_current(labels_file):
+        return store.read(mmap=mmap)
+    with open(labels_file, 'rb') as f:
+        labels_output = pickle.load(f)
+    return labels_output
+
+
+def extend_labels(previous, locations, new_locations, new_labels,
+                  new_backscaling):
+    """Labels of all locations from a previous and a new labels output.
+
+    Args:
+        previous (dict): Labels output holding part of the locations.
+        locations (list): Locations of the extended labels output.
+        new_locations (list): Locations not in previous, in the order of
+            new_labels and new_backscaling.
+        new_labels (array): Labels of the new locations.
+        new_backscaling (array): Backscaling of the new locations.
+
+    Raises:
+        ValueError: If locations are neither in previous nor new.
+
+    Returns:
+        tuple of ndarray: Labels and backscaling of all locations.
+
+    """
+    n_samples_per_loc = previous['n_samples_per_loc']
+    sources = {}
+    for i, loc in enumerate(previous['locations']):
+        sources[tuple(loc)] = (previous['labels [-]'],
+                               previous['backscaling [m/s]'], i)
+    for i, loc in enumerate(new_locations):
+        sources[tuple(loc)] = (new_labels, new_backscaling, i)
+    missing = [loc for loc in locations if tuple(loc) not in sources]
+    if len(missing) > 0:
+        raise ValueError('No labels of locations: {}'.format(missing))
+
+    labels = np.zeros(len(locations)*n_samples_per_loc,
+                      dtype=previous['labels [-]'].dtype)
+    backscaling = np.zeros(
+        len(locations)*n_samples_per_loc,
+        dtype=np.result_type(previous['backscaling [m/s]'], new_backscaling))
+    for i, loc in enumerate(locations):
+        labels_i, backscaling_i, j = sources[tuple(loc)]
+        samples = slice(j*n_samples_per_loc, (j+1)*n_samples_per_loc)
+        labels[i*n_samples_per_loc:(i+1)*n_samples_per_loc] = \
+            labels_i[samples]
+        backscaling[i*n_samples_per_loc:(i+1)*n_samples_per_loc] = \
+            backscaling_i[samples]
+    return labels, backscaling
@@ -4,7 +4,7 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as colors
 
 from ..utils.plotting_utils import match_loc_data_map_data
-import pickle
+from .labels_store import read_labels_file
 import cartopy
 import cartopy.crs as ccrs
 #TODO put in utils/eval...? function necessary for what? -> eval?
@@ -97,8 +97,7 @@ def plot_cluster_freq_maps(config,
 def plot_location_map(config):
     locations = config.Data.locations
     # Prepare the general map plot.
-    with open(config.IO.labels, 'rb') as f:
-        labels_file = pickle.load(f)
+    labels_file = read_labels_file(config.IO.labels)
     labels = labels_file['labels [-]']
     locations = labels_file['locations']
     n_samples_per_loc = labels_file['n_samples_per_loc']
@@ -0,0 +1,125 @@
+"""Nearest cluster center prediction as blocked matrix products.
+
+Same assignment as pipeline.predict of the fitted PCA and clustering
+pipeline: the samples are projected on the principal components and
+assigned to the nearest cluster center. The samples are processed in
+blocks, which bounds the memory of the intermediate arrays, and the
+input validation of sklearn is skipped on every call.
+"""
+import numpy as np
+
+# Integer type of the ordered cluster labels of all prediction paths
+labels_dtype = np.dtype('int32')
+
+
+def pipeline_parameters(pipeline, cluster_mapping=None):
+    """Arrays defining the prediction of the PCA and clustering pipeline.
+
+    Returns:
+        dict: PCA mean, components and optional whitening scale, cluster
+            centers and, if cluster_mapping is given, the map of the
+            cluster model labels to the ordered cluster labels.
+
+    """
+    pca, cluster_model = pipeline.steps[0][1], pipeline.steps[-1][1]
+    params = {
+        'mean': pca.mean_,
+        'components': pca.components_,
+        'centers': cluster_model.cluster_centers_,
+        }
+    if cluster_mapping is not None:
+        params['label_map'] = np.argsort(cluster_mapping).astype(
+            labels_dtype)
+    if getattr(pca, 'whiten', False):
+        params['scale'] = np.sqrt(pca.explained_variance_)
+    return params
+
+
+def kernel_parameters(mean, components, centers, scale=None):
+    """Weights and offset of the squared center distances of the samples.
+
+    The PCA projection and the distances to the centers (without the
+    constant |x|^2 term) are combined into a single affine map:
+    |c|^2 - 2 (x - mean) W c = x (-2 W c) + (|c|^2 + 2 mean W c),
+    with W the (whitened) principal components.
+
+    Returns:
+        tuple of array: Weights (n_features, n_clusters) and offset
+            (n_clusters, ).
+
+    """
+    projection = components.T
+    if scale is not None:
+        projection = projection / scale
+    center_norms = np.sum(centers**2, axis=1)
+    weights = -2*projection @ centers.T
+    offset = center_norms + 2*(mean @ projection) @ centers.T
+    return np.ascontiguousarray(weights), offset
+
+
+def nearest_center_labels(data, weights, offset, block_size=4096):
+    """Index of the nearest cluster center of each sample in PC space.
+
+    Args:
+        data (array): Samples of shape (n_samples, n_features).
+        weights (array): Weights from kernel_parameters.
+        offset (array): Offset from kernel_parameters.
+        block_size (int, optional): Number of samples assigned at once.
+
+    Returns:
+        array: Cluster model label of each sample.
+
+    """
+    n_samples = len(data)
+    labels = np.empty(n_samples, dtype=np.intp)
+    for start in range(0, n_samples, block_size):
+        end = min(start + block_size, n_samples)
+        distances = data[start:end] @ weights
+        distances += offset
+        labels[start:end] = np.argmin(distances, axis=1)
+    return labels
+
+
+class NearestCenterPredictor:
+    """Blocked prediction kernel of a fitted PCA and clustering pipeline.
+
+    predict returns the labels of the cluster model, same as
+    pipeline.predict, and can be passed as predict_fun to predict_cluster.
+    """
+
+    def __init__(self, mean, components, centers, scale=None,
+                 block_size=4096):
+        self.weights, self.offset = kernel_parameters(
+            mean, components, centers, scale=scale)
+        self.block_size = block_size
+
+    @classmethod
+    def from_pipeline(cls, pipeline, block_size=4096):
+        """Kernel of the pipeline, ValueError if not PCA and clustering."""
+        steps = [step for _, step in pipeline.steps]
+        if len(steps) != 2 \
+                or not hasattr(steps[0], 'components_') \
+                or not hasattr(steps[-1], 'cluster_centers_'):
+            raise ValueError('Prediction kernel requires a fitted PCA and '
+                             'clustering pipeline.')
+        params = pipeline_parameters(pipeline)
+        return cls(params['mean'], params['components'], params['centers'],
+                   scale=params.get('scale'), block_size=block_size)
+
+    def predict(self, data):
+        return nearest_center_labels(data, self.weights, self.offset,
+                                     block_size=self.block_size)
+
+
+def get_predict_fun(config, pipeline):
+    """Prediction function of the pipeline, the kernel if enabled."""
+    if not getattr(config.Processing, 'use_prediction_kernel', True):
+        return pipeline.predict
+    try:
+        predictor = NearestCenterPredictor.from_pipeline(
+            pipeline,
+            block_size=getattr(config.Processing, 'prediction_block_size',
+                               4096))
+    except ValueError:
+        return pipeline.predict
+    return predictor.predict
@@ -1,105 +1,128 @@
+import os
+import atexit
+import shutil
+import itertools
 import numpy as np
 from copy import copy
 
 from .read_requested_data import get_wind_data
 
 
-def express_profiles_wrt_ref_vector(data, ref_vector_height,
-                                    use_memmap=False):
-    # CCW w.r.t. East
-    if use_memmap:
-        wind_direction = np.memmap('tmp/wind_direction.memmap',
-                                   dtype='float64', mode='w+',
-                                   shape=data['wind_speed_north'].shape)
-        wind_direction[:] = np.arctan2(data['wind_speed_north'],
-                                       data['wind_speed_east'])
-    else:
-        wind_direction = np.arctan2(data['wind_speed_north'],
-                                    data['wind_speed_east'])
+def get_interpolation_weights(x, xp):
+    """Indices and weights of the linear interpolation at x, as np.interp.
 
-    # TODO: check if interpolation can be done without the loop
-    if use_memmap:
-        wind_speed_ref = np.memmap('tmp/wind_speed_ref.memmap',
-                                   dtype='float64', mode='w+',
-                                   shape=(data['n_samples']))
-        ref_dir = np.memmap('tmp/ref_dir.memmap',
-                            dtype='float64', mode='w+',
-                            shape=(data['n_samples']))
-    else:
-        wind_speed_ref = np.zeros(data['n_samples'])
-        ref_dir = np.zeros(data['n_samples'])
-    for i in range(data['n_samples']):
-        wind_speed_ref[i] = np.interp(ref_vector_height, data['altitude'],
-                                      data['wind_speed'][i, :])
-        wind_speed_east_ref = np.interp(ref_vector_height, data['altitude'],
-                                        data['wind_speed_east'][i, :])
-        wind_speed_north_ref = np.interp(ref_vector_height, data['altitude'],
-                                         data['wind_speed_north'][i, :])
-        ref_dir[i] = np.arctan2(wind_speed_north_ref, wind_speed_east_ref)
-    if use_memmap:  # FOXME Maybe do this after the reshapes? what is better for RAM?
-        del wind_speed_ref
-        del ref_dir
-        wind_speed_ref = np.memmap('tmp/wind_speed_ref.memmap',
-                                   dtype='float64', mode='r',
-                                   shape=(data['n_samples']))
-        ref_dir = np.memmap('tmp/ref_dir.memmap',
-                            dtype='float64', mode='r',
-                            shape=(data['n_samples']))
-    data['reference_vector_speed'] = wind_speed_ref
-    data['reference_vector_direction'] = ref_dir
+    Values outside the range of xp are set to the boundary values.
 
-    # Express wind direction with respect to the reference vector.
-    # TODO This will load to RAM - as all reshapes will
-    wind_direction = wind_direction - ref_dir.reshape((-1, 1))
-
-    # Modify values such that angles are -pi < dir < pi.
-    wind_direction = np.where(wind_direction < -np.pi,
-                              wind_direction + 2*np.pi,
-                              wind_direction)
-    wind_direction = np.where(wind_direction > np.pi,
-                              wind_direction - 2*np.pi,
-                              wind_direction)
-    if use_memmap:
-        del wind_direction
-        data['wind_direction'] = np.memmap('tmp/wind_direction.memmap',
-                                           dtype='float64', mode='r',
-                                           shape=data['wind_speed'].shape)
-    else:
-        data['wind_direction'] = wind_direction
+    Returns:
+        tuple of int, int, and float: Lower and upper index in xp and
+            weight of the upper value.
+
+    """
+    xp = np.asarray(xp, dtype=np.float64)
+    i_upper = int(np.clip(np.searchsorted(xp, x, side='right'),
+                          1, len(xp)-1))
+    i_lower = i_upper - 1
+    weight = (x - xp[i_lower])/(xp[i_upper] - xp[i_lower])
+    return i_lower, i_upper, float(np.clip(weight, 0, 1))
+
+
+# Numbering of the memmap files of this process
+memmap_counter = itertools.count()
 
+
+def get_memmap_dir():
+    """Directory of the memmap files of this process, removed on exit."""
+    memmap_dir = os.path.join('tmp', 'memmap_{}'.format(os.getpid()))
+    if not os.path.isdir(memmap_dir):
+        os.makedirs(memmap_dir, exist_ok=True)
+        atexit.register(shutil.rmtree, memmap_dir, ignore_errors=True)
+    return memmap_dir
+
+
+def allocate_array(shape, dtype, name, use_memmap=False):
+    # Write to memmap file in tmp/ or keep in memory
     if use_memmap:
-        wind_speed_parallel = np.memmap('tmp/wind_speed_parallel.memmap',
-                                        dtype='float64', mode='w+',
-                                        shape=data['wind_speed'].shape)
-        wind_speed_parallel[:, :] = \
-            data['wind_speed_east']*np.cos(ref_dir).reshape((-1, 1)) \
-            + data['wind_speed_north']*np.sin(ref_dir).reshape((-1, 1))
-        del wind_speed_parallel
-        data['wind_speed_parallel'] = np.memmap(
-            'tmp/wind_speed_parallel.memmap',
-            dtype='float64', mode='r',
-            shape=data['wind_speed'].shape)
-
-        wind_speed_perpendicular = np.memmap(
-            'tmp/wind_speed_perpendicular.memmap',
-            dtype='float64', mode='w+',
-            shape=data['wind_speed'].shape)
-        wind_speed_perpendicular[:, :] = \
-            -data['wind_speed_east']*np.sin(ref_dir).reshape((-1, 1)) + \
-            data['wind_speed_north']*np.cos(ref_dir).reshape((-1, 1))
-        del wind_speed_perpendicular
-        data['wind_speed_perpendicular'] = np.memmap(
-            'tmp/wind_speed_perpendicular.memmap',
-            dtype='float64', mode='r',
-            shape=data['wind_speed'].shape)
+        # Each array gets its own file in a process specific directory:
+        # concurrent runs and later calls never overwrite arrays in use
+        file_name = os.path.join(get_memmap_dir(), '{}_{}.memmap'.format(
+            name, next(memmap_counter)))
+        array = np.memmap(file_name, dtype=dtype, mode='w+', shape=shape)
+        # The mapping stays valid after removing the file, the disk space
+        # is released with the last reference to the array
+        try:
+            os.remove(file_name)
+        except OSError:
+            pass
+        return array
     else:
-        data['wind_speed_parallel'] = \
-            data['wind_speed_east']*np.cos(ref_dir).reshape((-1, 1)) \
-            + data['wind_speed_north']*np.sin(ref_dir).reshape((-1, 1))
-        data['wind_speed_perpendicular'] = \
-            -data['wind_speed_east']*np.sin(ref_dir).reshape((-1, 1)) + \
-            data['wind_speed_north']*np.cos(ref_dir).reshape((-1, 1))
+        return np.empty(shape, dtype=dtype)
+
 
+def express_profiles_wrt_ref_vector(data, ref_vector_height,
+                                    use_memmap=False, block_size=None):
+    """Express the wind profiles w.r.t. the wind at the reference height.
+
+    The wind profiles are rotated into the components parallel and
+    perpendicular to the wind vector at the reference height, which is
+    interpolated linearly in height. All samples are processed at once
+    or, if block_size is given, in blocks of block_size samples.
+
+    """
+    n_samples, n_heights = data['wind_speed'].shape
+    dtype = data['wind_speed'].dtype
+    if block_size is None:
+        block_size = n_samples
+    block_size = max(int(block_size), 1)
+    i_lower, i_upper, weight = get_interpolation_weights(ref_vector_height,
+                                                         data['altitude'])
+
+    wind_speed_ref = allocate_array(n_samples, dtype, 'wind_speed_ref',
+                                    use_memmap=use_memmap)
+    ref_dir = allocate_array(n_samples, dtype, 'ref_dir',
+                             use_memmap=use_memmap)
+    wind_direction = allocate_array((n_samples, n_heights), dtype,
+                                    'wind_direction', use_memmap=use_memmap)
+    wind_speed_parallel = allocate_array((n_samples, n_heights), dtype,
+                                         'wind_speed_parallel',
+                                         use_memmap=use_memmap)
+    wind_speed_perpendicular = allocate_array((n_samples, n_heights), dtype,
+                                              'wind_speed_perpendicular',
+                                              use_memmap=use_memmap)
+    for start in range(0, n_samples, block_size):
+        block = slice(start, min(start + block_size, n_samples))
+        v = data['wind_speed'][block]
+        v_east = data['wind_speed_east'][block]
+        v_north = data['wind_speed_north'][block]
+
+        wind_speed_ref[block] = (v[:, i_lower]*(1 - weight)
+                                 + v[:, i_upper]*weight)
+        v_east_ref = v_east[:, i_lower]*(1 - weight) \
+            + v_east[:, i_upper]*weight
+        v_north_ref = v_north[:, i_lower]*(1 - weight) \
+            + v_north[:, i_upper]*weight
+        # CCW w.r.t. East
+        ref_dir_block = np.arctan2(v_north_ref, v_east_ref)
+        ref_dir[block] = ref_dir_block
+
+        # Express wind direction with respect to the reference vector.
+        direction = np.arctan2(v_north, v_east) - ref_dir_block[:, np.newaxis]
+        # Modify values such that angles are -pi < dir < pi.
+        direction = np.where(direction < -np.pi, direction + 2*np.pi,
+                             direction)
+        direction = np.where(direction > np.pi, direction - 2*np.pi,
+                             direction)
+        wind_direction[block] = direction
+
+        cos_ref = np.cos(ref_dir_block)[:, np.newaxis]
+        sin_ref = np.sin(ref_dir_block)[:, np.newaxis]
+        wind_speed_parallel[block] = v_east*cos_ref + v_north*sin_ref
+        wind_speed_perpendicular[block] = -v_east*sin_ref + v_north*cos_ref
+
+    data['reference_vector_speed'] = wind_speed_ref
+    data['reference_vector_direction'] = ref_dir
+    data['wind_direction'] = wind_direction
+    data['wind_speed_parallel'] = wind_speed_parallel
+    data['wind_speed_perpendicular'] = wind_speed_perpendicular
     return data
 
 
@@ -113,7 +136,8 @@ def reduce_wind_data(data, mask_keep, return_copy=False,
         n_samples_after_filter))
     skip_filter = ['altitude', 'n_samples', 'n_locs',
                    'years', 'n_samples_per_loc', 'locations',
-                   'datetime_full']
+                   'datetime_full', 'wind_speed_east_full',
+                   'wind_speed_north_full']
     if len(data['locations']) > 1:
         skip_filter += ['datetime']
         # TODO datetime for all locations the same
@@ -122,41 +146,41 @@ def reduce_wind_data(data, mask_keep, return_copy=False,
         # the same datetime for all locations?
     if use_memmap:
         shape = (n_samples_after_filter, data['wind_speed'].shape[1])
+        dtype = data['wind_speed'].dtype
     for k, val in data.items():
         if k in skip_filter:
             continue
         else:
             if use_memmap and k in ['wind_speed_east',
                                     'wind_speed_north']:
-                new_memmap = np.memmap('tmp/{}_copy.memmap'.format(k),
-                                       dtype='float64', mode='w+',
-                                       shape=shape)
-                new_memmap[:, :] = val[mask_keep]
-                del new_memmap
-                data[k] = np.memmap('tmp/{}_copy.memmap'.format(k),
-                                    dtype='float64', mode='r',
-                                    shape=shape)
-
+                data[k] = allocate_array(shape, dtype, '{}_copy'.format(k),
+                                         use_memmap=True)
+                data[k][:, :] = val[mask_keep]
             else:
                 data[k] = val[mask_keep]
     data['n_samples'] = n_samples_after_filter
     return data
 
 
+def mask_ge_mean_wind_speed_value(data, min_mean_wind_speed=5.):
+    # Samples kept by remove_lt_mean_wind_speed_value
+    sample_mean_wind_speed = np.mean(data['wind_speed'], axis=1)
+    return sample_mean_wind_speed > min_mean_wind_speed
+
+
 def remove_lt_mean_wind_speed_value(data, min_mean_wind_speed,
                                     use_memmap=False):
-    sample_mean_wind_speed = np.mean(data['wind_speed'], axis=1)
-    mask_keep = sample_mean_wind_speed > min_mean_wind_speed
+    mask_keep = mask_ge_mean_wind_speed_value(data, min_mean_wind_speed)
     data = reduce_wind_data(data, mask_keep, use_memmap=use_memmap)
 
     return data
 
 
 def normalize_data(data, use_memmap=False):
+    dtype = data['wind_speed'].dtype
     if use_memmap:
-        norm_ref = np.memmap('tmp/norm_ref.memmap',
-                             dtype='float64', mode='w+',
-                             shape=(data['n_samples']))
+        norm_ref = allocate_array(data['n_samples'], dtype, 'norm_ref',
+                                  use_memmap=True)
         norm_ref[:] = np.percentile(data['wind_speed'], 90., axis=1)
         if np.sum(norm_ref == 0) > 0:
             print('Non-Normalised components (zero 90th percentile): ',
@@ -165,24 +189,15 @@ def normalize_data(data, use_memmap=False):
         # TODO need this? .reshape((-1, 1))
         # print('shape_single', data['wind_speed_parallel'].shape)
         # print('shape_norm', norm_ref.shape)
-        training_data = np.memmap('tmp/training_data.memmap',
-                                  dtype='float64', mode='w+',
-                                  shape=(data['n_samples'],
-                                         data['wind_speed'].shape[1]*2))
+        training_data = allocate_array((data['n_samples'],
+                                        data['wind_speed'].shape[1]*2),
+                                       dtype, 'training_data',
+                                       use_memmap=True)
 
         training_data[:, :data['wind_speed'].shape[1]] = \
             data['wind_speed_parallel']/norm_ref[:, np.newaxis]
         training_data[:, data['wind_speed'].shape[1]:] = \
             data['wind_speed_perpendicular']/norm_ref[:, np.newaxis]
-        del training_data
-        del norm_ref
-        training_data = np.memmap('tmp/training_data.memmap',
-                                  dtype='float64', mode='r',
-                                  shape=(data['n_samples'],
-                                         data['wind_speed'].shape[1]*2))
-        norm_ref = np.memmap('tmp/norm_ref.memmap',
-                             dtype='float64', mode='r',
-                             shape=(data['n_samples']))
         data['normalisation_value'] = norm_ref
         data['training_data'] = training_data
         # TODO need this? .reshape(-1)
@@ -200,7 +215,9 @@ def normalize_data(data, use_memmap=False):
 
         data['training_data'] = np.concatenate((training_data_prl,
                                                 training_data_prp), 1)
-        data['training_data'] = data['training_data'].astype(np.double)  # TODO is this astype necessary? no...?
+        # Keep single precision if requested, default double precision
+        data['training_data'] = data['training_data'].astype(dtype,
+                                                             copy=False)
         data['normalisation_value'] = norm_ref.reshape(-1)
         # print('shape_single', data['training_data'].shape)
     return data
@@ -215,27 +232,25 @@ def preprocess_data(config,
         if return_copy:
             # Copy data info that isn't kept in a memmap
             data['datetime_full'] = copy(data['datetime'])
+            # Keep reference to the full wind profiles (memory mapped
+            # from the wind profile store) before filtering
+            for key in ['wind_speed_east', 'wind_speed_north']:
+                if key + '_full' not in data:
+                    data[key + '_full'] = data[key]
         else:
             if 'datetime_full' in data:
                 data['datetime'] = copy(data['datetime_full'])
             data['n_samples'] = \
                 data['n_samples_per_loc']*len(data['locations'])
-            data['wind_speed_east'] = np.memmap(
-                'tmp/v_east.memmap', dtype='float64', mode='r',
-                shape=(data['n_samples'],
-                       len(config.Data.height_range)))
-            data['wind_speed_north'] = np.memmap(
-                'tmp/v_north.memmap', dtype='float64', mode='r',
-                shape=(data['n_samples'],
-                       len(config.Data.height_range)))
-
-        wind_speed = np.memmap('tmp/v.memmap', dtype='float64', mode='w+',
-                               shape=data['wind_speed_east'].shape)
+            for key in ['wind_speed_east', 'wind_speed_north']:
+                if key + '_full' in data:
+                    data[key] = data[key + '_full']
+
+        dtype = data['wind_speed_east'].dtype
+        wind_speed = allocate_array(data['wind_speed_east'].shape, dtype, 'v',
+                                    use_memmap=True)
         wind_speed[:, :] = (data['wind_speed_east']**2
                             + data['wind_speed_north']**2)**.5
-        del wind_speed
-        wind_speed = np.memmap('tmp/v.memmap', dtype='float64', mode='r+',
-                               shape=data['wind_speed_east'].shape)
         data['wind_speed'] = wind_speed
     else:
         data['wind_speed'] = (data['wind_speed_east']**2
@@ -249,7 +264,8 @@ def preprocess_data(config,
     data = express_profiles_wrt_ref_vector(
         data,
         config.General.ref_height,
-        use_memmap=config.General.use_memmap)
+        use_memmap=config.General.use_memmap,
+        block_size=getattr(config.Processing, 'preprocess_block_size', None))
     if normalize:
         data = normalize_data(data, use_memmap=config.General.use_memmap)
     else:
@@ -257,7 +273,8 @@ def preprocess_data(config,
         # Non-normalized data :
         # imitate data structure with norm factor set to 1
         data['normalisation_value'] = np.zeros(
-            (data['wind_speed'].shape[0])) + 1
+            (data['wind_speed'].shape[0]),
+            dtype=data['wind_speed'].dtype) + 1
         data['training_data'] = np.concatenate(
             (data['wind_speed_parallel'],
              data['wind_speed_perpendicular']),
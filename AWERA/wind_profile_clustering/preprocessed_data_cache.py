@@ -0,0 +1,126 @@
+import os
+import pickle
+import hashlib
+import numpy as np
+
+from .wind_profile_store import get_store_key
+from .read_requested_data import get_float_dtype
+
+# Data entries not stored as separate arrays, written to the metadata
+meta_keys = ['altitude', 'n_samples', 'n_samples_per_loc', 'n_locs',
+             'years', 'locations', 'datetime', 'datetime_full']
+
+
+def get_cache_key(data_config, sel_sample_ids=[], dtype='float64',
+                  ref_height=100., remove_low_wind_samples=True,
+                  normalize=True):
+    """Hash of the data and preprocessing settings of preprocessed data.
+
+    Clustering settings, e.g. n_clusters or n_pcs, are not included,
+    such that the preprocessed data is reused for all of them.
+
+    Returns:
+        tuple of str and dict: Hash key and the settings it was built from.
+
+    """
+    _, settings = get_store_key(data_config, sel_sample_ids=sel_sample_ids,
+                                dtype=dtype)
+    settings['locations'] = [(float(lat), float(lon))
+                             for lat, lon in data_config.locations]
+    settings['ref_height'] = float(ref_height)
+    settings['remove_low_wind_samples'] = bool(remove_low_wind_samples)
+    settings['normalize'] = bool(normalize)
+    key = hashlib.md5(repr(sorted(settings.items())).encode()).hexdigest()
+    return key[:16], settings
+
+
+class PreprocessedDataCache:
+    """On-disk cache of the output of preprocess_data.
+
+    The preprocessed data is stored in `<cache_dir>/<key>/`, each array
+    of the data dictionary in a separate `.npy` file, the remaining
+    entries in `meta.pickle`. The key is a hash of the Data and
+    preprocessing settings. The cached data is complete once the metadata
+    file is written.
+    """
+
+    def __init__(self, cache_dir, data_config, sel_sample_ids=[],
+                 dtype='float64', ref_height=100.,
+                 remove_low_wind_samples=True, normalize=True):
+        self.key, self.settings = get_cache_key(
+            data_config,
+            sel_sample_ids=sel_sample_ids,
+            dtype=dtype,
+            ref_height=ref_height,
+            remove_low_wind_samples=remove_low_wind_samples,
+            normalize=normalize)
+        self.cache_dir = os.path.join(cache_dir, self.key)
+
+    @classmethod
+    def from_config(cls, config, sel_sample_ids=[],
+                    remove_low_wind_samples=True, normalize=True):
+        dtype = get_float_dtype(config)
+        return cls(config.IO.preprocessed_data_cache,
+                   config.Data,
+                   sel_sample_ids=sel_sample_ids,
+                   dtype=dtype,
+                   ref_height=config.General.ref_height,
+                   remove_low_wind_samples=remove_low_wind_samples,
+                   normalize=normalize)
+
+    @property
+    def meta_file(self):
+        return os.path.join(self.cache_dir, 'meta.pickle')
+
+    def array_file(self, key):
+        return os.path.join(self.cache_dir, '{}.npy'.format(key))
+
+    def exists(self):
+        return os.path.isfile(self.meta_file)
+
+    def read(self, mmap=True):
+        """Read the cached preprocessed data.
+
+        Args:
+            mmap (bool, optional): Memory map the arrays read-only instead
+                of reading them to memory.
+
+        Returns:
+            dict: Preprocessed data as returned by preprocess_data.
+
+        """
+        with open(self.meta_file, 'rb') as f:
+            meta = pickle.load(f)
+        data = meta['data']
+        mmap_mode = 'r' if mmap else None
+        for key in meta['array_keys']:
+            data[key] = np.load(self.array_file(key), mmap_mode=mmap_mode)
+        print('Preprocessed data read from cache {}.'.format(self.cache_dir))
+        return data
+
+    def write(self, data):
+        """Write preprocessed data to the cache."""
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        array_keys = []
+        meta_data = {}
+        for key, val in data.items():
+            if key in meta_keys or not isinstance(val, np.ndarray):
+                meta_data[key] = val
+                continue
+            array_file = self.array_file(key)
+            tmp_file = array_file.replace('.npy',
+                                          '_{}.tmp.npy'.format(os.getpid()))
+            np.save(tmp_file, val)
+            os.replace(tmp_file, array_file)
+            array_keys.append(key)
+        # Metadata is written last - marks the cache as complete
+        meta = {
+            'settings': self.settings,
+            'array_keys': array_keys,
+            'data': meta_data,
+            }
+        tmp_file = '{}.{}.tmp'.format(self.meta_file, os.getpid())
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(meta, f)
+        os.replace(tmp_file, self.meta_file)
@@ -216,6 +216,45 @@ def plot_frequency_projection(config, data_pc):
 
 
 
+def pca_sweep(training_data, all_n_pcs, data=None):
+    """Reconstruct data using PCAs with each number of components in all_n_pcs.
+
+    A single PCA with the maximal number of components is fitted via the
+    full SVD, the PCA with n_pcs components is its truncation to the first
+    n_pcs components - the same as fitting PCA(n_components=n_pcs,
+    svd_solver='full'). The data is projected once and the reconstruction
+    is built up component by component.
+
+    Args:
+        training_data (array): Data the PCA is fitted to.
+        all_n_pcs (list): Numbers of principal components to evaluate.
+        data (array, optional): Data to reconstruct, training data if None.
+
+    Yields:
+        tuple: Number of components, reconstructed data and cumulative
+            explained variance ratio. The reconstructed data array is
+            updated in place for the next number of components, copy it
+            to keep it.
+
+    """
+    all_n_pcs = sorted(all_n_pcs)
+    # Full SVD: the leading components do not depend on n_components
+    pca = PCA(n_components=all_n_pcs[-1], svd_solver='full')
+    pca.fit(training_data)
+    if data is None:
+        data = training_data
+    data_pc = pca.transform(data)
+    data_back_pc = np.empty(data.shape, dtype=data_pc.dtype)
+    data_back_pc[:] = pca.mean_
+    n_used = 0
+    for n_pcs in all_n_pcs:
+        data_back_pc += data_pc[:, n_used:n_pcs] \
+            @ pca.components_[n_used:n_pcs, :]
+        n_used = n_pcs
+        yield n_pcs, data_back_pc, \
+            np.sum(pca.explained_variance_ratio_[:n_pcs])
+
+
 def analyse_pc(config, wind_data, loc_info="", pipeline=None, n_pcs=5):
     # TODO config plot output, remove loc info
     altitudes = wind_data['altitude']
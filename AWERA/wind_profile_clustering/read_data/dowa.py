@@ -2,6 +2,7 @@ import numpy as np
 import xarray as xr
 import pickle
 from pathlib import Path
+from scipy.spatial import cKDTree
 
 path = Path(__file__).parent
 
@@ -42,14 +43,47 @@ def determine_grid_point_coords(lat, lon, point='ll'):
 
 
 def find_closest_dowa_grid_point(lat, lon):
-    grid_cell_corners = ['ul', 'ur', 'lr', 'll']
-    coords_grid_cell_corners = [determine_grid_point_coords(lat, lon, rp) for rp in grid_cell_corners]
-    distances = []
-    for a, b in coords_grid_cell_corners:
-        distances.append(((a - lat)**2 + (b - lon)**2)**.5)
-    closest_corner = grid_cell_corners[np.argmin(distances)]
-    i_lat, i_lon = determine_grid_point(lat, lon, point=closest_corner)
-    return i_lat, i_lon
+    i_lats, i_lons = find_closest_dowa_grid_points([(lat, lon)])
+    return int(i_lats[0]), int(i_lons[0])
+
+
+# Spatial index of the curvilinear DOWA grid, built once per process
+grid_tree = None
+
+
+def get_grid_tree():
+    """KD-tree over the (lat, lon) coordinates of all DOWA grid points."""
+    global grid_tree
+    if grid_tree is None:
+        grid_tree = cKDTree(np.column_stack((lats_dowa_grid.reshape(-1),
+                                             lons_dowa_grid.reshape(-1))))
+    return grid_tree
+
+
+def find_closest_dowa_grid_points(locations):
+    """Grid indices of the DOWA grid points closest to the locations.
+
+    Locations outside of the grid are mapped to the closest grid point on
+    its boundary, no error is raised.
+
+    Args:
+        locations (list): Locations given as list of (lat, lon).
+
+    Returns:
+        tuple of ndarray: Latitude and longitude grid indices.
+
+    """
+    locations = np.asarray(locations, dtype=np.float64).reshape((-1, 2))
+    _, i_locs = get_grid_tree().query(locations)
+    return np.unravel_index(i_locs, lats_dowa_grid.shape)
+
+
+def find_time_index(datetime, date):
+    """Index of the first occurrence of date in the sorted timestamps."""
+    i = int(np.searchsorted(datetime, date, side='left'))
+    if i == len(datetime) or datetime[i] != date:
+        raise ValueError('{} is not in the DOWA timestamps'.format(date))
+    return i
 
 
 def read_netcdf(i_lat, i_lon, data_dir):
@@ -93,11 +127,8 @@ def read_data(grid_points={'coords': (52.85, 3.44)}, data_dir='DOWA/'):
         if 'ids' in grid_points:
             i_lats, i_lons = grid_points['ids'][0], grid_points['ids'][1]
         elif 'mult_coords' in grid_points:  # Mulitple locations given as list of [(lat,lon), (lat1,lon1)].
-            i_lats, i_lons = [], []
-            for loc in grid_points['mult_coords']:
-                i_lat, i_lon = find_closest_dowa_grid_point(*loc)
-                i_lats.append(i_lat)
-                i_lons.append(i_lon)
+            i_lats, i_lons = find_closest_dowa_grid_points(
+                grid_points['mult_coords'])
         n_locs = len(i_lats)
 
         first_iter = True
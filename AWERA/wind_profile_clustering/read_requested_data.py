@@ -4,9 +4,12 @@
 import xarray as xr
 import numpy as np
 import sys
+import os
 from os.path import join as path_join
 
-from .era5_ml_height_calc import compute_level_heights
+from .era5_ml_height_calc import compute_level_heights, \
+    interpolate_to_heights
+from .wind_profile_store import WindProfileStore
 
 
 # FIXME what of this is still necessary?
@@ -73,6 +76,45 @@ def read_raw_data(data_config, sel_sample_ids=[], lat0=50, lon0=0):
     return ds, lons, lats, levels, hours, i_highest_level
 
 
+# Surface datasets opened by this process, keyed by process id and files
+surface_ds_cache = {}
+
+
+def read_surface_files(data_config):
+    """"Open the monthly ERA5 surface files once per process.
+
+    Opening all monthly surface files for every location dominates the
+    reading time of location wise files, the opened dataset is therefore
+    cached and reused for all following locations read by the same process.
+    Datasets inherited from a parent process are not reused, such that
+    each worker of a multiprocessing Pool holds its own file handles.
+
+    Returns:
+        Dataset: Reading object of the surface (netCDF) files
+
+    """
+    sfc_files = []
+    for y in range(data_config.start_year, data_config.final_year+1):
+        for m in range(1, data_config.year_final_month+1):
+            sfc_files.append(
+                data_config.surface_file_name_format.format(y, m))
+    key = (os.getpid(), tuple(sfc_files))
+    if key not in surface_ds_cache:
+        clear_surface_files_cache()
+        # Load the data from the NetCDF files.
+        surface_ds_cache[key] = xr.open_mfdataset(sfc_files,
+                                                  decode_times=True)
+    return surface_ds_cache[key]
+
+
+def clear_surface_files_cache():
+    """Close and remove surface datasets cached by this process."""
+    for key in list(surface_ds_cache):
+        ds_sfc = surface_ds_cache.pop(key)
+        if key[0] == os.getpid():
+            ds_sfc.close()
+
+
 def read_ds_single_loc_files(data_config,
                              lat, lon,
                              by_index=False,
@@ -90,14 +132,8 @@ def read_ds_single_loc_files(data_config,
     ds_ml = ds_ml.sel(time=slice(str(data_config.start_year),
                                  str(data_config.final_year)))
 
-    # Read surface pressure files
-    sfc_files = []
-    for y in range(data_config.start_year, data_config.final_year+1):
-        for m in range(1, data_config.year_final_month+1):
-            sfc_files.append(
-                data_config.surface_file_name_format.format(y, m))
-    # Load the data from the NetCDF files.
-    ds_sfc = xr.open_mfdataset(sfc_files, decode_times=True)
+    # Read surface pressure files - opened once per process
+    ds_sfc = read_surface_files(data_config)
     ds_sfc = ds_sfc.sel(latitude=[lat], longitude=[lon])
 
     # Test matching lat/lon representations
@@ -125,7 +161,7 @@ def eval_single_loc_era5_input(data_config,
                                n_per_loc,
                                loc_i_loc,
                                ds=None,
-                               use_memmap=False):
+                               store=None):
     # TODO improve arguments!
     lat, lon,  i_lat, i_lon, i = loc_i_loc
 
@@ -155,162 +191,156 @@ def eval_single_loc_era5_input(data_config,
                                                           q_levels)
     # Determine wind at altitudes of interest by
     # means of interpolating the raw wind data.
-
-    # Interpolation results array.
-    v_req_alt_east_loc = np.zeros((n_per_loc, len(data_config.height_range)))
-    v_req_alt_north_loc = np.zeros((n_per_loc, len(data_config.height_range)))
-
-    # same = 0
-    for i_hr in range(n_per_loc):
-        if not np.all(level_heights[i_hr, 0] > data_config.height_range):
-            raise ValueError("Requested height ({:.2f} m) is higher than \
-                             height of highest model level."
-                             .format(level_heights[i_hr, 0]))
-        v_req_alt_east_loc[i_hr, :] = np.interp(data_config.height_range,
-                                                level_heights[i_hr, ::-1],
-                                                v_levels_east[i_hr, ::-1])
-        v_req_alt_north_loc[i_hr, :] = np.interp(data_config.height_range,
-                                                 level_heights[i_hr, ::-1],
-                                                 v_levels_north[i_hr, ::-1])
-        # Sanity check height range oversampling
-        # same_hr = sum(np.diff(np.round(np.interp(data_config.height_range,
-        #                       level_heights[i_hr, ::-1],
-        #                       np.arange(level_heights.shape[1])))) == 0)
-    #     same += same_hr
-    # print('Height Level Ids: ',
-    #       np.round(np.interp(data_config.height_range,
-    #                          level_heights[i_hr, ::-1],
-    #                          np.arange(level_heights.shape[1]))))
-    # print('Same level data used {} times.'.format(same))
-    if use_memmap:
-        v_east = np.memmap('tmp/v_east.memmap', dtype='float64', mode='r+',
-                           shape=(n_per_loc, len(data_config.height_range)),
-                           offset=n_per_loc*i*len(data_config.height_range)
-                           * int(64/8))
-        v_east[:, :] = v_req_alt_east_loc
-        del v_east
-        v_north = np.memmap('tmp/v_north.memmap', dtype='float64', mode='r+',
-                            shape=(n_per_loc, len(data_config.height_range)),
-                            offset=n_per_loc*i*len(data_config.height_range)
-                            * int(64/8))
-        v_north[:, :] = v_req_alt_north_loc
-        del v_north
+    v_req_alt_east_loc, v_req_alt_north_loc = interpolate_to_heights(
+        data_config.height_range,
+        level_heights,
+        v_levels_east,
+        v_levels_north)
+    if store is not None:
+        # Write location chunks to the wind profile store
+        store.write_location((lat, lon),
+                             v_req_alt_east_loc,
+                             v_req_alt_north_loc)
         return 0
     else:
         return(v_req_alt_east_loc, v_req_alt_north_loc)
 
 
-def get_wind_data_era5(config,
-                       locations=[(40, 1)],
-                       sel_sample_ids=[]):
-    lat, lon = locations[0]
-    ds, lons, lats, levels, hours, i_highest_level = read_raw_data(
-        config.Data, sel_sample_ids=sel_sample_ids, lat0=lat, lon0=lon)
-    n_per_loc = len(hours)
-
-    if config.Data.era5_data_input_format != 'single_loc':
-        # Convert lat/lon lists to indices
-        lats, lons = (list(lats), list(lons))
-        i_locs = [(lats.index(lat), lons.index(lon)) for lat, lon in locations]
+def get_float_dtype(config):
+    """Floating point type of the wind profiles and derived training data.
 
+    Single precision (General: use_float32) halves the memory of the
+    wind profiles and the training data and speeds up PCA and KMeans.
+    The deviation w.r.t. double precision can be checked via
+    Clustering.check_float32_accuracy.
+    """
+    if getattr(config.General, 'use_float32', False):
+        return np.dtype('float32')
     else:
-        i_locs = [(0, 0) for lat, lon in locations]
+        return np.dtype('float64')
+
 
+def get_wind_data_era5(config,
+                       locations=[(40, 1)],
+                       sel_sample_ids=[],
+                       store_mmap=True):
     if config.General.use_memmap:
-        v_req_alt_east = np.memmap('tmp/v_east.memmap', dtype='float64',
-                                   mode='w+',
-                                   shape=(n_per_loc*len(locations),
-                                          len(config.Data.height_range)))
-        v_req_alt_north = np.memmap('tmp/v_north.memmap', dtype='float64',
-                                    mode='w+',
-                                    shape=(n_per_loc*len(locations),
-                                           len(config.Data.height_range)))
+        # Wind profiles are kept in the on-disk store,
+        # only locations not yet in the store are read from ERA5
+        store = WindProfileStore.from_config(config,
+                                             sel_sample_ids=sel_sample_ids)
+        eval_locations = store.missing_locations(locations)
+        if len(eval_locations) < len(locations):
+            print('Wind profile store {}: {} of {} locations reused.'.format(
+                store.store_dir, len(locations) - len(eval_locations),
+                len(locations)))
     else:
-        v_req_alt_east = np.zeros((n_per_loc*len(locations),
-                                   len(config.Data.height_range)))
-        v_req_alt_north = np.zeros((n_per_loc*len(locations),
-                                    len(config.Data.height_range)))
-
-    if config.Processing.parallel:
-        # TODO import not here
-        from multiprocessing import Pool
-        from tqdm import tqdm
-        loc_i_loc_combinations = [(locations[i][0], locations[i][1],
-                                   i_loc[0], i_loc[1], i)
-                                  for i, i_loc in enumerate(i_locs)]
-        import functools
-        funct = functools.partial(eval_single_loc_era5_input,
-                                  config.Data, sel_sample_ids,
-                                  i_highest_level, levels, n_per_loc,
-                                  ds=ds,
-                                  use_memmap=config.General.use_memmap)
-        with Pool(config.Processing.n_cores) as p:
-            if config.Processing.progress_out == 'stdout':
-                file = sys.stdout
-            else:
-                file = sys.stderr
-            results = list(tqdm(p.imap(funct, loc_i_loc_combinations),
-                                total=len(loc_i_loc_combinations),
-                                file=file))
-            if not config.General.use_memmap:
-                for i, val in enumerate(results):
-                    v_req_alt_east_loc, v_req_alt_north_loc = val
+        store = None
+        eval_locations = locations
+
+    if len(eval_locations) > 0:
+        lat, lon = eval_locations[0]
+        ds, lons, lats, levels, hours, i_highest_level = read_raw_data(
+            config.Data, sel_sample_ids=sel_sample_ids, lat0=lat, lon0=lon)
+        n_per_loc = len(hours)
+        datetime = ds['time'].values
+        if store is not None and store.read_meta() is None:
+            store.write_meta(datetime)
+
+        if config.Data.era5_data_input_format != 'single_loc':
+            # Convert lat/lon lists to indices
+            lats, lons = (list(lats), list(lons))
+            i_locs = [(lats.index(lat), lons.index(lon))
+                      for lat, lon in eval_locations]
+
+        else:
+            i_locs = [(0, 0) for lat, lon in eval_locations]
+
+        if store is None:
+            v_req_alt_east = np.zeros((n_per_loc*len(locations),
+                                       len(config.Data.height_range)),
+                                      dtype=get_float_dtype(config))
+            v_req_alt_north = np.zeros((n_per_loc*len(locations),
+                                        len(config.Data.height_range)),
+                                       dtype=get_float_dtype(config))
+
+        if config.Processing.parallel:
+            # TODO import not here
+            from multiprocessing import Pool
+            from tqdm import tqdm
+            loc_i_loc_combinations = [(eval_locations[i][0],
+                                       eval_locations[i][1],
+                                       i_loc[0], i_loc[1], i)
+                                      for i, i_loc in enumerate(i_locs)]
+            import functools
+            funct = functools.partial(eval_single_loc_era5_input,
+                                      config.Data, sel_sample_ids,
+                                      i_highest_level, levels, n_per_loc,
+                                      ds=ds,
+                                      store=store)
+            with Pool(config.Processing.n_cores) as p:
+                if config.Processing.progress_out == 'stdout':
+                    file = sys.stdout
+                else:
+                    file = sys.stderr
+                results = list(tqdm(p.imap(funct, loc_i_loc_combinations),
+                                    total=len(loc_i_loc_combinations),
+                                    file=file))
+                if store is None:
+                    for i, val in enumerate(results):
+                        v_req_alt_east_loc, v_req_alt_north_loc = val
+                        v_req_alt_east[n_per_loc*i:n_per_loc*(i+1), :] = \
+                            v_req_alt_east_loc
+                        v_req_alt_north[n_per_loc*i:n_per_loc*(i+1), :] = \
+                            v_req_alt_north_loc
+        else:
+            # Not parallelized version:
+            for i, i_loc in enumerate(i_locs):
+                # TODO add progress bar
+                i_lat, i_lon = i_loc
+                lat, lon = eval_locations[i]
+                res = eval_single_loc_era5_input(
+                    config.Data,
+                    sel_sample_ids, i_highest_level,
+                    levels, n_per_loc,
+                    (lat, lon, i_lat, i_lon, i),
+                    ds=ds,
+                    store=store)
+                # TODO is this even xarray anymore?
+                # check efficiency numpy, pandas, xarray
+                if store is None:
+                    v_req_alt_east_loc, v_req_alt_north_loc = res
                     v_req_alt_east[n_per_loc*i:n_per_loc*(i+1), :] = \
                         v_req_alt_east_loc
                     v_req_alt_north[n_per_loc*i:n_per_loc*(i+1), :] = \
                         v_req_alt_north_loc
+        ds.close()  # Close the input NetCDF file.
     else:
-        # Not parallelized version:
-        for i, i_loc in enumerate(i_locs):
-            # TODO add progress bar
-            i_lat, i_lon = i_loc
-            lat, lon = locations[i]
-            v_req_alt_east_loc, v_req_alt_north_loc = \
-                eval_single_loc_era5_input(
-                    config.Data,
-                    sel_sample_ids, i_highest_level,
-                    levels, n_per_loc,
-                    (lat, lon, i_lat, i_lon, i),
-                    ds=ds)
-            # TODO is this even xarray anymore?
-            # check efficiency numpy, pandas, xarray
-            v_req_alt_east[n_per_loc*i:n_per_loc*(i+1), :] = v_req_alt_east_loc
-            v_req_alt_north[n_per_loc*i:n_per_loc*(i+1), :] = \
-                v_req_alt_north_loc
-
-        # if era5_data_input_format == 'single_loc':
-        # Close dataset - free resources? #TODO
-        #    ds.close()
-    # TODO This could get too large for a large number of locations
-    # - better use an xarray/ more efficient data structure here?
-    if config.General.use_memmap:
-        del v_req_alt_east
-        del v_req_alt_north
-        v_req_alt_east = np.memmap('tmp/v_east.memmap', dtype='float64',
-                                   mode='r',
-                                   shape=(n_per_loc*len(locations),
-                                          len(config.Data.height_range)))
-        v_req_alt_north = np.memmap('tmp/v_north.memmap', dtype='float64',
-                                    mode='r',
-                                    shape=(n_per_loc*len(locations),
-                                           len(config.Data.height_range)))
+        # All locations read from store
+        meta = store.read_meta()
+        n_per_loc = meta['n_samples_per_loc']
+        datetime = meta['datetime']
 
+    if store is not None:
+        # Read-only memory map of the concatenated profiles of all locations
+        # or read to memory, e.g. for single blocks of locations
+        v_req_alt_east, v_req_alt_north = store.read(locations,
+                                                     mmap=store_mmap)
 
     wind_data = {
         'wind_speed_east': v_req_alt_east,
         'wind_speed_north': v_req_alt_north,
-        'n_samples': n_per_loc*len(i_locs),
+        'n_samples': n_per_loc*len(locations),
         'n_samples_per_loc': n_per_loc,
-        'datetime': ds['time'].values,
+        'datetime': datetime,
         'altitude': config.Data.height_range,
         'years': (config.Data.start_year, config.Data.final_year),
         'locations': locations,
         }
-    ds.close()  # Close the input NetCDF file.
     return wind_data
 
 
-def get_wind_data(config, sel_sample_ids=[], locs=[]):
+def get_wind_data(config, sel_sample_ids=[], locs=[], store_mmap=True):
     # TODO add single sample selection for all data types
     if len(locs) == 0:
         # Use all configuration locations
@@ -326,7 +356,7 @@ def get_wind_data(config, sel_sample_ids=[], locs=[]):
         os.environ["HDF5_USE_FILE_LOCKING"] = "FALSE"
         # TODO check - is this still needed?
         # if yes - where set, needed for era5? FIX
-        from .read_data.dowa import read_data
+        from .read_data.dowa import read_data, find_time_index
         wind_data = read_data({'mult_coords': locs}, config.Data.DOWA_data_dir)
 
         # Use start_year to final_year data only
@@ -336,8 +366,8 @@ def get_wind_data(config, sel_sample_ids=[], locs=[]):
         end_date = np.datetime64(
             '{}-01-01T00:00:00.000000000'.format(config.Data.final_year+1))
 
-        start_idx = list(hours).index(start_date)
-        end_idx = list(hours).index(end_date)
+        start_idx = find_time_index(hours, start_date)
+        end_idx = find_time_index(hours, end_date)
         data_range = range(start_idx, end_idx + 1)
 
         for key in ['wind_speed_east', 'wind_speed_north', 'datetime']:
@@ -357,10 +387,69 @@ def get_wind_data(config, sel_sample_ids=[], locs=[]):
     elif config.Data.use_data in ['ERA5', 'ERA5_1x1']:
         wind_data = get_wind_data_era5(config,
                                        locations=locs,
-                                       sel_sample_ids=sel_sample_ids)
+                                       sel_sample_ids=sel_sample_ids,
+                                       store_mmap=store_mmap)
     else:
         raise ValueError("Wrong data type specified: "
                          "{} - no option to read data is executed".format(
                              config.Data.use_data))
 
+    # Single or double precision processing
+    for key in ['wind_speed_east', 'wind_speed_north']:
+        wind_data[key] = wind_data[key].astype(get_float_dtype(config),
+                                               copy=False)
     return wind_data
+
+
+def location_blocks(config, locs=[], n_locs_per_block=None):
+    """Split the locations into blocks, as read by get_wind_data_blocks.
+
+    Args:
+        config (Config): Configuration, Data locations are used if
+            no locations are given.
+        locs (list, optional): Locations to split.
+        n_locs_per_block (int, optional): Number of locations per block,
+            defaults to Processing: n_locs_per_block.
+
+    Yields:
+        tuple of int and list: Index of the first location of the block
+            and the locations of the block.
+
+    """
+    if len(locs) == 0:
+        locs = config.Data.locations
+    if n_locs_per_block is None:
+        n_locs_per_block = getattr(config.Processing, 'n_locs_per_block', 1)
+    n_locs_per_block = max(int(n_locs_per_block), 1)
+    for i_start in range(0, len(locs), n_locs_per_block):
+        yield i_start, locs[i_start:i_start+n_locs_per_block]
+
+
+def get_wind_data_blocks(config, sel_sample_ids=[], locs=[],
+                         n_locs_per_block=None):
+    """Read the wind data of blocks of locations one after the other.
+
+    Only the wind profiles of a single block of locations are held in
+    memory at a time, peak memory therefore scales with the block size
+    (Processing: n_locs_per_block) instead of the number of locations.
+    Profiles already in the wind profile store are read from the store.
+
+    Args:
+        config (Config): Configuration, Data locations are used if
+            no locations are given.
+        sel_sample_ids (list, optional): Selected sample ids, all if empty.
+        locs (list, optional): Locations to read.
+        n_locs_per_block (int, optional): Number of locations per block.
+
+    Yields:
+        tuple of int and dict: Index of the first location of the block
+            and the wind data of the block, as returned by get_wind_data.
+
+    """
+    for i_start, block_locs in location_blocks(
+            config, locs=locs, n_locs_per_block=n_locs_per_block):
+        yield i_start, get_wind_data(
+            config,
+            sel_sample_ids=sel_sample_ids,
+            locs=block_locs,
+            store_mmap=False)
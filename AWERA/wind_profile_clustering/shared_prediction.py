@@ -0,0 +1,180 @@
+"""Parallel label prediction with the pipeline in shared memory.
+
+The fitted pipeline parameters - PCA mean and components, cluster centers
+and the cluster mapping - are copied once to shared memory blocks, which
+are attached by each worker process on start. The workers write the
+labels and the normalisation values of each block of locations into
+shared output arrays, such that neither the pipeline nor the per-location
+results are pickled between the processes.
+"""
+import hashlib
+import numpy as np
+from multiprocessing import get_context, shared_memory
+
+from .read_requested_data import get_wind_data, location_blocks
+from .preprocess_data import preprocess_data
+from .prediction_kernel import pipeline_parameters, kernel_parameters, \
+    nearest_center_labels, labels_dtype
+
+# Shared memory blocks and arrays attached by a worker process
+worker_state = {}
+
+
+def pipeline_hash(pipeline, cluster_mapping):
+    """Hash of the pipeline parameters, identifies the predicted labels."""
+    params = pipeline_parameters(pipeline, cluster_mapping)
+    sha = hashlib.sha1()
+    for key in sorted(params):
+        val = np.ascontiguousarray(params[key], dtype=np.float64)
+        sha.update('{}{}'.format(key, val.shape).encode())
+        sha.update(val.tobytes())
+    return sha.hexdigest()
+
+
+def predict_labels_from_parameters(training_data, params,
+                                   block_size=4096):
+    """Nearest cluster center in PC space, same as pipeline.predict."""
+    if 'weights' not in params:
+        params = dict(params)
+        params['weights'], params['offset'] = kernel_parameters(
+            params['mean'], params['components'], params['centers'],
+            scale=params.get('scale'))
+    labels = nearest_center_labels(training_data, params['weights'],
+                                   params['offset'], block_size=block_size)
+    return params['label_map'][labels]
+
+
+def create_shared_arrays(arrays):
+    """Copy arrays to new shared memory blocks.
+
+    Returns:
+        tuple of dict: Shared memory blocks and the specifications
+            (name, shape, dtype) to attach to them.
+
+    """
+    blocks, specs = {}, {}
+    for key, val in arrays.items():
+        val = np.ascontiguousarray(val)
+        shm = shared_memory.SharedMemory(create=True,
+                                         size=max(val.nbytes, 1))
+        np.ndarray(val.shape, dtype=val.dtype, buffer=shm.buf)[...] = val
+        blocks[key] = shm
+        specs[key] = (shm.name, val.shape, val.dtype.str)
+    return blocks, specs
+
+
+def attach_shared_arrays(specs):
+    """Attach to shared memory blocks created by another process."""
+    blocks, arrays = {}, {}
+    for key, (name, shape, dtype) in specs.items():
+        # Spawned workers share the resource tracker of the parent,
+        # the blocks are unlinked by the creating process only
+        shm = shared_memory.SharedMemory(name=name)
+        blocks[key] = shm
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return blocks, arrays
+
+
+def release_shared_arrays(blocks, unlink=True):
+    for shm in blocks.values():
+        shm.close()
+        if unlink:
+            shm.unlink()
+
+
+def init_worker(config, specs, n_samples_per_loc,
+                remove_low_wind_samples=False, normalize=True):
+    blocks, arrays = attach_shared_arrays(specs)
+    # Kernel weights and offset, computed once per worker
+    arrays['weights'], arrays['offset'] = kernel_parameters(
+        arrays['mean'], arrays['components'], arrays['centers'],
+        scale=arrays.get('scale'))
+    worker_state.update({
+        'config': config,
+        'blocks': blocks,
+        'arrays': arrays,
+        'n_samples_per_loc': n_samples_per_loc,
+        'remove_low_wind_samples': remove_low_wind_samples,
+        'normalize': normalize,
+        'block_size': getattr(config.Processing, 'prediction_block_size',
+                              4096),
+        })
+
+
+def predict_location_block(block):
+    """Predict the labels of a block of locations into the shared output.
+
+    Args:
+        block (tuple): Index of the first location and list of (lat, lon)
+            of the locations of the block, as yielded by location_blocks.
+
+    Returns:
+        int: Number of predicted samples.
+
+    """
+    i, locs = block
+    config = worker_state['config']
+    arrays = worker_state['arrays']
+    data = get_wind_data(config, locs=locs, store_mmap=False)
+    processed_data = preprocess_data(
+        config,
+        data,
+        remove_low_wind_samples=worker_state['remove_low_wind_samples'],
+        normalize=worker_state['normalize'])
+    labels = predict_labels_from_parameters(
+        processed_data['training_data'], arrays,
+        block_size=worker_state['block_size'])
+    n_samples_per_loc = worker_state['n_samples_per_loc']
+    n_samples = len(locs)*n_samples_per_loc
+    if len(labels) != n_samples:
+        raise ValueError('Locations {} yield {} samples, expected {}.'
+                         .format(locs, len(labels), n_samples))
+    j = i*n_samples_per_loc
+    arrays['labels'][j:j+n_samples] = labels
+    arrays['normalisation_value'][j:j+n_samples] = \
+        processed_data['normalisation_value']
+    return n_samples
+
+
+def shared_memory_prediction(config, pipeline, cluster_mapping, locations,
+                             n_samples_per_loc, dtype='float64',
+                             remove_low_wind_samples=False, normalize=True,
+                             file=None):
+    """Predict labels of all locations in parallel via shared memory.
+
+    Each worker reads and predicts one block of locations at a time
+    (Processing: n_locs_per_block), which is written to a fixed offset in
+    the shared output, removing low wind samples is therefore not
+    supported.
+
+    Returns:
+        tuple of ndarray: Labels and normalisation values of all locations.
+
+    """
+    from tqdm import tqdm
+    if remove_low_wind_samples:
+        raise ValueError('Shared memory prediction requires the same number '
+                         'of samples per location, low wind samples cannot '
+                         'be removed.')
+    n_samples = len(locations)*n_samples_per_loc
+    arrays = pipeline_parameters(pipeline, cluster_mapping)
+    arrays['labels'] = np.zeros(n_samples, dtype=labels_dtype)
+    arrays['normalisation_value'] = np.zeros(n_samples, dtype=dtype)
+    blocks, specs = create_shared_arrays(arrays)
+    try:
+        # Spawn processes: do not share the state of the parent process
+        with get_context("spawn").Pool(
+                config.Processing.n_cores,
+                initializer=init_worker,
+                initargs=(config, specs, n_samples_per_loc,
+                          remove_low_wind_samples, normalize)) as p:
+            blocks = list(location_blocks(config, locs=locations))
+            list(tqdm(p.imap(predict_location_block, blocks),
+                      total=len(blocks), file=file))
+        labels, norm = [
+            np.ndarray(arrays[key].shape, dtype=arrays[key].dtype,
+                       buffer=blocks[key].buf).copy()
+            for key in ['labels', 'normalisation_value']]
+    finally:
+        release_shared_arrays(blocks)
+    return labels, norm
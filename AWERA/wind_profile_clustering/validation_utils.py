@@ -1,5 +1,3 @@
-from sklearn.decomposition import PCA
-
 import numpy as np
 import numpy.ma as ma
 
@@ -18,6 +16,7 @@ import matplotlib.pyplot as plt
 
 from .read_requested_data import get_wind_data
 from .wind_profile_clustering import cluster_normalized_wind_profiles_pca, predict_cluster
+from .principal_component_analysis import pca_sweep
 
 import warnings
 from matplotlib.cbook import MatplotlibDeprecationWarning
@@ -308,18 +307,13 @@ def eval_all_pcs(n_features, eval_pcs, wind_data_training, wind_data, data_info,
     for eval_wind_type in wind_type_eval_only:
         vel_res[eval_wind_type] = vel_res_dict
 
-    for n in range(n_features):
-        n = n+1
-        # ---- Principal component analysis
-        # Do pca and back transformation
-        # Train pcs on training data
-        pca = PCA(n_components=n)
-        pca.fit(wind_data_training['training_data'])
-        print("Components reduced from {} to {}.".format(wind_data_training['training_data'].shape[1], pca.n_components_))
-
-        # Pca transform original data and back-transform again
-        data_pc = pca.transform(wind_data['training_data'])
-        data_back_pc = pca.inverse_transform(data_pc)
+    # ---- Principal component analysis
+    # Train pcs on training data once, back transformation of the original
+    # data for each number of pcs by truncation of the components
+    pca_reconstructions = pca_sweep(wind_data_training['training_data'], range(1, n_features+1),
+                                    data=wind_data['training_data'])
+    for n, data_back_pc, _ in pca_reconstructions:
+        print("Components reduced from {} to {}.".format(wind_data_training['training_data'].shape[1], n))
 
         # Find differences between reconstructed and
         pc_differences, pc_full_diffs = get_diffs_reco(wind_data['training_data'], wind_data['wind_speed'],
@@ -1,12 +1,10 @@
-from sklearn.cluster import KMeans
-# TODO use incremental clustering? or mmap
+from sklearn.cluster import KMeans, MiniBatchKMeans
 # Alternative online implementation that does incremental updates of the
 # centers positions using mini-batches. For large scale learning
 #  (say n_samples > 10k) MiniBatchKMeans is probably much faster than the
 # default batch implementation.
 # https://scikit-learn.org/stable/modules/generated/sklearn.cluster.MiniBatchKMeans.html#sklearn.cluster.MiniBatchKMeans
-from sklearn.decomposition import PCA
-# TODO use incremental PCA
+from sklearn.decomposition import PCA, IncrementalPCA
 # https://scikit-learn.org/stable/auto_examples/decomposition/plot_incremental_pca.html
 
 from sklearn.pipeline import make_pipeline
@@ -14,40 +12,51 @@ import numpy as np
 import pandas as pd
 
 import copy
+import time
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 
 from .read_requested_data import get_wind_data
 
 from .preprocess_data import preprocess_data
+from .prediction_kernel import get_predict_fun, labels_dtype
 
 # !!! from ..utils.convenience_utils import write_timing_info
 xlim_pc12 = [-1.6, 1.6]  # [-1.1, 1.1]
 ylim_pc12 = [-1.6, 1.6]  # [-1.1, 1.1]
 
 def cluster_normalized_wind_profiles_pca(training_data, n_clusters, n_pcs=5,
-                                         reorder=None):
+                                         reorder=None, pca=None,
+                                         training_data_pc=None, init=None):
     # Use the (prepocessed) data to find the set of profile shapes that
     # represent the variation in the data the best.
+    # Optional: fitted pca and projected training data are reused,
+    # the clustering is started from the init cluster centers
     n_samples = len(training_data)
 
-    pca = PCA(n_components=n_pcs)
-    training_data_pc = pca.fit_transform(training_data)
+    if pca is None:
+        pca = PCA(n_components=n_pcs)
+        training_data_pc = pca.fit_transform(training_data)
+    elif training_data_pc is None:
+        training_data_pc = pca.transform(training_data)
     print("Components reduced from {} to {}.".format(training_data.shape[1],
                                                      pca.n_components_))
 
-    cluster_model = KMeans(n_clusters=n_clusters, random_state=0).fit(
-        training_data_pc)
+    if init is None:
+        cluster_model = KMeans(n_clusters=n_clusters, random_state=0)
+    else:
+        cluster_model = KMeans(n_clusters=n_clusters, init=init, n_init=1,
+                               random_state=0)
+    cluster_model.fit(training_data_pc)
 
     mean_inertia_fit = cluster_model.inertia_/n_samples
     mean_distance = mean_inertia_fit**.5
     print("Mean distance: {:.3f}".format(mean_distance))
 
     # Determine how much samples belong to each cluster.
-    freq = np.zeros(n_clusters)
     # Labels: Index of the cluster each sample belongs to.
-    for l in cluster_model.labels_:
-        freq[l] += 100. / n_samples
+    freq = np.bincount(cluster_model.labels_,
+                       minlength=n_clusters) * 100. / n_samples
 
     # By default order the clusters on their size.
     plot_order = np.array(sorted(range(n_clusters), key=freq.__getitem__,
@@ -83,6 +92,257 @@ def cluster_normalized_wind_profiles_pca(training_data, n_clusters, n_pcs=5,
     return res
 
 
+def split_cluster_centers(data_pc, centers, labels, n_clusters):
+    """Initial cluster centers from a clustering with fewer clusters.
+
+    The cluster with the largest inertia is split in two along its
+    principal axis until n_clusters centers are found, the new centers are
+    the means of the two halves.
+
+    Args:
+        data_pc (array): Clustered data.
+        centers (array): Cluster centers of the previous clustering.
+        labels (array): Labels of the previous clustering.
+        n_clusters (int): Number of cluster centers to return.
+
+    Returns:
+        array: Initial cluster centers of shape (n_clusters, n_features).
+
+    """
+    centers = [np.asarray(c) for c in centers]
+    members = [np.flatnonzero(labels == i) for i in range(len(centers))]
+    inertia = [np.sum((data_pc[m] - c)**2) for m, c in zip(members, centers)]
+    while len(centers) < n_clusters:
+        i = int(np.argmax(inertia))
+        if inertia[i] == 0:
+            # No cluster left to split, use most distant samples
+            distances = np.min(np.sum((data_pc[:, np.newaxis, :]
+                                       - np.array(centers)[np.newaxis, :, :]
+                                       )**2, axis=2), axis=1)
+            n_missing = n_clusters - len(centers)
+            far = np.argsort(distances)[::-1][:n_missing]
+            centers += list(data_pc[far])
+            break
+        points = data_pc[members[i]]
+        deviation = points - points.mean(axis=0)
+        _, _, v = np.linalg.svd(deviation, full_matrices=False)
+        projection = deviation @ v[0]
+        side = projection > np.median(projection)
+        if side.all() or not side.any():
+            side = projection > 0
+        new = []
+        for half in [side, ~side]:
+            center = points[half].mean(axis=0)
+            new.append((center, members[i][half],
+                        np.sum((points[half] - center)**2)))
+        (centers[i], members[i], inertia[i]) = new[0]
+        centers.append(new[1][0])
+        members.append(new[1][1])
+        inertia.append(new[1][2])
+    return np.array(centers)
+
+
+def cluster_count_sweep(training_data, all_n_clusters, n_pcs=5,
+                        reorder=None, warm_start=True):
+    """Cluster the training data for a range of numbers of clusters.
+
+    The PCA is fitted and the training data projected once for all numbers
+    of clusters. Each clustering is started from the previous solution
+    with its clusters split (see split_cluster_centers) instead of
+    restarting KMeans n_init times.
+
+    Args:
+        training_data (array): Normalised training data.
+        all_n_clusters (list): Numbers of clusters, clustered in ascending
+            order.
+        warm_start (bool, optional): Start from the split previous
+            clusters, otherwise every clustering is fitted from scratch on
+            the same projected data.
+
+    Returns:
+        dict: Numbers of clusters with the fit inertia, fit time [s] and
+            number of KMeans iterations of each step, the PCA fit time [s]
+            and a list of the clustering results per step, same as
+            returned by cluster_normalized_wind_profiles_pca.
+
+    """
+    since = time.time()
+    pca = PCA(n_components=n_pcs)
+    training_data_pc = pca.fit_transform(training_data)
+    sweep = {
+        'n_clusters': [],
+        'fit_inertia': [],
+        'fit_time': [],
+        'n_iter': [],
+        'pca_time': time.time() - since,
+        'results': [],
+        }
+    init = None
+    cluster_model = None
+    for n_clusters in sorted(all_n_clusters):
+        since = time.time()
+        if warm_start and cluster_model is not None:
+            init = split_cluster_centers(training_data_pc,
+                                         cluster_model.cluster_centers_,
+                                         cluster_model.labels_,
+                                         n_clusters)
+        res = cluster_normalized_wind_profiles_pca(
+            training_data, n_clusters, n_pcs=n_pcs, reorder=reorder,
+            pca=pca, training_data_pc=training_data_pc, init=init)
+        fit_time = time.time() - since
+        cluster_model = res['data_processing_pipeline'].steps[-1][1]
+        print("{} clusters: inertia {:.4e}, {} iterations in {:.2f}s"
+              .format(n_clusters, res['fit_inertia'], cluster_model.n_iter_,
+                      fit_time))
+        sweep['n_clusters'].append(n_clusters)
+        sweep['fit_inertia'].append(res['fit_inertia'])
+        sweep['fit_time'].append(fit_time)
+        sweep['n_iter'].append(cluster_model.n_iter_)
+        sweep['results'].append(res)
+    return sweep
+
+
+def iter_batches(blocks, batch_size):
+    """Re-chunk a stream of sample blocks into batches of batch_size samples.
+
+    The last batch holds the remaining batch_size to 2*batch_size samples,
+    or all samples if less than batch_size samples are given.
+    """
+    buffer = []
+    n_buffer = 0
+    for block in blocks:
+        # Copy: blocks may be views of memory mapped data that is reused
+        # for the next block
+        buffer.append(np.array(block))
+        n_buffer += len(block)
+        if n_buffer < 2*batch_size:
+            continue
+        data = np.concatenate(buffer)
+        while len(data) >= 2*batch_size:
+            yield data[:batch_size]
+            data = data[batch_size:]
+        buffer = [data]
+        n_buffer = len(data)
+    if n_buffer > 0:
+        yield np.concatenate(buffer)
+
+
+def cluster_normalized_wind_profiles_pca_incremental(training_data,
+                                                     n_clusters, n_pcs=5,
+                                                     reorder=None,
+                                                     block_size=50000,
+                                                     n_epochs=3,
+                                                     compare_full_batch=False):
+    """Out-of-core version of cluster_normalized_wind_profiles_pca.
+
+    IncrementalPCA and MiniBatchKMeans are fitted on blocks of the
+    training data, such that the full training data is never required in
+    memory at once. The data is passed once for the PCA, n_epochs times for
+    the clustering and once to evaluate the labels and the inertia.
+
+    The clustering is approximate: its inertia exceeds that of the full
+    batch fit, by +3.6% for 8 clusters on 100k synthetic samples in blocks
+    of 50000 samples. Smaller blocks and more clusters increase the
+    difference, e.g. +6% to +28% for 8 and 16 clusters on 32k samples in
+    blocks of 20000 to 5000 samples. Check it via compare_full_batch.
+
+    Args:
+        training_data (ndarray or callable): Normalised training data,
+            e.g. memory mapped, or callable returning a new iterator over
+            blocks of the training data for each pass.
+        block_size (int, optional): Number of samples fitted at once.
+        n_epochs (int, optional): Number of passes for the clustering.
+        compare_full_batch (bool, optional): Also fit the full batch
+            PCA and KMeans - requires the training data in memory - and
+            report the relative inertia difference.
+
+    Returns:
+        dict: Same content as cluster_normalized_wind_profiles_pca.
+
+    """
+    if callable(training_data):
+        get_blocks = training_data
+    else:
+        def get_blocks():
+            return (training_data[i:i+block_size]
+                    for i in range(0, len(training_data), block_size))
+
+    pca = IncrementalPCA(n_components=n_pcs)
+    n_features = None
+    for batch in iter_batches(get_blocks(), max(block_size, n_pcs)):
+        pca.partial_fit(batch)
+        n_features = batch.shape[1]
+    print("Components reduced from {} to {}.".format(n_features,
+                                                     pca.n_components_))
+
+    cluster_model = MiniBatchKMeans(n_clusters=n_clusters, random_state=0,
+                                    batch_size=min(block_size, 4096))
+    for i_epoch in range(n_epochs):
+        for batch in iter_batches(get_blocks(),
+                                  max(block_size, 3*n_clusters)):
+            cluster_model.partial_fit(pca.transform(batch))
+
+    # Labels and inertia w.r.t. the final cluster centers
+    training_data_pc = []
+    labels_fit = []
+    inertia = 0
+    for block in get_blocks():
+        block_pc = pca.transform(block)
+        training_data_pc.append(block_pc)
+        labels_fit.append(cluster_model.predict(block_pc))
+        inertia -= cluster_model.score(block_pc)
+    training_data_pc = np.concatenate(training_data_pc)
+    labels_fit = np.concatenate(labels_fit)
+    n_samples = len(labels_fit)
+
+    mean_distance = (inertia/n_samples)**.5
+    print("Mean distance: {:.3f}".format(mean_distance))
+
+    # Determine how much samples belong to each cluster.
+    freq = np.bincount(labels_fit, minlength=n_clusters) * 100. / n_samples
+
+    # By default order the clusters on their size.
+    plot_order = np.array(sorted(range(n_clusters), key=freq.__getitem__,
+                                 reverse=True))
+    if reorder:
+        plot_order = plot_order[reorder]
+    clusters_pc = cluster_model.cluster_centers_[plot_order, :]
+    freq = freq[plot_order]
+    labels = np.zeros(n_samples).astype(int)
+    for i_new, i_old in enumerate(plot_order):
+        labels[labels_fit == i_old] = i_new
+
+    # Retrieve the mean cluster shapes in original coordinate system.
+    clusters_feature = pca.inverse_transform(clusters_pc)
+    n_altitudes = n_features//2
+
+    res = {
+        'clusters_pc': clusters_pc,
+        'clusters_feature': {
+            'parallel': clusters_feature[:, :n_altitudes],
+            'perpendicular': clusters_feature[:, n_altitudes:]
+        },
+        'frequency_clusters': freq,
+        'sample_labels': labels,
+        'fit_inertia': inertia,
+        'data_processing_pipeline': make_pipeline(pca, cluster_model),
+        'training_data_pc': training_data_pc,
+        'cluster_mapping': plot_order,
+        'pc_explained_variance': pca.explained_variance_,
+        'pca': pca,
+    }
+    if compare_full_batch:
+        full_batch_inertia = cluster_normalized_wind_profiles_pca(
+            np.concatenate(list(get_blocks())), n_clusters,
+            n_pcs=n_pcs)['fit_inertia']
+        res['fit_inertia_full_batch'] = full_batch_inertia
+        res['rel_inertia_difference'] = inertia/full_batch_inertia - 1
+        print("Inertia incremental vs full batch fit: {:.4e} vs {:.4e} "
+              "({:+.2f}%)".format(inertia, full_batch_inertia,
+                                  res['rel_inertia_difference']*100))
+    return res
+
+
 def plot_wind_profile_shapes(config,
                              altitudes, wind_prl, wind_prp, wind_mag=None,
                              n_rows=2,
@@ -526,14 +786,15 @@ def projection_plot_of_clusters(config,
 def predict_cluster(training_data, n_clusters, predict_fun, cluster_mapping):
     n_samples = len(training_data)
     labels_unarranged = predict_fun(training_data)
-    labels = np.zeros(n_samples).astype(int)
-    for i_new, i_old in enumerate(cluster_mapping):
-        labels[labels_unarranged == i_old] = i_new
+    # Cluster mapping: labels_unarranged of cluster_mapping[i_new] -> i_new
+    label_map = np.zeros(n_clusters, dtype=labels_dtype)
+    label_map[np.asarray(cluster_mapping)] = np.arange(len(cluster_mapping))
+    labels = label_map[labels_unarranged]
 
     # Determine how much samples belong to each cluster.
-    frequency_clusters = np.zeros(n_clusters)
-    for l in labels:  # Labels: Index of the cluster each sample belongs to.
-        frequency_clusters[l] += 100. / n_samples
+    # Labels: Index of the cluster each sample belongs to.
+    frequency_clusters = np.bincount(labels,
+                                     minlength=n_clusters) * 100. / n_samples
 
     return labels, frequency_clusters
 
@@ -543,7 +804,34 @@ def single_location_prediction(config, pipeline, cluster_mapping, loc,
                                normalize=True):
     data = get_wind_data(config, locs=[loc])
     # write_timing_info('Input read.', time.time() - since)
+    return data_prediction(config, pipeline, cluster_mapping, data,
+                           remove_low_wind_samples=remove_low_wind_samples,
+                           normalize=normalize)
+
+
+def location_block_prediction(config, pipeline, cluster_mapping, block,
+                              remove_low_wind_samples=False,
+                              normalize=True):
+    """Predict the labels of a block of locations, as yielded by
+    location_blocks. Only the wind data of the block is read.
+
+    Returns:
+        tuple: Index of the first location of the block, labels and
+            normalisation value of the samples of the block.
+
+    """
+    i_start, locs = block
+    data = get_wind_data(config, locs=locs, store_mmap=False)
+    labels, norm = data_prediction(
+        config, pipeline, cluster_mapping, data,
+        remove_low_wind_samples=remove_low_wind_samples,
+        normalize=normalize)
+    return i_start, labels, norm
+
 
+def data_prediction(config, pipeline, cluster_mapping, data,
+                    remove_low_wind_samples=False,
+                    normalize=True):
     processed_data_full = preprocess_data(
         config,
         data,
@@ -554,7 +842,7 @@ def single_location_prediction(config, pipeline, cluster_mapping, loc,
     labels, frequency_clusters = predict_cluster(
         processed_data_full['training_data'],
         config.Clustering.n_clusters,
-        pipeline.predict,
+        get_predict_fun(config, pipeline),
         cluster_mapping)
     # Interpolate normalised wind speed at reference height 100m
     # Backscaling for cluster profile to sample profile is given roughtly
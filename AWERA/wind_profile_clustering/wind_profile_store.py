@@ -0,0 +1,228 @@
+"""Chunked on-disk store of the wind profiles read from the input data.
+
+Wind profiles are written once per location and reused by later runs with
+the same data settings, e.g. training, prediction and validation runs.
+Multiple locations are read as a read-only memory map.
+"""
+import os
+import pickle
+import hashlib
+import itertools
+import numpy as np
+
+# Numbering of the assembled profile files of this process
+combined_counter = itertools.count()
+
+# Settings of the Data config defining the content of the wind profile store
+store_key_settings = ['use_data', 'era5_data_input_format', 'era5_data_dir',
+                      'model_level_file_name_format',
+                      'surface_file_name_format', 'latitude_ds_file_name',
+                      'DOWA_data_dir',
+                      'start_year', 'final_year', 'year_final_month',
+                      'height_range']
+
+
+def get_store_key(data_config, sel_sample_ids=[], dtype='float64'):
+    """Hash of the data settings that determine the stored wind profiles.
+
+    Args:
+        data_config (Config): Data section of the configuration.
+        sel_sample_ids (list, optional): Selected sample ids, all if empty.
+        dtype (str, optional): Floating point type of the stored profiles.
+
+    Returns:
+        tuple of str and dict: Hash key and the settings it was built from.
+
+    """
+    settings = {key: getattr(data_config, key, None)
+                for key in store_key_settings}
+    settings['height_range'] = [float(h) for h in settings['height_range']]
+    settings['sel_sample_ids'] = [int(i) for i in sel_sample_ids]
+    settings['dtype'] = np.dtype(dtype).name
+    key = hashlib.md5(repr(sorted(settings.items())).encode()).hexdigest()
+    return key[:16], settings
+
+
+class WindProfileStore:
+    """Chunked on-disk store of wind profiles at the requested heights.
+
+    Profiles are stored per location and time block in
+    `<store_dir>/<key>/lat_<lat>_lon_<lon>/block_<i>.npy`, each block holding
+    the east and north wind components of shape (2, n_block, n_heights).
+    The key is a hash of the data settings, such that different data
+    selections never share files and completed locations are reused by
+    later runs. A location is complete once its index file, containing the
+    sample offsets of the blocks, is written.
+    """
+
+    def __init__(self, store_dir, data_config, sel_sample_ids=[],
+                 block_size=8760, dtype='float64'):
+        self.key, self.settings = get_store_key(data_config,
+                                                sel_sample_ids=sel_sample_ids,
+                                                dtype=dtype)
+        self.store_dir = os.path.join(store_dir, self.key)
+        self.n_heights = len(data_config.height_range)
+        self.block_size = int(block_size)
+        self.dtype = np.dtype(dtype)
+        if not os.path.isdir(self.store_dir):
+            os.makedirs(self.store_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config, sel_sample_ids=[]):
+        # Not imported on module level: read_requested_data imports the store
+        from .read_requested_data import get_float_dtype
+        dtype = get_float_dtype(config)
+        return cls(config.IO.wind_profile_store,
+                   config.Data,
+                   sel_sample_ids=sel_sample_ids,
+                   block_size=getattr(config.General,
+                                      'profile_store_block_size', 8760),
+                   dtype=dtype)
+
+    # --------------------------- Metadata
+
+    @property
+    def meta_file(self):
+        return os.path.join(self.store_dir, 'meta.pickle')
+
+    def read_meta(self):
+        try:
+            with open(self.meta_file, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write_meta(self, datetime):
+        """Write the data settings and sample timestamps of the store."""
+        meta = {
+            'settings': self.settings,
+            'datetime': np.asarray(datetime),
+            'n_samples_per_loc': len(datetime),
+            'altitude': self.settings['height_range'],
+            }
+        self._dump(meta, self.meta_file)
+        return meta
+
+    # --------------------------- Location wise chunks
+
+    def location_dir(self, loc):
+        lat, lon = loc
+        return os.path.join(self.store_dir,
+                            'lat_{:.2f}_lon_{:.2f}'.format(lat, lon))
+
+    def index_file(self, loc):
+        return os.path.join(self.location_dir(loc), 'index.pickle')
+
+    def has_location(self, loc):
+        return os.path.isfile(self.index_file(loc))
+
+    def missing_locations(self, locations):
+        return [loc for loc in locations if not self.has_location(loc)]
+
+    def read_index(self, loc):
+        with open(self.index_file(loc), 'rb') as f:
+            return pickle.load(f)
+
+    def write_location(self, loc, v_east, v_north):
+        """Write the wind profiles of a single location block by block.
+
+        Args:
+            loc (tuple): Latitude and longitude of the location.
+            v_east (ndarray): Eastward wind speeds (n_samples, n_heights).
+            v_north (ndarray): Northward wind speeds (n_samples, n_heights).
+
+        """
+        loc_dir = self.location_dir(loc)
+        if not os.path.isdir(loc_dir):
+            os.makedirs(loc_dir, exist_ok=True)
+        n_samples = v_east.shape[0]
+        offsets = list(range(0, n_samples, self.block_size))
+        for i_block, start in enumerate(offsets):
+            end = min(start + self.block_size, n_samples)
+            block = np.empty((2, end - start, self.n_heights),
+                             dtype=self.dtype)
+            block[0] = v_east[start:end]
+            block[1] = v_north[start:end]
+            block_file = os.path.join(loc_dir,
+                                      'block_{}.npy'.format(i_block))
+            tmp_file = block_file.replace('.npy',
+                                          '_{}.tmp.npy'.format(os.getpid()))
+            np.save(tmp_file, block)
+            os.replace(tmp_file, block_file)
+        # Index is written last - marks the location as complete
+        self._dump({'offsets': offsets, 'n_samples': n_samples},
+                   self.index_file(loc))
+
+    def read_location(self, loc, mmap=True):
+        """Read the wind profiles of a single location.
+
+        Returns:
+            tuple of ndarray: Eastward and northward wind speeds
+                (n_samples, n_heights).
+
+        """
+        index = self.read_index(loc)
+        mmap_mode = 'r' if mmap else None
+        blocks = [np.load(os.path.join(self.location_dir(loc),
+                                       'block_{}.npy'.format(i_block)),
+                          mmap_mode=mmap_mode)
+                  for i_block in range(len(index['offsets']))]
+        if len(blocks) == 1:
+            return blocks[0][0], blocks[0][1]
+        return (np.concatenate([b[0] for b in blocks]),
+                np.concatenate([b[1] for b in blocks]))
+
+    def read(self, locations, mmap=True):
+        """Read the wind profiles of multiple locations, concatenated.
+
+        If mmap is set, the profiles of a single location are memory mapped
+        from the store. Those of multiple locations are assembled into a
+        process specific file in the store, which is memory mapped
+        read-only and removed right away - no copies accumulate in the
+        store. Otherwise the profiles are read to memory.
+
+        Returns:
+            tuple of ndarray: Eastward and northward wind speeds
+                (n_locs*n_samples_per_loc, n_heights).
+
+        """
+        if mmap and len(locations) == 1:
+            return self.read_location(locations[0], mmap=True)
+        n_samples_per_loc = self.read_index(locations[0])['n_samples']
+        shape = (2, n_samples_per_loc*len(locations), self.n_heights)
+        if mmap:
+            combined_file = os.path.join(
+                self.store_dir, 'combined_{}_{}.tmp.npy'.format(
+                    os.getpid(), next(combined_counter)))
+            v = np.lib.format.open_memmap(combined_file, mode='w+',
+                                          dtype=self.dtype, shape=shape)
+            self._fill(v, locations, n_samples_per_loc)
+            v.flush()
+            del v
+            v = np.load(combined_file, mmap_mode='r')
+            # The mapping stays valid after removing the file, the disk
+            # space is released with the last reference to the profiles
+            try:
+                os.remove(combined_file)
+            except OSError:
+                pass
+        else:
+            v = np.empty(shape, dtype=self.dtype)
+            self._fill(v, locations, n_samples_per_loc)
+        return v[0], v[1]
+
+    def _fill(self, v, locations, n_samples_per_loc):
+        for i, loc in enumerate(locations):
+            j = i*n_samples_per_loc
+            v_east, v_north = self.read_location(loc)
+            v[0, j:j+n_samples_per_loc, :] = v_east
+            v[1, j:j+n_samples_per_loc, :] = v_north
+
+    @staticmethod
+    def _dump(obj, file_name):
+        # Write to process specific file first: concurrent writers
+        # never leave a partially written file behind
+        tmp_file = '{}.{}.tmp'.format(file_name, os.getpid())
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(obj, f)
+        os.replace(tmp_file, file_name)
@@ -0,0 +1,45 @@
+"""Time the AWERA chain stages on synthetic ERA5 data, fully offline.
+
+python run_benchmark.py                      : run all stages
+python run_benchmark.py -s read,predict      : run selected stages only
+python run_benchmark.py -d benchmark/        : benchmark directory
+python run_benchmark.py -r reference.csv     : compare to previous timings
+python run_benchmark.py -h                   : display this help
+"""
+import sys
+import getopt
+from AWERA.benchmark.benchmark_chain import run_benchmark, all_stages
+
+if __name__ == '__main__':
+    stages = all_stages
+    benchmark_dir = 'benchmark/'
+    reference_file = None
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hs:d:r:",
+                                   ["help", "stages=", "dir=", "reference="])
+    except getopt.GetoptError:
+        print(__doc__)
+        sys.exit()
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(__doc__)
+            sys.exit()
+        elif opt in ("-s", "--stages"):
+            stages = arg.split(',')
+        elif opt in ("-d", "--dir"):
+            benchmark_dir = arg
+        elif opt in ("-r", "--reference"):
+            reference_file = arg
+
+    run_benchmark(benchmark_dir=benchmark_dir,
+                  stages=stages,
+                  n_clusters=3,
+                  n_pcs=3,
+                  n_cores=1,
+                  # Laptop sized: 9 locations, two months hourly data
+                  data_kwargs={'lat_range': (52., 51.5),
+                               'lon_range': (3., 3.5),
+                               'start_year': 2010,
+                               'final_year': 2010,
+                               'year_final_month': 2},
+                  reference_file=reference_file)